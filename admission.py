@@ -0,0 +1,319 @@
+"""Admission control for upstream NIM calls: an adaptive request/token budget and a priority queue.
+
+Each call reserves one request and its estimated tokens from two token
+buckets refilled at the per-minute budgets. When the upstream answers 429,
+both budgets are halved from what was actually being spent, and nothing is
+admitted until its Retry-After has passed; every success then grows the
+budgets back by a few percent. Calls that can't be admitted straight away
+wait in a queue ordered by priority, and round-robin between clients within
+a priority. A call whose estimated wait would run past its deadline is
+rejected at once with that estimate as its retry hint.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+
+# Lower is served first
+PRIORITY_DOCUMENT = 0
+PRIORITY_CHAT = 1
+PRIORITY_BACKGROUND = 2
+
+class AdmissionRejected(Exception):
+    """Raised when a call can't be admitted before its deadline; ``retry_after`` is a hint in seconds"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"Upstream budget exhausted, retry in {self.retry_after}s")
+
+class Budget:
+    """A token bucket refilled at ``rate`` per second, holding at most ``burst`` seconds of it.
+
+    A rate of None means unlimited. ``limit`` is the configured rate the
+    bucket recovers to after being throttled; without one, it goes back to
+    unlimited once it is back at the rate that was last throttled.
+    """
+
+    WINDOW = 60.0
+
+    def __init__(self, per_minute: float, burst: float, now: float):
+        self.limit = per_minute / 60 if per_minute else None
+        self.rate = self.limit
+        self.burst = burst
+        self.level = self.capacity
+        self.updated = now
+        self.throttled_rate = None
+        self._spent = deque()  # (time, amount) over the last WINDOW seconds
+
+    @property
+    def capacity(self) -> float:
+        return self.rate * self.burst if self.rate else math.inf
+
+    def refill(self, now: float):
+        if self.rate:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        while self._spent and self._spent[0][0] < now - self.WINDOW:
+            self._spent.popleft()
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until ``amount`` has been refilled; amounts above capacity may be reserved from a full bucket"""
+        if not self.rate:
+            return 0.0
+        return max(amount - self.level, 0.0) / self.rate
+
+    def reservation(self, amount: float) -> float:
+        return min(amount, self.capacity)
+
+    def take(self, amount: float, now: float):
+        self._spent.append((now, amount))
+        if self.rate:
+            self.level -= self.reservation(amount)
+
+    def adjust(self, amount: float):
+        """Return (or, if negative, charge) part of a reservation once the real cost is known"""
+        if self.rate:
+            self.level = min(self.capacity, self.level + amount)
+
+    def spent_rate(self) -> float:
+        return sum(amount for _, amount in self._spent) / self.WINDOW
+
+    def throttle(self, floor: float):
+        """Halve the rate from what is actually being spent and drop any saved-up burst"""
+        current = min(self.rate or math.inf, self.spent_rate() or math.inf)
+        if current == math.inf:
+            current = floor * 2
+        self.rate = max(floor, current / 2)
+        self.throttled_rate = current
+        self.level = 0.0
+
+    def recover(self, step: float):
+        if not self.rate or self.rate == self.limit:
+            return
+        self.rate *= 1 + step
+        if self.limit:
+            self.rate = min(self.rate, self.limit)
+        elif self.rate >= self.throttled_rate:
+            self.rate, self.level = None, math.inf
+
+class Ticket:
+    """One call's place in the queue; ``used_tokens`` may be set once the real usage is known"""
+
+    __slots__ = ('cost', 'priority', 'client', 'deadline', 'wake', 'granted', 'used_tokens')
+
+    def __init__(self, cost: int, priority: int, client: str, deadline: float, wake):
+        self.cost = cost
+        self.priority = priority
+        self.client = client
+        self.deadline = deadline
+        self.wake = wake
+        self.granted = False
+        self.used_tokens = None
+
+class AdmissionController:
+    """Admits upstream calls within the request and token budgets, in priority and client order.
+
+    One instance is shared per worker process by the sync and async NIM
+    clients, which report 429s and successes back to it.
+    """
+
+    def __init__(self, requests_per_minute: float = 40, tokens_per_minute: float = 0, burst_seconds: float = 15,
+                 min_fraction: float = 0.1, recovery: float = 0.05, default_pause: float = 1.0,
+                 clock=time.monotonic):
+        now = clock()
+        self.requests = Budget(requests_per_minute, burst_seconds, now)
+        self.tokens = Budget(tokens_per_minute, burst_seconds, now)
+        self.min_fraction = min_fraction
+        self.recovery = recovery
+        self.default_pause = default_pause
+        self.clock = clock
+        self.paused_until = 0.0
+        self._queues = {}  # priority -> OrderedDict(client -> deque of tickets), in round-robin order
+        self._lock = threading.Lock()
+        self.counters = {'admitted': 0, 'queued': 0, 'rejected': 0, 'expired': 0, 'throttled': 0}
+
+    def _wait_for(self, requests: float, tokens: float, now: float) -> float:
+        return max(self.paused_until - now, self.requests.wait_for(requests), self.tokens.wait_for(tokens), 0.0)
+
+    def _head(self):
+        for priority in sorted(self._queues):
+            clients = self._queues[priority]
+            if clients:
+                return next(iter(clients.values()))[0]
+        return None
+
+    def _remove(self, ticket: Ticket):
+        clients = self._queues.get(ticket.priority, {})
+        waiting = clients.get(ticket.client)
+        if waiting and ticket in waiting:
+            waiting.remove(ticket)
+            if not waiting:
+                del clients[ticket.client]
+
+    def _admit(self, ticket: Ticket, now: float):
+        self.requests.take(1, now)
+        self.tokens.take(ticket.cost, now)
+        ticket.granted = True
+        self.counters['admitted'] += 1
+
+    def _dispatch(self, now: float):
+        """Admit waiting tickets in order for as long as the budgets allow"""
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        while True:
+            head = self._head()
+            if head is None or self._wait_for(1, self.tokens.reservation(head.cost), now) > 0:
+                return
+            clients = self._queues[head.priority]
+            waiting = clients[head.client]
+            waiting.popleft()
+            if waiting:
+                clients.move_to_end(head.client)
+            else:
+                del clients[head.client]
+            self._admit(head, now)
+            head.wake()
+
+    def _estimated_wait(self, cost: int, priority: int, client: str, now: float) -> float:
+        """Wait for a new ticket: everything of higher priority, plus this client's rounds of its own"""
+        requests, tokens = 1, self.tokens.reservation(cost)
+        for level, clients in self._queues.items():
+            if level > priority:
+                continue
+            rounds = len(clients.get(client, ())) + 1
+            for waiting in clients.values():
+                ahead = list(waiting) if level < priority else list(waiting)[:rounds]
+                requests += len(ahead)
+                tokens += sum(self.tokens.reservation(ticket.cost) for ticket in ahead)
+        return self._wait_for(requests, tokens, now)
+
+    def _enqueue(self, cost: int, priority: int, client: str, max_wait: float, wake) -> Ticket:
+        with self._lock:
+            now = self.clock()
+            self._dispatch(now)
+            ticket = Ticket(cost, priority, client, now + max_wait, wake)
+            if self._head() is None and self._wait_for(1, self.tokens.reservation(cost), now) == 0:
+                self._admit(ticket, now)
+                return ticket
+
+            wait = self._estimated_wait(cost, priority, client, now)
+            if wait > max_wait:
+                self.counters['rejected'] += 1
+                raise AdmissionRejected(wait)
+            self._queues.setdefault(priority, OrderedDict()).setdefault(client, deque()).append(ticket)
+            self.counters['queued'] += 1
+            return ticket
+
+    def _poll(self, ticket: Ticket):
+        """None once the ticket is admitted, otherwise how long to wait before polling again"""
+        with self._lock:
+            now = self.clock()
+            self._dispatch(now)
+            if ticket.granted:
+                return None
+            if now >= ticket.deadline:
+                self._remove(ticket)
+                self.counters['expired'] += 1
+                raise AdmissionRejected(self._estimated_wait(ticket.cost, ticket.priority, ticket.client, now))
+            head = self._head()
+            ready = self._wait_for(1, self.tokens.reservation(head.cost), now)
+            return max(min(ready, ticket.deadline - now), 0.001)
+
+    def _abandon(self, ticket: Ticket):
+        with self._lock:
+            if not ticket.granted:
+                self._remove(ticket)
+
+    def acquire(self, cost: int, priority: int = PRIORITY_DOCUMENT, client: str = '',
+                max_wait: float = 30.0) -> Ticket:
+        """Block until the call is admitted; raises AdmissionRejected if that can't happen within max_wait"""
+        event = threading.Event()
+        ticket = self._enqueue(cost, priority, client, max_wait, event.set)
+        try:
+            while True:
+                timeout = self._poll(ticket)
+                if timeout is None:
+                    return ticket
+                event.wait(timeout)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    async def acquire_async(self, cost: int, priority: int = PRIORITY_DOCUMENT, client: str = '',
+                            max_wait: float = 30.0) -> Ticket:
+        """Coroutine counterpart of acquire"""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        ticket = self._enqueue(cost, priority, client, max_wait, lambda: loop.call_soon_threadsafe(event.set))
+        try:
+            while True:
+                timeout = self._poll(ticket)
+                if timeout is None:
+                    return ticket
+                try:
+                    await asyncio.wait_for(event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    def release(self, ticket: Ticket):
+        """Settle the token reservation against ``ticket.used_tokens`` when it was set"""
+        if ticket.granted and ticket.used_tokens is not None:
+            with self._lock:
+                self.tokens.adjust(ticket.cost - ticket.used_tokens)
+
+    @contextmanager
+    def admit(self, cost: int, priority: int = PRIORITY_DOCUMENT, client: str = '', max_wait: float = 30.0):
+        ticket = self.acquire(cost, priority, client, max_wait)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    @asynccontextmanager
+    async def admit_async(self, cost: int, priority: int = PRIORITY_DOCUMENT, client: str = '',
+                          max_wait: float = 30.0):
+        ticket = await self.acquire_async(cost, priority, client, max_wait)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def record_throttle(self, retry_after: float = None):
+        """The upstream answered 429: shrink both budgets and pause admissions for its Retry-After"""
+        with self._lock:
+            now = self.clock()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            self.requests.throttle(self.requests.limit * self.min_fraction if self.requests.limit else 1 / 60)
+            # Without a token budget there is no telling a token limit was hit, so only requests shrink
+            if self.tokens.limit:
+                self.tokens.throttle(self.tokens.limit * self.min_fraction)
+            self.paused_until = max(self.paused_until, now + (retry_after if retry_after is not None
+                                                               else self.default_pause))
+            self.counters['throttled'] += 1
+
+    def record_success(self):
+        with self._lock:
+            self.requests.recover(self.recovery)
+            self.tokens.recover(self.recovery)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = self.clock()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            waiting = {str(priority): sum(len(tickets) for tickets in clients.values())
+                       for priority, clients in sorted(self._queues.items())}
+            return {
+                'requests_per_minute': round(self.requests.rate * 60, 2) if self.requests.rate else None,
+                'tokens_per_minute': round(self.tokens.rate * 60) if self.tokens.rate else None,
+                'paused_for': round(max(self.paused_until - now, 0.0), 2),
+                'waiting': waiting,
+                **self.counters
+            }
@@ -1,22 +1,42 @@
-from flask import Flask, request, jsonify, render_template, send_file
+from flask import (
+    Flask, Response, request, jsonify, render_template, send_file, has_request_context, stream_with_context
+)
 from flask_cors import CORS
 import os
 import logging
 from pathlib import Path
 from datetime import datetime
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from reportlab.lib import colors
 from dotenv import load_dotenv
 import requests
 import json
-import re
 import tempfile
 import uuid
-import threading
 import time
+import hashlib
+from contextlib import contextmanager
+from nim_client import NIMClient, UpstreamError, CircuitOpenError
+from admission import (
+    AdmissionController, AdmissionRejected, PRIORITY_BACKGROUND, PRIORITY_CHAT, PRIORITY_DOCUMENT
+)
+from response_cache import ResponseCache, CachePolicy, make_cache_key, normalize_prompt
+from pdf_store import PdfStore, content_key
+from pdf_janitor import FileJanitor
+from jobs import JobManager, JobQueueFull
+from idempotency import SingleFlight, IdempotencyStore, IdempotencyKeyReused, FlightAbandoned
+from model_router import ModelRouter, DEFAULT_ROUTE, parse_model_routes
+from pdf_layouts import build_layout_registry, signature_details, LAYOUT_VERSION
+from render_pool import RenderPool
+from progressive_pdf import ProgressivePdf
+from batch import run_bounded, ZipStream
+from text_normalizer import normalize_for_pdf, strip_markdown, is_hindi
+from content_rules import build_rule_sets
+from application_templates import TemplateEngine
+from entity_extractor import EntityExtractor
+from prompts import (
+    DEFAULT_SYSTEM_PROMPT, build_prompt_set, build_prompt_sets, estimate_tokens, prompt_language, prompt_tokens
+)
+from generation_profiles import GenerationProfiles
+from metrics import PipelineMetrics, upstream_outcome
 
 # Load environment variables
 load_dotenv()
@@ -29,8 +49,95 @@ NVIDIA_API_KEY = os.getenv('NVIDIA_API_KEY')
 PORT = int(os.getenv('PORT', 5000))
 
 # NVIDIA NIM Configuration
-NVIDIA_BASE_URL = "https://integrate.api.nvidia.com/v1"
+NVIDIA_BASE_URL = os.getenv('NVIDIA_BASE_URL', "https://integrate.api.nvidia.com/v1")
 NVIDIA_MODEL = "meta/llama-3.1-70b-instruct"  # Reliable model for Indian context
+NVIDIA_FAST_MODEL = "meta/llama-3.1-8b-instruct"  # Quick answers for general chat
+
+# Models per document type, primary first; NIM_MODEL_ROUTES ("general=a,b;affidavit=c,d") overrides
+# entries. A call the primary hasn't started answering by its recent p95 time to first token is also
+# sent to the next model and the first answer wins (NIM_HEDGING=0 only falls back on failure);
+# NIM_HEDGE_DELAY is that deadline until a model has enough samples. Non-streamed calls are
+# only hedged past their own p95 once it is known
+model_router = ModelRouter(
+    {
+        'general': (NVIDIA_FAST_MODEL, NVIDIA_MODEL),
+        DEFAULT_ROUTE: (NVIDIA_MODEL, "meta/llama-3.3-70b-instruct"),
+        **parse_model_routes(os.getenv('NIM_MODEL_ROUTES', ''))
+    },
+    hedging=os.getenv('NIM_HEDGING', '1') != '0',
+    default_hedge=float(os.getenv('NIM_HEDGE_DELAY', 5))
+)
+
+# Upstream calls are admitted within NIM_REQUESTS_PER_MINUTE and NIM_TOKENS_PER_MINUTE (0 = no limit)
+# per worker, shrunk on 429s. Waiting calls go documents first, then chat, then jobs and batches;
+# a call that would wait longer than its ADMISSION_MAX_WAIT is turned away with a retry hint
+admission_controller = AdmissionController(
+    requests_per_minute=float(os.getenv('NIM_REQUESTS_PER_MINUTE', 40)),
+    tokens_per_minute=float(os.getenv('NIM_TOKENS_PER_MINUTE', 0)),
+    burst_seconds=float(os.getenv('NIM_BURST_SECONDS', 15))
+)
+ADMISSION_MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT', 20))
+ADMISSION_BACKGROUND_MAX_WAIT = float(os.getenv('ADMISSION_BACKGROUND_MAX_WAIT', 120))
+
+# Shared keep-alive pool per worker; size it to the worker's thread count
+nim_client = NIMClient(NVIDIA_BASE_URL, pool_size=int(os.getenv('NIM_POOL_SIZE', 8)),
+                       admission=admission_controller)
+
+# Post-processed responses are cached per exact request; general chat is sampled
+# at temperature 0.7, so a repeat is expected to give a fresh answer
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', 512)),
+    disk_dir=os.getenv('RESPONSE_CACHE_DIR') or None,
+    policies={'general': CachePolicy(ttl=0)},
+    default_policy=CachePolicy(ttl=int(os.getenv('RESPONSE_CACHE_TTL', 3600)))
+)
+
+# Generated PDFs carry personal details, so only the browser may cache them unless
+# PDF_CACHE_CONTROL=public allows shared proxies to (download ids are unguessable)
+PDF_CACHE_CONTROL = os.getenv('PDF_CACHE_CONTROL', 'private')
+
+# PDFs written to disk are indexed by expiry and removed by one janitor thread per worker
+file_janitor = FileJanitor(
+    ttl=int(os.getenv('PDF_FILE_TTL', 3600)),
+    max_files=int(os.getenv('PDF_FILES_MAX', 1000)),
+    max_bytes=int(os.getenv('PDF_FILES_MAX_BYTES', 512 * 1024 * 1024))
+)
+
+# Rendered PDFs are kept in memory for download; only very large ones touch the disk
+pdf_store = PdfStore(
+    max_entries=int(os.getenv('PDF_STORE_SIZE', 256)),
+    max_bytes=int(os.getenv('PDF_STORE_MAX_BYTES', 64 * 1024 * 1024)),
+    ttl=int(os.getenv('PDF_STORE_TTL', 3600)),
+    spill_threshold=int(os.getenv('PDF_SPILL_THRESHOLD', 2 * 1024 * 1024)),
+    janitor=file_janitor
+)
+
+# Asynchronous document jobs run on a bounded pool; job ids are local to this worker process
+job_manager = JobManager(
+    workers=int(os.getenv('JOB_WORKERS', 4)),
+    max_queue=int(os.getenv('JOB_QUEUE_SIZE', 32))
+)
+
+# Identical document requests in flight share one generation and render; results for an
+# Idempotency-Key are replayed for IDEMPOTENCY_TTL seconds (0 disables), per worker process
+document_flights = SingleFlight()
+idempotency_store = IdempotencyStore(
+    ttl=int(os.getenv('IDEMPOTENCY_TTL', 600)),
+    max_entries=int(os.getenv('IDEMPOTENCY_MAX_KEYS', 1024))
+)
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# max_tokens per (document type, language) follows observed completion lengths once there are
+# enough of them; the profiles survive restarts in GENERATION_PROFILE_PATH (empty disables saving)
+generation_profiles = GenerationProfiles(
+    path=os.getenv('GENERATION_PROFILE_PATH', os.path.join(tempfile.gettempdir(), 'generation_profiles.json')) or None,
+    min_samples=int(os.getenv('GENERATION_PROFILE_MIN_SAMPLES', 20))
+)
+DEFAULT_MAX_TOKENS = {'general': 2000, 'application': 4000}
+
+# Batch requests fan out to the upstream with at most BATCH_CONCURRENCY calls in flight each
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 50))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', 4))
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -46,49 +153,49 @@ DOCUMENT_TYPES = {
     'custom': 'Custom Document'
 }
 
+# Styles, fixed flowables and heading/closing classifiers, built once per document type and language
+LAYOUT_TEMPLATES = build_layout_registry(DOCUMENT_TYPES)
+
+# Post-processing rules per (document type, language), each compiled into one rewrite scan
+CONTENT_RULE_SETS = build_rule_sets(DOCUMENT_TYPES)
+
+# System prompts and user templates per (document type, language), assembled once
+PROMPT_SETS = build_prompt_sets(DOCUMENT_TYPES)
+
+# Per-stage latency histograms and pipeline counters, served at /metrics
+pipeline_metrics = PipelineMetrics(DOCUMENT_TYPES)
+
+# Names, addresses, IDs and dates read from each request in one linear-time scan, so the
+# prompt and the PDF signature block use them without parsing the message again
+entity_extractor = EntityExtractor()
+
+# Bundled application letters, loaded once; matching requests are filled without a full LLM call
+template_engine = TemplateEngine()
+TEMPLATE_FAST_PATH = os.getenv('TEMPLATE_FAST_PATH', 'true').lower() != 'false'
+
+# ReportLab layout is CPU-bound; with RENDER_PROCESSES > 0 it runs in a pre-warmed process pool
+render_pool = RenderPool(
+    LAYOUT_TEMPLATES,
+    processes=int(os.getenv('RENDER_PROCESSES', 0)),
+    max_pending=int(os.getenv('RENDER_QUEUE_SIZE', 0)) or None,
+    timeout=float(os.getenv('RENDER_TIMEOUT', 30))
+)
+render_pool.warm()
+
+# Streamed documents are laid out paragraph by paragraph as the text arrives, leaving only the
+# last paragraphs, any appended blocks and the signature for after the last token
+PROGRESSIVE_PDF = os.getenv('PROGRESSIVE_PDF', 'true').lower() != 'false'
+
 class DocumentGenerator:
-    @staticmethod
-    def cleanup_old_files():
-        """Clean up PDF files older than 1 hour"""
-        try:
-            temp_dir = tempfile.gettempdir()
-            current_time = time.time()
-            
-            for filename in os.listdir(temp_dir):
-                if filename.startswith('doc_') and filename.endswith('.pdf'):
-                    filepath = os.path.join(temp_dir, filename)
-                    try:
-                        file_age = current_time - os.path.getctime(filepath)
-                        if file_age > 3600:  # 1 hour
-                            os.remove(filepath)
-                            logger.info(f"Cleaned up old PDF: {filepath}")
-                    except Exception as e:
-                        logger.warning(f"Could not clean up {filepath}: {e}")
-        except Exception as e:
-            logger.error(f"Cleanup error: {e}")
-    
     @staticmethod
     def clean_text_for_pdf(text: str) -> str:
-        """Clean and prepare text for PDF generation"""
-        if not text:
-            return ""
-        
-        # Remove HTML tags and entities
-        text = re.sub(r'<[^>]+>', '', text)
-        text = text.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
-        text = text.replace('&nbsp;', ' ').replace('&quot;', '"').replace('&#39;', "'")
-        
-        # Clean up extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\n\s*\n', '\n\n', text)
-        
-        # Escape special characters for ReportLab
-        text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-        
-        return text.strip()
+        """Clean and prepare text for PDF generation, keeping one paragraph per line"""
+        return normalize_for_pdf(text)
     
     @staticmethod
-    def generate_pdf(text: str, title: str, user_data: dict) -> str:
+    def generate_pdf_bytes(text: str, title: str, user_data: dict, document_type: str = 'custom',
+                           progressive: ProgressivePdf = None) -> bytes:
+        """Render a document to PDF entirely in memory, finishing ``progressive``'s layout when it fits"""
         try:
             # Validate input
             if not text or not text.strip():
@@ -97,173 +204,66 @@ class DocumentGenerator:
             if not title or not title.strip():
                 title = "AI Generated Document"
             
+            language = 'hi' if is_hindi(text) else 'en'
+            
             # Clean text
-            clean_text = DocumentGenerator.clean_text_for_pdf(text)
+            with pipeline_metrics.stage('clean', document_type, language):
+                clean_text = DocumentGenerator.clean_text_for_pdf(text)
             if not clean_text:
                 raise ValueError("Content is empty after cleaning")
             
-            # Create secure temporary file
+            # Lay out with the precompiled template for this document type, off-thread if pooled
+            with pipeline_metrics.stage('pdf_build', document_type, language):
+                pdf_bytes = progressive.finish(clean_text, title, user_data) if progressive else None
+                if progressive and pdf_bytes is None:
+                    logger.info(f"Progressive layout of {document_type} discarded: {progressive.discarded}")
+                if pdf_bytes is None:
+                    pdf_bytes = render_pool.render(clean_text, title, document_type, user_data)
+            if not pdf_bytes:
+                raise RuntimeError("Generated PDF is empty")
+            
+            logger.info(f"PDF rendered in memory: {len(pdf_bytes)} bytes")
+            return pdf_bytes
+            
+        except Exception as e:
+            logger.error(f"PDF generation failed: {e}")
+            raise RuntimeError(f"PDF generation error: {str(e)}")
+    
+    @staticmethod
+    def generate_pdf(text: str, title: str, user_data: dict, document_type: str = 'custom') -> str:
+        """Render a document and write it to a temporary file, returning its path"""
+        pdf_bytes = DocumentGenerator.generate_pdf_bytes(text, title, user_data, document_type)
+        
+        try:
             temp_dir = tempfile.gettempdir()
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"doc_{timestamp}_{uuid.uuid4().hex[:8]}.pdf"
             filepath = os.path.join(temp_dir, filename)
             
-            logger.info(f"Creating PDF: {filename}")
-            
-            # Create PDF document
-            doc = SimpleDocTemplate(
-                filepath, 
-                pagesize=A4,
-                rightMargin=60, leftMargin=60,
-                topMargin=60, bottomMargin=60
-            )
-            
-            # Define styles
-            styles = getSampleStyleSheet()
-            
-            title_style = ParagraphStyle(
-                'Title',
-                parent=styles['Title'],
-                fontSize=18,
-                spaceAfter=24,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Bold'
-            )
-            
-            heading_style = ParagraphStyle(
-                'Heading',
-                parent=styles['Heading2'],
-                fontSize=13,
-                spaceAfter=12,
-                spaceBefore=16,
-                fontName='Helvetica-Bold'
-            )
-            
-            normal_style = ParagraphStyle(
-                'Normal',
-                parent=styles['Normal'],
-                fontSize=11,
-                spaceAfter=12,
-                leading=16,
-                fontName='Helvetica'
-            )
-            
-            signature_style = ParagraphStyle(
-                'Signature',
-                parent=styles['Normal'],
-                fontSize=10,
-                spaceAfter=8,
-                alignment=TA_RIGHT,
-                fontName='Helvetica'
-            )
-            
-            # Build document elements
-            elements = []
+            with open(filepath, 'wb') as f:
+                f.write(pdf_bytes)
             
-            # Title
-            elements.append(Paragraph(title.upper(), title_style))
-            elements.append(Spacer(1, 20))
-            
-            # Date
-            current_date = datetime.now().strftime("%B %d, %Y")
-            elements.append(Paragraph(f"<b>Date:</b> {current_date}", normal_style))
-            elements.append(Spacer(1, 16))
-            
-            # Process content
-            paragraphs = clean_text.split('\n')
-            
-            for para in paragraphs:
-                para = para.strip()
-                if not para:
-                    elements.append(Spacer(1, 6))
-                    continue
-                
-                # Detect headings
-                is_heading = (
-                    para.isupper() and len(para) < 60 or
-                    para.startswith(('1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.')) or
-                    para.startswith(('To,', 'Subject:', 'DEPONENT', 'VERIFICATION', 'WHEREAS'))
-                )
-                
-                if is_heading:
-                    elements.append(Paragraph(para, heading_style))
-                else:
-                    elements.append(Paragraph(para, normal_style))
-                    
-                    # Extra spacing after certain phrases
-                    if any(phrase in para.lower() for phrase in ['sincerely', 'faithfully', 'regards']):
-                        elements.append(Spacer(1, 16))
-            
-            # Signature section
-            elements.append(Spacer(1, 30))
-            elements.append(Paragraph("_" * 35, signature_style))
-            elements.append(Paragraph("Signature & Date", signature_style))
-            
-            # Build PDF
-            doc.build(elements)
-            
-            # Verify creation
-            if not os.path.exists(filepath):
-                raise RuntimeError("PDF file was not created")
-            
-            file_size = os.path.getsize(filepath)
-            if file_size == 0:
-                raise RuntimeError("Generated PDF is empty")
-            
-            logger.info(f"PDF created successfully: {file_size} bytes")
-            
-            # Background cleanup
-            threading.Thread(
-                target=DocumentGenerator.cleanup_old_files,
-                daemon=True
-            ).start()
-            
-            return filepath
-            
-        except Exception as e:
-            logger.error(f"PDF generation failed: {e}")
+            logger.info(f"PDF created successfully: {filename}, {len(pdf_bytes)} bytes")
+        except OSError as e:
+            logger.error(f"PDF write failed: {e}")
             raise RuntimeError(f"PDF generation error: {str(e)}")
+        
+        # Deleted by the worker's janitor once it expires
+        file_janitor.track(filepath, len(pdf_bytes))
+        
+        return filepath
 
 def extract_user_data(text: str) -> dict:
     """Extract user data from text"""
-    if not text:
-        return {}
-    
-    data = {}
-    text_lower = text.lower()
-    
-    # Name patterns (fixed regex)
-    name_patterns = [
-        r"(?:my name is|i am|name:?)\s*([A-Za-z\s]+)",
-        r"([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)"
-    ]
-    
-    # Address patterns (fixed regex)
-    address_patterns = [
-        r"(?:address|live at|residing at|from):?\s*([^.\n]+(?:\d{6}|\d{3}\s*\d{3})[^.\n]*)"
-    ]
-    
-    # Extract name
-    for pattern in name_patterns:
-        try:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match and len(match.group(1).strip().split()) >= 2:
-                data['full_name'] = match.group(1).strip()
-                break
-        except Exception:
-            continue
-    
-    # Extract address
-    for pattern in address_patterns:
-        try:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                data['address'] = match.group(1).strip()
-                break
-        except Exception:
-            continue
-    
-    return data
+    return entity_extractor.extract(text)
+
+def extract_request_data(message: str, document_type: str) -> dict:
+    """extract_user_data, timed as the pipeline's extract stage"""
+    started = time.perf_counter()
+    user_data = extract_user_data(message)
+    pipeline_metrics.observe_stage('extract', document_type, user_data.get('language', 'en'),
+                                   time.perf_counter() - started)
+    return user_data
 
 class IndianDocumentAgent:
     """Advanced AI agent specialized for Indian document generation"""
@@ -283,467 +283,434 @@ class IndianDocumentAgent:
             'name_pattern': r'^[A-Za-z\s.]+$'
         }
     
-    def get_system_prompt(self, doc_type: str) -> str:
+    def get_system_prompt(self, doc_type: str, language: str = 'en') -> str:
         """Get refined system prompt for Indian documents"""
-        prompts = {
-            'affidavit': """You are an expert Indian legal document specialist with 20+ years experience. Create PERFECT Indian affidavits following Supreme Court guidelines.
-
-CRITICAL REQUIREMENTS:
-✓ Use EXACT Indian legal format and terminology
-✓ Include proper verification clause as per Indian Evidence Act
-✓ Use "son/daughter of" format (not "s/o" or "d/o")
-✓ Include complete address with PIN code
-✓ Use formal legal language with "That" clauses
-✓ Add proper deponent signature blocks
-✓ Include notarization space
-
-STRUCTURE:
-AFFIDAVIT
-
-I, [FULL NAME], son/daughter of [FATHER'S NAME], aged [AGE] years, resident of [COMPLETE ADDRESS WITH PIN], do hereby solemnly affirm and declare as under:
-
-1. That I am the deponent herein and competent to swear to this affidavit.
-2. That [MAIN STATEMENT with specific details].
-3. That [SUPPORTING FACTS with evidence].
-4. That [ADDITIONAL CLAUSES as needed].
-5. That I undertake to inform concerned authorities if any information is found false.
-6. That this affidavit is made for [SPECIFIC PURPOSE] only.
-
-DEPONENT
-
-VERIFICATION
-I, the above-named deponent, verify that contents are true to my knowledge and belief, nothing material concealed.
-
-Verified at [PLACE] on [DATE].
-
-DEPONENT
-
-Before me:
-Notary Public/Oath Commissioner""",
-
-            'letter': """You are a senior Indian business communication expert. Create PERFECT Indian business letters following government and corporate standards.
-
-CRITICAL REQUIREMENTS:
-✓ Use proper Indian business letter format
-✓ Include complete sender details with PIN code
-✓ Use respectful Indian business language
-✓ Add proper subject line format
-✓ Include reference numbers if applicable
-✓ Use "Yours faithfully" for unknown recipients, "Yours sincerely" for known
-✓ Add enclosure list if documents attached
-
-STRUCTURE:
-[SENDER NAME]
-[DESIGNATION]
-[ORGANIZATION]
-[COMPLETE ADDRESS]
-[CITY - PIN CODE]
-[EMAIL] | [MOBILE]
-
-Ref: [REFERENCE NUMBER]
-Date: [DD/MM/YYYY]
-
-To,
-[RECIPIENT NAME]
-[DESIGNATION]
-[ORGANIZATION]
-[COMPLETE ADDRESS]
-[CITY - PIN CODE]
-
-Subject: [CLEAR SUBJECT LINE]
-
-Dear Sir/Madam,
-
-I hope this letter finds you in good health.
-
-[OPENING PARAGRAPH - Purpose]
-[MAIN CONTENT - Details with bullet points if needed]
-[CLOSING PARAGRAPH - Action requested]
-
-I shall be grateful for your kind consideration and early response.
-
-Thanking you,
-
-Yours faithfully/sincerely,
-
-[SIGNATURE]
-[FULL NAME]
-[DESIGNATION]
-
-Enclosures: [LIST IF ANY]""",
-
-            'application': """You are an expert Indian government application specialist with deep knowledge of both English and Hindi official formats. You have 25+ years experience in Indian bureaucracy and understand regional preferences.
-
-CRITICAL REQUIREMENTS:
-✓ DETECT LANGUAGE: If user mentions Hindi/हिंदी or uses Hindi words, create Hindi application
-✓ Use exact Indian government format for both English and Hindi
-✓ Include all mandatory personal details in appropriate language
-✓ Use respectful government tone (आदरणीय for Hindi, Respected for English)
-✓ Add proper enclosure list in respective language
-✓ Include declaration clause for truthfulness
-✓ Use correct closing (धन्यवाद सहित for Hindi, Yours faithfully for English)
-
-ENGLISH FORMAT:
-To,
-[OFFICER DESIGNATION]
-[DEPARTMENT/OFFICE]
-[COMPLETE ADDRESS]
-[CITY - PIN CODE]
-
-Subject: Application for [SPECIFIC PURPOSE]
-
-Respected Sir/Madam,
-
-I, [FULL NAME], son/daughter of [FATHER'S NAME], aged [AGE] years, resident of [ADDRESS], would like to submit this application for [PURPOSE].
-
-My details are as follows:
-1. Full Name: [NAME]
-2. Father's/Husband's Name: [NAME]
-3. Date of Birth: [DD/MM/YYYY]
-4. Address: [COMPLETE ADDRESS WITH PIN]
-5. Mobile Number: [10-DIGIT NUMBER]
-6. Email ID: [EMAIL]
-7. Educational Qualification: [DETAILS]
-
-I hereby declare that all information provided is true and correct.
-
-I request you to kindly consider my application favorably. I shall be highly obliged.
-
-Thanking you,
-Yours faithfully,
-
-[SIGNATURE]
-[FULL NAME]
-Date: [DD/MM/YYYY]
-Place: [CITY NAME]
-
-Enclosures:
-1. [DOCUMENT 1]
-2. [DOCUMENT 2]
-
-HINDI FORMAT:
-सेवा में,
-[अधिकारी पदनाम]
-[विभाग/कार्यालय]
-[पूरा पता]
-[शहर - पिन कोड]
-
-विषय: [विशिष्ट उद्देश्य] हेतु आवेदन पत्र
-
-आदरणीय महोदय/महोदया,
-
-मैं [पूरा नाम], पुत्र/पुत्री श्री [पिता का नाम], आयु [आयु] वर्ष, निवासी [पूरा पता], आपके समक्ष [उद्देश्य] हेतु यह आवेदन पत्र प्रस्तुत कर रहा/रही हूँ।
-
-मेरा विवरण निम्नलिखित है:
-1. पूरा नाम: [नाम]
-2. पिता/पति का नाम: [नाम]
-3. जन्म तिथि: [DD/MM/YYYY]
-4. पता: [पूरा पता पिन कोड सहित]
-5. मोबाइल नंबर: [10 अंकीय नंबर]
-6. ईमेल आईडी: [ईमेल]
-7. शैक्षणिक योग्यता: [विवरण]
-
-[मुख्य अनुरोध पैराग्राफ औचित्य सहित]
-
-मैं घोषणा करता/करती हूँ कि उपरोक्त सभी जानकारी सत्य एवं सही है।
-
-अतः आपसे विनम्र निवेदन है कि मेरे आवेदन पर कृपया विचार करें। मैं आपका/आपकी अत्यंत आभारी रहूंगा/रहूंगी।
-
-धन्यवाद सहित,
-आपका/आपकी विश्वासपात्र,
-
-[हस्ताक्षर]
-[पूरा नाम]
-दिनांक: [DD/MM/YYYY]
-स्थान: [शहर का नाम]
-
-संलग्नक:
-1. [दस्तावेज 1]
-2. [दस्तावेज 2]
-
-USE APPROPRIATE FORMAT BASED ON USER'S LANGUAGE PREFERENCE OR REQUEST.""",
-
-            'contract': """You are an Indian contract law expert. Create LEGALLY SOUND contracts following Indian Contract Act 1872.
-
-CRITICAL REQUIREMENTS:
-✓ Follow Indian Contract Act provisions
-✓ Include proper parties identification
-✓ Add consideration clause
-✓ Include jurisdiction and governing law
-✓ Add dispute resolution mechanism
-✓ Include termination clauses
-✓ Add witness signatures
-
-STRUCTURE:
-[CONTRACT TYPE]
-
-This Agreement is made on [DATE] between:
-
-PARTY 1: [FULL DETAILS]
-PARTY 2: [FULL DETAILS]
-
-WHEREAS [RECITALS]
-
-NOW THEREFORE, parties agree:
-
-1. SCOPE OF WORK/SERVICE
-2. CONSIDERATION AND PAYMENT
-3. DURATION AND COMMENCEMENT
-4. OBLIGATIONS OF PARTIES
-5. TERMINATION CONDITIONS
-6. DISPUTE RESOLUTION
-7. GOVERNING LAW
-8. MISCELLANEOUS
-
-IN WITNESS WHEREOF, parties execute this agreement.
-
-PARTY 1: ________________
-WITNESS: ________________
-
-PARTY 2: ________________
-WITNESS: ________________""",
-
-            'certificate': """You are an Indian certification authority expert. Create OFFICIAL certificates following government standards.
-
-CRITICAL REQUIREMENTS:
-✓ Use official certificate format
-✓ Include proper authority details
-✓ Add certificate number and date
-✓ Include official seal placement
-✓ Use formal certification language
-✓ Add validity period if applicable
-
-STRUCTURE:
-[ORGANIZATION LETTERHEAD]
-
-CERTIFICATE OF [TYPE]
-Certificate No: [NUMBER]
-Date: [DD/MM/YYYY]
-
-This is to certify that [RECIPIENT NAME], son/daughter of [FATHER'S NAME], has successfully [ACHIEVEMENT/COMPLETION].
+        prompt_set = PROMPT_SETS.get((doc_type, language))
+        return prompt_set.system if prompt_set else DEFAULT_SYSTEM_PROMPT
+    
+    def validate_indian_content(self, content: str, doc_type: str) -> str:
+        """Validate and enhance Indian document content for both English and Hindi"""
+        language = 'hi' if is_hindi(content) else 'en'
+        rule_set = CONTENT_RULE_SETS.get((doc_type, language)) or CONTENT_RULE_SETS[('*', language)]
+        with pipeline_metrics.stage('validate', doc_type, language):
+            return rule_set.apply(content)
 
-[DETAILED DESCRIPTION]
+# Stateless, so one instance serves every request
+document_agent = IndianDocumentAgent()
 
-This certificate is issued on [DATE] and is valid [VALIDITY PERIOD].
+def build_nim_payload(prompt: str, document_type: str, user_data: dict = None) -> dict:
+    """Build the NVIDIA NIM chat completion payload for a request.
+    
+    Details already extracted into ``user_data`` are listed for the model to use verbatim.
+    """
+    started = time.perf_counter()
+    language = (user_data or {}).get('language') or prompt_language(prompt)
+    prompt_set = PROMPT_SETS.get((document_type, language)) or build_prompt_set(document_type, language)
+    messages, tokens, trimmed = prompt_set.messages(prompt, user_data)
+    pipeline_metrics.observe_stage('prompt', document_type, language, time.perf_counter() - started)
+    logger.info(f"Prompt for {document_type}/{language}: ~{tokens} tokens"
+                f"{f' (message trimmed to the {prompt_set.budget}-token budget)' if trimmed else ''}")
+    
+    # Optimized parameters for Llama model
+    if document_type == 'general':
+        temperature, top_p = 0.7, 0.9
+    elif document_type == 'application':
+        # Optimized for Indian government applications
+        temperature, top_p = 0.1, 0.8
+    else:
+        temperature, top_p = 0.2, 0.85
+    
+    # Reserve only what this kind of document has been seen to need
+    max_tokens = generation_profiles.max_tokens(document_type, language, DEFAULT_MAX_TOKENS.get(document_type, 3000))
+    
+    return {
+        "model": model_router.primary(document_type),
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "top_p": top_p
+    }
+
+def record_completion(prompt: str, document_type: str, content: str, finish_reason: str = None, usage: dict = None):
+    """Feed a finished completion's length into its generation profile"""
+    completion_tokens = (usage or {}).get('completion_tokens') or estimate_tokens(content)
+    generation_profiles.record(document_type, prompt_language(prompt), completion_tokens, finish_reason)
+    if finish_reason == 'length':
+        logger.warning(f"{document_type} completion was cut off at {completion_tokens} tokens")
+
+def finalize_ai_response(response: str, document_type: str) -> str:
+    """Apply Indian document post-processing and formatting cleanup to a full response"""
+    response = response.strip()
+    
+    # Post-process with Indian document agent
+    if document_type != 'general':
+        response = document_agent.validate_indian_content(response, document_type)
+    
+    # Clean formatting
+    response = strip_markdown(response)
+    
+    # Detect language for logging
+    language = "Hindi" if is_hindi(response) else "English"
+    logger.info(f"Generated {document_type} document in {language} with {len(response)} characters")
+    
+    return response
 
-[AUTHORIZED SIGNATURE]
-[NAME AND DESIGNATION]
-[OFFICIAL SEAL]"""
-        }
-        return prompts.get(doc_type, "You are a helpful AI assistant.")
+def upstream_error_message(e: Exception) -> str:
+    """Map an upstream failure to the user-facing error message"""
+    outcome = upstream_outcome(e)
+    if outcome:
+        pipeline_metrics.upstream_response(outcome)
     
-    def validate_indian_content(self, content: str, doc_type: str) -> str:
-        """Validate and enhance Indian document content for both English and Hindi"""
-        # Detect if content is in Hindi
-        hindi_chars = re.findall(r'[\u0900-\u097F]', content)
-        is_hindi = len(hindi_chars) > 10
-        
-        # Add Indian-specific validations
-        if doc_type == 'affidavit' and 'VERIFICATION' not in content and 'सत्यापन' not in content:
-            if is_hindi:
-                content += "\n\nसत्यापन\n\nमैं सत्यापित करता/करती हूँ कि उपरोक्त विवरण मेरी जानकारी के अनुसार सत्य है।\n\nशपथकर्ता"
-            else:
-                content += "\n\nVERIFICATION\n\nI verify that the contents are true to my knowledge.\n\nDEPONENT"
-        
-        # Ensure proper Indian address format
-        content = re.sub(r'\b(\d{6})\b', r'- \1', content)  # Add dash before PIN
-        
-        # Fix Indian name formats for English content
-        if not is_hindi:
-            content = re.sub(r'\bs/o\b', 'son of', content, flags=re.IGNORECASE)
-            content = re.sub(r'\bd/o\b', 'daughter of', content, flags=re.IGNORECASE)
-        
-        # Enhanced application-specific validations
-        if doc_type == 'application':
-            if is_hindi:
-                # Hindi application enhancements
-                if 'आदरणीय महोदय' not in content and 'आदरणीय महोदया' not in content:
-                    content = content.replace('महोदय', 'आदरणीय महोदय')
-                
-                # Add declaration if missing in Hindi
-                if 'घोषणा करता' not in content and 'घोषणा करती' not in content:
-                    declaration = "\n\nमैं घोषणा करता/करती हूँ कि उपरोक्त सभी जानकारी सत्य एवं सही है।"
-                    content = content.replace('अतः आपसे विनम्र निवेदन', declaration + '\n\nअतः आपसे विनम्र निवेदन')
-                
-                # Ensure proper Hindi closing
-                if 'धन्यवाद सहित' not in content:
-                    content = content.replace('आभारी रहूंगा', 'आभारी रहूंगा।\n\nधन्यवाद सहित,')
-            else:
-                # English application enhancements
-                if 'Respected Sir/Madam' not in content:
-                    content = content.replace('Dear Sir/Madam', 'Respected Sir/Madam')
-                
-                # Add declaration if missing in English
-                if 'declare that all the information' not in content.lower():
-                    declaration = "\n\nI hereby declare that all the information provided above is true and correct to the best of my knowledge."
-                    content = content.replace('I request you to kindly', declaration + '\n\nI request you to kindly')
-                
-                # Ensure proper English closing
-                if 'Yours faithfully' not in content and 'Yours sincerely' not in content:
-                    content = content.replace('Thanking you,', 'Thanking you,\n\nYours faithfully,')
-        
-        return content
+    if isinstance(e, requests.exceptions.Timeout):
+        logger.error("NVIDIA API timeout")
+        return "❌ Request timeout. Please try again."
+    if isinstance(e, requests.exceptions.RequestException):
+        logger.error(f"NVIDIA API request error: {e}")
+        return "❌ Network error. Please check your connection."
+    
+    if isinstance(e, CircuitOpenError):
+        logger.error(f"NVIDIA API circuit open: {e}")
+        return f"❌ AI service error: {e}..."
+    if isinstance(e, AdmissionRejected):
+        logger.warning(f"NVIDIA API call not admitted: {e}")
+        return f"❌ AI service is busy. Please try again in {e.retry_after}s."
+    if isinstance(e, UpstreamError):
+        logger.error(f"NVIDIA API error: {e}")
+        if e.status_code == 401:
+            return "❌ Invalid API key. Please check your NVIDIA_API_KEY."
+        if e.status_code == 429:
+            return "❌ Rate limit exceeded. Please wait and try again."
+        return f"❌ AI service error: {str(e)[:100]}..."
+    
+    logger.error(f"NVIDIA API error: {e}")
+    error_msg = str(e)
+    if "401" in error_msg or "unauthorized" in error_msg.lower():
+        return "❌ Invalid API key. Please check your NVIDIA_API_KEY."
+    elif "429" in error_msg or "rate limit" in error_msg.lower():
+        return "❌ Rate limit exceeded. Please wait and try again."
+    elif "json" in error_msg.lower():
+        return "❌ API response format error. Please try again."
+    return f"❌ AI service error: {error_msg[:100]}..."
+
+def nim_headers() -> dict:
+    return {
+        "Authorization": f"Bearer {NVIDIA_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+def response_cache_key(prompt: str, document_type: str, payload: dict):
+    """Cache key for a request, or None if its document type policy forbids caching"""
+    if not response_cache.policy_for(document_type).allows(payload):
+        return None
+    return make_cache_key(prompt, document_type, payload)
+
+def cache_response(cache_key, document_type: str, payload: dict, model: str, response: str):
+    """Cache a response under its key, unless a hedge or fallback answered: the key names the primary model"""
+    if not cache_key:
+        return
+    if model != payload.get('model'):
+        logger.info(f"Not caching {document_type} answered by fallback model {model}")
+        return
+    response_cache.set(cache_key, response, response_cache.policy_for(document_type).ttl)
+
+def request_client(headers, remote_addr: str) -> str:
+    """Fairness key for the admission queue: the first X-Forwarded-For hop, else the peer address"""
+    return headers.get('X-Forwarded-For', '').split(',')[0].strip() or remote_addr or ''
+
+def admission_args(payload: dict, document_type: str, client: str = None) -> tuple:
+    """(cost, priority, client, max_wait) for an upstream call; calls outside a request queue last"""
+    cost = prompt_tokens(payload) + payload.get('max_tokens', 0)
+    if client is None and has_request_context():
+        client = request_client(request.headers, request.remote_addr)
+    if client is None:
+        return cost, PRIORITY_BACKGROUND, 'background', ADMISSION_BACKGROUND_MAX_WAIT
+    priority = PRIORITY_CHAT if document_type == 'general' else PRIORITY_DOCUMENT
+    return cost, priority, client, ADMISSION_MAX_WAIT
+
+@contextmanager
+def upstream_admission(admission: tuple, document_type: str, language: str, hedge: bool = False):
+    """Hold an admission ticket, for admission_args ``admission``, for the duration of an upstream call.
+    
+    A hedge only takes spare budget: it is rejected rather than queued.
+    """
+    cost, priority, client, max_wait = admission
+    started = time.perf_counter()
+    try:
+        ticket = admission_controller.acquire(cost, priority, client, 0 if hedge else max_wait)
+    except AdmissionRejected:
+        pipeline_metrics.upstream_response('rejected')
+        raise
+    pipeline_metrics.observe_upstream('queue', document_type, language, time.perf_counter() - started)
+    try:
+        yield ticket
+    finally:
+        admission_controller.release(ticket)
 
-def generate_ai_response(prompt: str, document_type: str) -> str:
-    """Generate AI response using NVIDIA NIM API with Indian document agent"""
+def generate_ai_response(prompt: str, document_type: str, bypass_cache: bool = False, user_data: dict = None) -> str:
+    """Generate AI response using NVIDIA NIM API with Indian document agent.
+    
+    Raises AdmissionRejected when the upstream budget can't admit the call in time.
+    """
     if not NVIDIA_API_KEY:
         return "❌ NVIDIA_API_KEY not found. Please add it in Railway Variables."
     
     try:
-        agent = IndianDocumentAgent()
-        system_prompt = agent.get_system_prompt(document_type)
-        
-        # Enhanced user prompt with Indian context and language detection
-        if document_type != 'general':
-            if document_type == 'application':
-                # Detect Hindi language preference
-                hindi_indicators = ['hindi', 'हिंदी', 'हिन्दी', 'देवनागरी', 'भारतीय', 'सरकारी']
-                use_hindi = any(indicator in prompt.lower() for indicator in hindi_indicators)
-                
-                if use_hindi:
-                    user_prompt = f"""भारतीय सरकारी कार्यालयों में प्रयुक्त होने वाले सटीक प्रारूप में एक परफेक्ट हिंदी आवेदन पत्र बनाएं।
-
-उपयोगकर्ता का अनुरोध: {prompt}
-
-महत्वपूर्ण आवश्यकताएं:
-✓ सटीक भारतीय सरकारी आवेदन प्रारूप का उपयोग करें
-✓ सभी अनिवार्य व्यक्तिगत विवरण उचित क्रम में शामिल करें
-✓ सम्मानजनक सरकारी संचार भाषा का उपयोग करें
-✓ सहायक कारणों के साथ उचित औचित्य जोड़ें
-✓ सत्यता के लिए घोषणा खंड शामिल करें
-✓ सही भारतीय दिनांक प्रारूप (DD/MM/YYYY) का उपयोग करें
-✓ विशिष्ट दस्तावेज़ नामों के साथ पूरी संलग्नक सूची जोड़ें
-✓ सरकारी अधिकारियों के लिए "धन्यवाद सहित" समापन का उपयोग करें
-✓ सरकारी प्रारूप के अनुसार नीचे दिनांक और स्थान शामिल करें
-
-एक पूर्ण, सरकार-तैयार आवेदन तैयार करें जो तुरंत जमा किया जा सके।"""
-                else:
-                    user_prompt = f"""Create a PERFECT Indian government application following EXACT official format used in all Indian government offices.
-
-USER REQUEST: {prompt}
-
-CRITICAL REQUIREMENTS:
-✓ LANGUAGE DETECTION: Check if user wants Hindi format (look for Hindi words or explicit request)
-✓ Use EXACT Indian government application format (English or Hindi as appropriate)
-✓ Include ALL mandatory personal details in proper sequence
-✓ Use respectful government communication language
-✓ Add proper justification with supporting reasons
-✓ Include declaration clause for truthfulness
-✓ Use correct Indian date format (DD/MM/YYYY)
-✓ Add complete enclosure list with specific document names
-✓ Use appropriate closing ("Yours faithfully" for English, "धन्यवाद सहित" for Hindi)
-✓ Include date and place at bottom as per government format
-✓ Ensure document meets all Indian government standards
-
-Generate a COMPLETE, GOVERNMENT-READY application that can be submitted immediately."""
-            else:
-                user_prompt = f"""Create a professional {document_type.upper()} following EXACT Indian legal/official format.
-
-USER REQUEST: {prompt}
-
-IMPORTANT INSTRUCTIONS:
-✓ Use ONLY Indian legal terminology and format
-✓ Include ALL mandatory sections and clauses
-✓ Use proper Indian address format with PIN codes
-✓ Add appropriate legal language and phrases
-✓ Include signature blocks and witness lines
-✓ Ensure document is legally compliant in India
-✓ Use respectful Indian communication style
-
-Generate a COMPLETE, READY-TO-USE document."""
-        else:
-            user_prompt = f"User question: {prompt}\n\nProvide helpful information about Indian documents or general assistance."
+        payload = build_nim_payload(prompt, document_type, user_data)
         
-
+        cache_key = response_cache_key(prompt, document_type, payload)
+        if cache_key and not bypass_cache:
+            cached = response_cache.get(cache_key)
+            pipeline_metrics.cache_lookup('response', cached is not None)
+            if cached is not None:
+                logger.info(f"Response cache hit for {document_type}")
+                return cached
         
-        # Prepare NVIDIA NIM API request
-        headers = {
-            "Authorization": f"Bearer {NVIDIA_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        language = prompt_language(prompt)
+        admission = admission_args(payload, document_type)
         
-        # Optimized parameters for Llama model
-        if document_type == 'general':
-            payload = {
-                "model": NVIDIA_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 2000,
-                "top_p": 0.9
-            }
-        elif document_type == 'application':
-            # Optimized for Indian government applications
-            payload = {
-                "model": NVIDIA_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.1,
-                "max_tokens": 4000,
-                "top_p": 0.8
-            }
-        else:
-            payload = {
-                "model": NVIDIA_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.2,
-                "max_tokens": 3000,
-                "top_p": 0.85
-            }
-        
-        # Make API request
-        api_response = requests.post(
-            f"{NVIDIA_BASE_URL}/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
+        def attempt(model: str, hedge: bool):
+            """One model's answer, as a single (content, finish reason, usage) item"""
+            with upstream_admission(admission, document_type, language, hedge) as ticket:
+                started = time.perf_counter()
+                try:
+                    api_response = nim_client.chat_completions({**payload, 'model': model}, nim_headers(), timeout=30)
+                    response_data = api_response.json()
+                    choice = response_data['choices'][0]
+                    content = choice['message']['content']
+                except Exception:
+                    model_router.record_error(model)
+                    raise
+                elapsed = time.perf_counter() - started
+                model_router.record(model, 'total', elapsed)
+                pipeline_metrics.upstream_response(api_response.status_code)
+                pipeline_metrics.observe_upstream('total', document_type, language, elapsed)
+                logger.info(f"{model} answered {document_type} after {elapsed:.3f}s "
+                            f"for ~{prompt_tokens(payload)} prompt tokens")
+                ticket.used_tokens = (response_data.get('usage') or {}).get('total_tokens') or (
+                    prompt_tokens(payload) + estimate_tokens(content))
+            yield content, choice.get('finish_reason'), response_data.get('usage')
         
-        if api_response.status_code != 200:
-            raise Exception(f"API request failed: {api_response.status_code} - {api_response.text}")
+        answers = model_router.hedged(model_router.models(document_type), attempt, 'total', final=(AdmissionRejected,))
+        try:
+            model, (content, finish_reason, usage) = next(answers)
+        finally:
+            answers.close()
+        record_completion(prompt, document_type, content, finish_reason, usage)
+        response = finalize_ai_response(content, document_type)
+        cache_response(cache_key, document_type, payload, model, response)
         
-        response_data = api_response.json()
-        response = response_data['choices'][0]['message']['content'].strip()
+        return response
+    
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        return upstream_error_message(e)
+
+STREAM_END = object()
+
+def parse_stream_line(line: str):
+    """(content delta, finish reason) carried by one upstream SSE line, None if it isn't data, or STREAM_END"""
+    if not line or not line.startswith('data:'):
+        return None
+    data = line[5:].strip()
+    if data == '[DONE]':
+        return STREAM_END
+    
+    choices = json.loads(data).get('choices') or [{}]
+    return (choices[0].get('delta') or {}).get('content'), choices[0].get('finish_reason')
+
+def stream_ai_response(prompt: str, document_type: str, bypass_cache: bool = False, user_data: dict = None):
+    """Stream an AI response from NVIDIA NIM as (event, text) pairs.
+    
+    Yields ('delta', text) as tokens arrive, with markdown emphasis already
+    stripped. The last event is ('done', final_text) carrying the fully
+    post-processed response, or ('error', message) if the call failed.
+    """
+    if not NVIDIA_API_KEY:
+        yield 'error', "❌ NVIDIA_API_KEY not found. Please add it in Railway Variables."
+        return
+    
+    try:
+        payload = build_nim_payload(prompt, document_type, user_data)
         
-        # Post-process with Indian document agent
-        if document_type != 'general':
-            response = agent.validate_indian_content(response, document_type)
+        cache_key = response_cache_key(prompt, document_type, payload)
+        if cache_key and not bypass_cache:
+            cached = response_cache.get(cache_key)
+            pipeline_metrics.cache_lookup('response', cached is not None)
+            if cached is not None:
+                logger.info(f"Response cache hit for {document_type}")
+                yield 'delta', cached
+                yield 'done', cached
+                return
         
-        # Clean formatting
-        response = response.replace('**', '').replace('*', '')
-        response = re.sub(r'\n{3,}', '\n\n', response)
-        response = response.replace('\n\n\n', '\n\n')
+        payload['stream'] = True
         
-        # Detect language for logging
-        hindi_chars = re.findall(r'[\u0900-\u097F]', response)
-        language = "Hindi" if len(hindi_chars) > 10 else "English"
-        logger.info(f"Generated {document_type} document in {language} with {len(response)} characters")
+        language = prompt_language(prompt)
+        admission = admission_args(payload, document_type)
+        chunks = []
+        finish_reason = model = None
         
-        return response
+        def attempt(model: str, hedge: bool):
+            """One model's stream as (delta, None) items, then (None, finish reason)"""
+            with upstream_admission(admission, document_type, language, hedge) as ticket:
+                started = time.perf_counter()
+                seen, reason = [], None
+                try:
+                    with nim_client.chat_completions(
+                        {**payload, 'model': model},
+                        {**nim_headers(), "Accept": "text/event-stream"},
+                        timeout=30,
+                        stream=True
+                    ) as api_response:
+                        pipeline_metrics.upstream_response(api_response.status_code)
+                        pipeline_metrics.observe_upstream('connect', document_type, language,
+                                                          time.perf_counter() - started)
+                        for line in api_response.iter_lines(decode_unicode=True):
+                            event = parse_stream_line(line)
+                            if event is STREAM_END:
+                                break
+                            if not event:
+                                continue
+                            delta, reason = event[0], event[1] or reason
+                            if not delta:
+                                continue
+                            
+                            if not seen:
+                                elapsed = time.perf_counter() - started
+                                model_router.record(model, 'ttft', elapsed)
+                                pipeline_metrics.observe_upstream('ttft', document_type, language, elapsed)
+                                logger.info(f"First token for {document_type} from {model} after {elapsed:.3f}s "
+                                            f"for ~{prompt_tokens(payload)} prompt tokens")
+                            seen.append(delta)
+                            yield delta, None
+                    if not seen:
+                        raise Exception("API response format error: empty stream")
+                except Exception:
+                    model_router.record_error(model)
+                    raise
+                finally:
+                    ticket.used_tokens = prompt_tokens(payload) + estimate_tokens(''.join(seen))
+            pipeline_metrics.observe_upstream('total', document_type, language, time.perf_counter() - started)
+            yield None, reason
         
-    except requests.exceptions.Timeout:
-        logger.error("NVIDIA API timeout")
-        return "❌ Request timeout. Please try again."
-    except requests.exceptions.RequestException as e:
-        logger.error(f"NVIDIA API request error: {e}")
-        return "❌ Network error. Please check your connection."
+        for model, (delta, reason) in model_router.hedged(model_router.models(document_type), attempt, 'ttft',
+                                                           final=(AdmissionRejected,)):
+            if delta is None:
+                finish_reason = reason
+                continue
+            chunks.append(delta)
+            
+            # The final cleanup drops every '*', so it is safe to strip per delta
+            visible = delta.replace('*', '')
+            if visible:
+                yield 'delta', visible
+        
+        content = ''.join(chunks)
+        record_completion(prompt, document_type, content, finish_reason)
+        response = finalize_ai_response(content, document_type)
+        cache_response(cache_key, document_type, payload, model, response)
+        
+        yield 'done', response
+    
     except Exception as e:
-        logger.error(f"NVIDIA API error: {e}")
-        error_msg = str(e)
-        if "401" in error_msg or "unauthorized" in error_msg.lower():
-            return "❌ Invalid API key. Please check your NVIDIA_API_KEY."
-        elif "429" in error_msg or "rate limit" in error_msg.lower():
-            return "❌ Rate limit exceeded. Please wait and try again."
-        elif "json" in error_msg.lower():
-            return "❌ API response format error. Please try again."
-        return f"❌ AI service error: {error_msg[:100]}..."
+        yield 'error', upstream_error_message(e)
+
+def complete_template_fields(message: str, fields: list) -> dict:
+    """Ask the model for just the template fields extraction missed, as a small JSON object"""
+    payload = {
+        "model": model_router.primary('application'),
+        "messages": [
+            {"role": "system", "content": "You fill in fields of an Indian application letter from the user's "
+                                          "request. Reply with only a JSON object mapping each field name to a "
+                                          "short value, or to null when the request does not say."},
+            {"role": "user", "content": f"Request: {message}\nFields: {json.dumps(fields)}"}
+        ],
+        "temperature": 0.1,
+        "max_tokens": 40 * len(fields) + 40,
+        "top_p": 0.9
+    }
+    try:
+        with upstream_admission(admission_args(payload, 'application'), 'application', prompt_language(message)):
+            api_response = nim_client.chat_completions(payload, nim_headers(), timeout=15)
+        content = api_response.json()['choices'][0]['message']['content']
+        values = json.loads(content[content.index('{'):content.rindex('}') + 1])
+    except Exception as e:
+        logger.warning(f"Template field completion failed, leaving blanks: {e}")
+        return {}
+    return {field: str(values[field]).strip() for field in fields
+            if isinstance(values.get(field), (str, int, float)) and str(values[field]).strip()}
+
+def template_document(message: str, document_type: str, user_data: dict, data: dict = None):
+    """Fill a bundled template for the request, or None when it needs full LLM generation.
+    
+    Returns (text, info) with info['generation_path'] 'template', or 'template+llm'
+    when a short completion call supplied fields the extractor couldn't find.
+    """
+    if not TEMPLATE_FAST_PATH or document_type != 'application' or (data or {}).get('template') is False:
+        return None
+    template = template_engine.match(message)
+    if template is None:
+        return None
+    
+    values = template_engine.values_for(user_data)
+    path = 'template'
+    missing = template.missing(values)
+    if missing and NVIDIA_API_KEY:
+        values.update(complete_template_fields(message, missing))
+        path = 'template+llm'
+    
+    text = finalize_ai_response(template.fill(values), document_type)
+    logger.info(f"Filled {template.name} via {path} ({len(missing)} fields missing after extraction)")
+    return text, {'generation_path': path, 'template': template.name}
+
+def document_text(message: str, document_type: str, user_data: dict, bypass_cache: bool, data: dict = None):
+    """Document text from a bundled template when one fits, otherwise from the LLM.
+    
+    Returns (text, info); info reports the generation path and its latency.
+    """
+    started = time.perf_counter()
+    filled = template_document(message, document_type, user_data, data)
+    if filled:
+        text, info = filled
+    else:
+        text, info = generate_ai_response(message, document_type, bypass_cache, user_data), {'generation_path': 'llm'}
+    info['generation_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    if not text.startswith('❌'):
+        template_engine.record(info['generation_path'], info['generation_ms'])
+    return text, info
+
+def sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def wants_event_stream(data: dict) -> bool:
+    """Check whether the client asked for a streamed (SSE) response"""
+    if data.get('stream') is True:
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', 'text/event-stream'])
+    return best == 'text/event-stream'
+
+def cache_bypass_requested() -> bool:
+    """Operators can force a fresh upstream call with an X-Cache-Bypass header"""
+    return request.headers.get('X-Cache-Bypass', '').lower() in ('1', 'true', 'yes')
+
+def busy_response(retry_after: int) -> tuple:
+    """429 with a Retry-After hint, for a full job queue or an exhausted upstream budget"""
+    response = jsonify({
+        'error': 'Server is busy. Please try again shortly.',
+        'status': 'error',
+        'retry_after': retry_after
+    })
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+def event_stream_response(events) -> Response:
+    # The request stays available while streaming, so upstream admission knows whose call it is
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/')
 def index():
@@ -765,8 +732,27 @@ def chat():
         if not message:
             return jsonify({'error': 'Message is required'}), 400
         
+        bypass_cache = cache_bypass_requested()
+        
+        if wants_event_stream(data):
+            def events():
+                for event, text in stream_ai_response(message, document_type, bypass_cache):
+                    if event == 'delta':
+                        yield sse_event('delta', {'text': text})
+                    elif event == 'done':
+                        yield sse_event('done', {
+                            'response': text,
+                            'document_type': document_type,
+                            'timestamp': datetime.now().isoformat(),
+                            'status': 'success'
+                        })
+                    else:
+                        yield sse_event('error', {'error': text, 'status': 'error'})
+            
+            return event_stream_response(events())
+        
         # Generate AI response
-        ai_response = generate_ai_response(message, document_type)
+        ai_response = generate_ai_response(message, document_type, bypass_cache)
         
         return jsonify({
             'response': ai_response,
@@ -775,6 +761,8 @@ def chat():
             'status': 'success'
         })
         
+    except AdmissionRejected as e:
+        return busy_response(e.retry_after)
     except Exception as e:
         logger.error(f"Chat error: {e}")
         return jsonify({
@@ -782,6 +770,213 @@ def chat():
             'status': 'error'
         }), 500
 
+def progressive_pdf(document_type: str, user_data: dict):
+    """A ProgressivePdf to lay out a streamed document as it arrives, or None when that is turned off"""
+    if not PROGRESSIVE_PDF:
+        return None
+    language = (user_data or {}).get('language') or 'en'
+    return ProgressivePdf(
+        LAYOUT_TEMPLATES.get(document_type) or LAYOUT_TEMPLATES['custom'],
+        CONTENT_RULE_SETS.get((document_type, language)) or CONTENT_RULE_SETS[('*', language)],
+        DOCUMENT_TYPES.get(document_type, "AI-Generated Document"),
+        language
+    )
+
+def render_document_response(ai_response: str, document_type: str, user_data: dict,
+                             progressive: ProgressivePdf = None) -> tuple:
+    """Render the PDF for a finished AI response and build the API response body.
+    
+    ``progressive`` is the layout made while the response streamed, if any.
+    """
+    # Generate PDF for document types only
+    doc_title = DOCUMENT_TYPES.get(document_type, "AI-Generated Document")
+    
+    # Generate clean filename
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    clean_filename = f"{document_type}_{timestamp}.pdf"
+    
+    # Identical documents (same text, title, layout, signer and printed date) are rendered once
+    pdf_key = content_key(LAYOUT_VERSION, document_type, doc_title, datetime.now().strftime("%Y-%m-%d"),
+                          signature_details(user_data), ai_response)
+    
+    try:
+        stored = pdf_store.get_by_key(pdf_key)
+        pipeline_metrics.cache_lookup('pdf', stored is not None)
+        if stored:
+            logger.info(f"Reusing rendered PDF {stored.pdf_id} for identical {document_type}")
+        else:
+            pdf_bytes = DocumentGenerator.generate_pdf_bytes(ai_response, doc_title, user_data, document_type,
+                                                             progressive)
+            stored = pdf_store.put(pdf_bytes, clean_filename, pdf_key)
+            pipeline_metrics.pdf_rendered(document_type, stored.size)
+            pipeline_metrics.temp_dir(file_janitor.stats())
+    except (ValueError, RuntimeError) as pdf_error:
+        logger.error(f"PDF generation failed: {pdf_error}")
+        return {
+            'error': f'PDF generation failed: {str(pdf_error)}',
+            'status': 'error'
+        }, 500
+    except Exception as pdf_error:
+        logger.error(f"Unexpected PDF error: {pdf_error}")
+        return {
+            'error': 'PDF generation failed. Please try again.',
+            'status': 'error'
+        }, 500
+    
+    return {
+        'response': ai_response,
+        'pdf_id': stored.pdf_id,
+        'download_url': f"/api/download/{stored.pdf_id}",
+        'filename': clean_filename,
+        'document_type': document_type,
+        'timestamp': datetime.now().isoformat(),
+        'status': 'success',
+        'file_size': stored.size
+    }, 200
+
+def wants_pdf_response() -> bool:
+    """Check whether the client asked for the PDF itself instead of a JSON summary"""
+    best = request.accept_mimetypes.best_match(['application/json', 'application/pdf'])
+    return best == 'application/pdf'
+
+def stored_pdf_response(stored) -> Response:
+    """Serve a stored PDF with a strong ETag, conditional GET and byte-range support"""
+    logger.info(f"Serving PDF: {stored.filename}, size: {stored.size} bytes")
+    max_age = max(int(stored.expires_at - time.time()), 0)
+    
+    if stored.path:
+        response = send_file(
+            stored.path,
+            as_attachment=True,
+            download_name=stored.filename,
+            mimetype='application/pdf',
+            etag=stored.etag,
+            max_age=max_age,
+            conditional=True
+        )
+    else:
+        response = Response(stored.data, mimetype='application/pdf')
+        response.headers['Content-Disposition'] = f'attachment; filename="{stored.filename}"'
+        response.set_etag(stored.etag)
+        response.make_conditional(request, accept_ranges=True, complete_length=stored.size)
+    
+    response.cache_control.max_age = max_age
+    if PDF_CACHE_CONTROL == 'public':
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+    return response
+
+def stored_document_type(stored) -> str:
+    """Document type of a stored PDF, from its "<document_type>_<timestamp>.pdf" filename"""
+    return stored.filename.split('_', 1)[0]
+
+def run_document_job(job, message: str, document_type: str, bypass_cache: bool, data: dict = None) -> dict:
+    """Document pipeline for a background job, reporting progress per stage"""
+    job.update('extracting', 5)
+    user_data = extract_request_data(message, document_type)
+    
+    job.update('generating', 15)
+    ai_response, generation = document_text(message, document_type, user_data, bypass_cache, data)
+    if ai_response.startswith('❌'):
+        raise RuntimeError(ai_response)
+    
+    job.update('rendering', 85)
+    body, status = render_document_response(ai_response, document_type, user_data)
+    if status != 200:
+        raise RuntimeError(body['error'])
+    
+    body.update(generation)
+    return body
+
+def document_response(message: str, document_type: str, bypass_cache: bool, data: dict = None) -> tuple:
+    """Document pipeline for a synchronous request: (body, status)"""
+    user_data = extract_request_data(message, document_type)
+    
+    # Fill a bundled template when one fits, otherwise generate with the AI
+    ai_response, generation = document_text(message, document_type, user_data, bypass_cache, data)
+    
+    # Check if AI response is an error
+    if ai_response.startswith('❌'):
+        return {'error': ai_response, 'status': 'error'}, 400
+    
+    body, status = render_document_response(ai_response, document_type, user_data)
+    if status == 200:
+        body.update(generation)
+    return body, status
+
+def document_events(message: str, document_type: str, bypass_cache: bool, data: dict = None):
+    """SSE events for a streamed document request; returns its final (body, status)"""
+    user_data = extract_request_data(message, document_type)
+    
+    progressive = None
+    filled = template_document(message, document_type, user_data, data)
+    if filled:
+        # Nothing to stream: the whole letter is ready at once
+        text, generation = filled
+        yield sse_event('done', {'response': text, 'status': 'success', **generation})
+    else:
+        progressive = progressive_pdf(document_type, user_data)
+        for event, text in stream_ai_response(message, document_type, bypass_cache, user_data):
+            if event == 'delta':
+                yield sse_event('delta', {'text': text})
+                # Lay out finished paragraphs once the delta is on its way to the client
+                if progressive and progressive.feed(text):
+                    progressive.lay_out()
+            elif event == 'done':
+                generation = {'generation_path': 'llm'}
+                yield sse_event('done', {'response': text, 'status': 'success'})
+            else:
+                body = {'error': text, 'status': 'error'}
+                yield sse_event('error', body)
+                return body, 400
+    
+    body, status = render_document_response(text, document_type, user_data, progressive)
+    if status == 200:
+        body.update(generation)
+    yield sse_event('document' if status == 200 else 'error', body)
+    return body, status
+
+def replayed_events(body: dict, status: int):
+    """The closing SSE events of a document request whose result is already known"""
+    if status != 200:
+        yield sse_event('error', body)
+        return
+    yield sse_event('done', {'response': body['response'], 'status': 'success'})
+    yield sse_event('document', body)
+
+def request_fingerprint(data: dict, bypass_cache: bool) -> str:
+    """Identity of a document request: its JSON body, message whitespace collapsed, and the cache bypass"""
+    material = json.dumps({
+        **data,
+        'message': normalize_prompt(str(data.get('message', ''))),
+        'bypass_cache': bypass_cache
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+def document_reply(body: dict, status: int, data: dict, replayed: bool = False) -> Response:
+    """Respond with a finished (or accepted) document request in the form the client asked for"""
+    # Return the PDF directly when asked, skipping the separate download round trip
+    stored = pdf_store.get(body['pdf_id']) if status == 200 and wants_pdf_response() else None
+    if stored:
+        response = stored_pdf_response(stored)
+        response.headers['X-Generation-Path'] = body['generation_path']
+    elif status != 202 and wants_event_stream(data):
+        response = event_stream_response(replayed_events(body, status))
+    else:
+        response = jsonify(body)
+        response.status_code = status
+        if status == 202:
+            response.headers['Location'] = body['status_url']
+    
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def wants_async_job(data: dict) -> bool:
+    """Clients opt into job mode with "async": true or a Prefer: respond-async header"""
+    return data.get('async') is True or 'respond-async' in request.headers.get('Prefer', '')
+
 @app.route('/api/generate-document', methods=['POST'])
 def generate_document():
     try:
@@ -798,70 +993,82 @@ def generate_document():
         if not message:
             return jsonify({'error': 'Message is required'}), 400
         
+        bypass_cache = cache_bypass_requested()
+        
         if len(message) < 3:
             return jsonify({'error': 'Please provide some details'}), 400
         
-        # Extract user data
-        user_data = extract_user_data(message)
-        
-        # Generate AI response
-        ai_response = generate_ai_response(message, document_type)
-        
-        # Check if AI response is an error
-        if ai_response.startswith('❌'):
+        # PDFs are only rendered for document types, so reject general chat before any work
+        if document_type == 'general':
             return jsonify({
-                'error': ai_response,
+                'error': 'Please select a document type from dropdown to generate PDF',
                 'status': 'error'
             }), 400
         
-        # Don't generate PDF for general chat
-        if document_type == 'general':
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+        if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
             return jsonify({
-                'error': 'Please select a document type from dropdown to generate PDF',
+                'error': f'Idempotency-Key must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters',
                 'status': 'error'
             }), 400
         
-        # Generate PDF for document types only
-        doc_title = DOCUMENT_TYPES.get(document_type, "AI-Generated Document")
+        fingerprint = request_fingerprint(data, bypass_cache)
+        if idempotency_key:
+            try:
+                replay = idempotency_store.get(idempotency_key, fingerprint)
+            except IdempotencyKeyReused as e:
+                return jsonify({'error': str(e), 'status': 'error'}), 422
+            pipeline_metrics.cache_lookup('idempotency', replay is not None)
+            if replay:
+                logger.info(f"Replaying stored result for Idempotency-Key {idempotency_key!r}")
+                return document_reply(*replay, data, replayed=True)
         
-        try:
-            pdf_path = DocumentGenerator.generate_pdf(ai_response, doc_title, user_data)
-            
-            # Verify PDF creation
-            if not pdf_path or not os.path.exists(pdf_path):
-                raise RuntimeError("PDF file was not created")
+        def remember(body, status):
+            if idempotency_key and status in (200, 202):
+                idempotency_store.put(idempotency_key, fingerprint, body, status)
+        
+        if wants_async_job(data):
+            try:
+                job = job_manager.submit(run_document_job, message, document_type, bypass_cache, data)
+            except JobQueueFull as e:
+                logger.warning(f"Rejecting document job: {e}")
+                return busy_response(e.retry_after)
             
-            # Verify file size
-            if os.path.getsize(pdf_path) == 0:
-                raise RuntimeError("Generated PDF is empty")
+            body = {'job_id': job.id, 'status': job.status, 'status_url': f"/api/jobs/{job.id}"}
+            remember(body, 202)
+            return document_reply(body, 202, data)
+        
+        if wants_event_stream(data):
+            def events():
+                # A copy of this request already streaming hands over its result when it is done
+                flight, leader = document_flights.begin(fingerprint)
+                pipeline_metrics.cache_lookup('in_flight', not leader)
+                if not leader:
+                    try:
+                        yield from replayed_events(*flight.wait())
+                        return
+                    except FlightAbandoned:
+                        pass
                 
-        except (ValueError, RuntimeError) as pdf_error:
-            logger.error(f"PDF generation failed: {pdf_error}")
-            return jsonify({
-                'error': f'PDF generation failed: {str(pdf_error)}',
-                'status': 'error'
-            }), 500
-        except Exception as pdf_error:
-            logger.error(f"Unexpected PDF error: {pdf_error}")
-            return jsonify({
-                'error': 'PDF generation failed. Please try again.',
-                'status': 'error'
-            }), 500
+                result = None
+                try:
+                    result = yield from document_events(message, document_type, bypass_cache, data)
+                finally:
+                    if leader:
+                        document_flights.end(fingerprint, flight, result)
+                remember(*result)
+            
+            return event_stream_response(events())
         
-        # Generate clean filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        clean_filename = f"{document_type}_{timestamp}.pdf"
-        
-        return jsonify({
-            'response': ai_response,
-            'pdf_path': pdf_path,
-            'filename': clean_filename,
-            'document_type': document_type,
-            'timestamp': datetime.now().isoformat(),
-            'status': 'success',
-            'file_size': os.path.getsize(pdf_path)
-        })
+        # Identical requests already in flight wait for that one's result instead of generating again
+        (body, status), shared = document_flights.do(
+            fingerprint, document_response, message, document_type, bypass_cache, data)
+        pipeline_metrics.cache_lookup('in_flight', shared)
+        remember(body, status)
+        return document_reply(body, status, data)
         
+    except AdmissionRejected as e:
+        return busy_response(e.retry_after)
     except Exception as e:
         logger.error(f"Document generation error: {e}")
         return jsonify({
@@ -869,48 +1076,173 @@ def generate_document():
             'status': 'error'
         }), 500
 
-@app.route('/api/download/<path:filepath>')
-def download_file(filepath):
+def batch_document_item(item, bypass_cache: bool) -> dict:
+    """Generate and render one batch item; raises on failure so the rest of the batch carries on"""
+    if not isinstance(item, dict):
+        raise ValueError('Each item must be an object with message and document_type')
+    
+    message = str(item.get('message') or '').strip()
+    document_type = item.get('document_type', 'custom')
+    if len(message) < 3:
+        raise ValueError('Please provide some details')
+    if document_type not in DOCUMENT_TYPES:
+        raise ValueError(f'Unknown document type: {document_type}')
+    
+    user_data = extract_request_data(message, document_type)
+    ai_response, generation = document_text(message, document_type, user_data, bypass_cache, item)
+    if ai_response.startswith('❌'):
+        raise RuntimeError(ai_response)
+    
+    body, status = render_document_response(ai_response, document_type, user_data)
+    if status != 200:
+        raise RuntimeError(body['error'])
+    body.update(generation)
+    return body
+
+def stored_pdf_bytes(stored) -> bytes:
+    if stored.data is not None:
+        return stored.data
+    with open(stored.path, 'rb') as f:
+        return f.read()
+
+def wants_zip_response(data: dict) -> bool:
+    """Batches come back as NDJSON unless the client asks for a ZIP"""
+    if data.get('format') == 'zip':
+        return True
+    best = request.accept_mimetypes.best_match(['application/x-ndjson', 'application/zip'])
+    return best == 'application/zip'
+
+@app.route('/api/generate-documents', methods=['POST'])
+def generate_documents():
+    if not request.is_json:
+        return jsonify({'error': 'Content-Type must be application/json'}), 400
+    
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'items must be a non-empty list', 'status': 'error'}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'A batch can have at most {BATCH_MAX_ITEMS} items', 'status': 'error'}), 400
+    
     try:
-        import urllib.parse
-        filepath = urllib.parse.unquote(filepath)
-        
-        # Validate filepath
-        if not filepath or filepath in ['undefined', 'null', '']:
-            return jsonify({'error': 'Invalid file path'}), 400
-        
-        # Security check - ensure file is in temp directory
-        temp_dir = tempfile.gettempdir()
-        if not filepath.startswith(temp_dir):
-            return jsonify({'error': 'Access denied'}), 403
+        concurrency = min(int(data.get('concurrency') or BATCH_CONCURRENCY), BATCH_CONCURRENCY)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'concurrency must be a number', 'status': 'error'}), 400
+    concurrency = max(concurrency, 1)
+    
+    bypass_cache = cache_bypass_requested()
+    results = run_bounded(lambda item: batch_document_item(item, bypass_cache), items, concurrency)
+    logger.info(f"Batch of {len(items)} documents, concurrency {concurrency}")
+    
+    def outcome(index, body, error):
+        if error is not None:
+            logger.warning(f"Batch item {index} failed: {error}")
+            return {'index': index, 'status': 'error', 'error': str(error)}
+        return {'index': index, **body}
+    
+    def summary(outcomes):
+        succeeded = sum(1 for item in outcomes if item['status'] == 'success')
+        return {'total': len(items), 'succeeded': succeeded, 'failed': len(outcomes) - succeeded}
+    
+    if wants_zip_response(data):
+        def archive():
+            zip_stream, manifest = ZipStream(), []
+            for index, body, error in results:
+                entry = outcome(index, body, error)
+                if error is None:
+                    stored = pdf_store.get(body['pdf_id'])
+                    if stored is None:
+                        entry = outcome(index, None, RuntimeError('PDF expired before it could be sent'))
+                    else:
+                        entry['archive_name'] = f"{index + 1:03d}_{body['filename']}"
+                        entry.pop('response', None)
+                        yield zip_stream.add(entry['archive_name'], stored_pdf_bytes(stored))
+                manifest.append(entry)
+            manifest.sort(key=lambda item: item['index'])
+            yield zip_stream.add('manifest.json', json.dumps(
+                {**summary(manifest), 'items': manifest}, ensure_ascii=False, indent=2))
+            yield zip_stream.close()
         
-        # Check file exists and is readable
-        if not (os.path.exists(filepath) and os.path.isfile(filepath) and os.access(filepath, os.R_OK)):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return Response(archive(), mimetype='application/zip', headers={
+            'Content-Disposition': f'attachment; filename="documents_{timestamp}.zip"',
+            'X-Accel-Buffering': 'no'
+        })
+    
+    def lines():
+        outcomes = []
+        for index, body, error in results:
+            entry = outcome(index, body, error)
+            outcomes.append({'status': entry['status']})
+            yield json.dumps(entry, ensure_ascii=False) + "\n"
+        yield json.dumps({'status': 'complete', **summary(outcomes)}) + "\n"
+    
+    return Response(lines(), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/download/<pdf_id>')
+def download_file(pdf_id):
+    try:
+        stored = pdf_store.get(pdf_id)
+        if not stored:
             return jsonify({'error': 'File not found'}), 404
         
-        # Validate file size
-        file_size = os.path.getsize(filepath)
-        if file_size == 0:
-            return jsonify({'error': 'File is empty'}), 400
-        
-        # Generate clean filename
-        base_name = os.path.basename(filepath)
-        if not base_name.endswith('.pdf'):
-            base_name = f"document_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        
-        logger.info(f"Serving PDF: {base_name}, size: {file_size} bytes")
-        
-        return send_file(
-            filepath,
-            as_attachment=True,
-            download_name=base_name,
-            mimetype='application/pdf'
-        )
+        started = time.perf_counter()
+        response = stored_pdf_response(stored)
+        pipeline_metrics.observe_stage('download', stored_document_type(stored), 'any', time.perf_counter() - started)
+        return response
         
     except Exception as e:
         logger.error(f"Download error: {e}")
         return jsonify({'error': 'Download failed'}), 500
 
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found', 'status': 'error'}), 404
+    
+    if not wants_event_stream({}):
+        return jsonify(job.to_dict())
+    
+    def events():
+        version = None
+        while True:
+            # Re-sends the current state every 15s as a keep-alive while nothing changes
+            version = job.wait(version, timeout=15)
+            yield sse_event('done' if job.done else 'progress', job.to_dict())
+            if job.done:
+                return
+    
+    return event_stream_response(events())
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    return jsonify(response_cache.stats())
+
+@app.route('/api/upstream/stats')
+def upstream_stats():
+    return jsonify(admission_controller.stats())
+
+@app.route('/api/models/stats')
+def model_stats():
+    return jsonify(model_router.stats())
+
+@app.route('/api/templates/stats')
+def template_stats():
+    return jsonify(template_engine.stats())
+
+@app.route('/api/generation/stats')
+def generation_stats():
+    return jsonify(generation_profiles.stats())
+
+@app.route('/metrics')
+def metrics():
+    pipeline_metrics.temp_dir(file_janitor.stats())
+    body, content_type = pipeline_metrics.render()
+    return Response(body, content_type=content_type)
+
 @app.route('/health')
 def health():
     return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
@@ -0,0 +1,246 @@
+"""Fill the bundled templates/application/*.txt letters from extracted user data, without the LLM.
+
+Each template is parsed once into lines of literal text and placeholders:
+``[Bracketed text]`` and the sample values ``DD/MM/YYYY``, ``+91-XXXXXXXXXX``,
+``XXXX-XXXX-XXXX`` and ``XXXXXXXXXX``. A placeholder's key is its bracketed
+text, or the line's label for ``Label: [value]`` lines. Keys are then mapped
+to extract_user_data fields through FIELD_ALIASES.
+
+Placeholders inside sentences are required: the letter doesn't read without
+them. Placeholders on label, list and address lines are optional. A missing
+optional placeholder drops its line when nothing else on the line was filled,
+and is otherwise left as a blank to write in by hand.
+"""
+
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+
+from text_normalizer import is_hindi
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'application')
+
+BLANK = '__________'
+
+class TemplateSpec:
+    """How requests are matched to one template, and bracket keys it uses differently"""
+
+    def __init__(self, keywords: tuple, renames: dict = None):
+        self.keywords = keywords
+        self.renames = renames or {}
+
+TEMPLATE_CATALOG = {
+    'indian_leave_application': TemplateSpec(('leave', 'absence', 'sick', 'holiday', 'vacation')),
+    'indian_job_application': TemplateSpec(
+        ('job', 'post of', 'position', 'vacancy', 'hiring', 'recruitment', 'interview'),
+        renames={'date': 'advertisement date'}),
+    'indian_bank_account_application': TemplateSpec(
+        ('bank account', 'savings account', 'open an account', 'open account', 'account opening')),
+    'indian_school_admission': TemplateSpec(('admission',)),
+    'indian_government_application': TemplateSpec(
+        ('certificate', 'government', 'municipal', 'tehsil', 'collector', 'ration card', 'domicile')),
+}
+
+# Placeholder keys → extract_user_data fields; unlisted keys are asked for by name
+FIELD_ALIASES = {
+    'your full name': 'full_name', 'your name': 'full_name', 'full name': 'full_name',
+    "parent's/guardian's name": 'full_name',
+    "father's name": 'father_name', "father's/husband's name": 'father_name',
+    'address': 'address', 'your address': 'address', 'complete address': 'address',
+    'present address': 'address', 'permanent address': 'address',
+    'mobile': 'mobile', 'mobile number': 'mobile', 'contact number': 'mobile',
+    'email': 'email', 'email id': 'email',
+    'aadhaar no': 'aadhaar', 'aadhaar number': 'aadhaar',
+    'pan no': 'pan', 'pan number': 'pan',
+    'date of birth': 'date_of_birth',
+    'date': 'date',
+    'occupation': 'occupation', 'your occupation': 'occupation',
+    'job position': 'position',
+    'recipient institution/office name': 'institution', 'recipient school name': 'institution',
+    'recipient company name': 'institution', 'recipient bank name': 'institution',
+    'start date': 'start_date', 'end date': 'end_date', 'reason for leave': 'reason',
+    "student's name": 'student_name', "student's full name": 'student_name',
+    'son/daughter/ward': 'relation',
+    'class/standard': 'class_name',
+    'specific requirement': 'purpose', 'specific service/certificate/permission': 'purpose', 'purpose': 'purpose',
+    'your designation/class': 'designation',
+    'employee id/roll number': 'employee_id',
+}
+
+# Requests that ask for something other than the standard letter go to the LLM
+FREE_FORM_MARKERS = ('free form', 'free-form', 'freeform', 'in my own words', 'detailed', 'elaborate',
+                     'creative', 'custom format', 'hindi', 'हिंदी', 'हिन्दी', 'देवनागरी')
+
+_PLACEHOLDER = re.compile(r'\[([^\]]+)\]|(\+91-X{10}|X{4}-X{4}-X{4}|X{10}|DD/MM/YYYY)')
+_LINE_LABEL = re.compile(r"\s*(?:-\s*)?([A-Za-z][A-Za-z'/ ()]*):\s*(?:Rs\.\s*)?")
+
+class Placeholder:
+    __slots__ = ('field', 'prefix', 'required')
+
+    def __init__(self, field: str, prefix: str, required: bool):
+        self.field = field
+        self.prefix = prefix
+        self.required = required
+
+class TemplateLine:
+    """One template line as literal strings and Placeholders; ``kind`` is bare, label, list or prose"""
+
+    __slots__ = ('parts', 'kind')
+
+    def __init__(self, parts: list, kind: str):
+        self.parts = parts
+        self.kind = kind
+
+class ApplicationTemplate:
+    """A parsed template: its lines, placeholders and matching keywords"""
+
+    def __init__(self, name: str, text: str, spec: TemplateSpec):
+        self.name = name
+        self.keywords = spec.keywords
+        self.lines = []
+        block = None
+        for raw in text.strip().split('\n'):
+            stripped = raw.strip()
+            if stripped in ('To,', 'From,'):
+                block = stripped
+            elif not stripped:
+                block = None
+            self.lines.append(self._parse_line(raw.rstrip(), block == 'To,', spec.renames))
+
+    @staticmethod
+    def _parse_line(line: str, recipient: bool, renames: dict) -> TemplateLine:
+        matches = list(_PLACEHOLDER.finditer(line))
+        if not matches:
+            return TemplateLine([line], 'literal')
+
+        label = _LINE_LABEL.match(line)
+        literal = _PLACEHOLDER.sub('', line)
+        if label and label.end() == matches[0].start():
+            kind = 'label'
+        elif not re.search(r'[A-Za-z]', literal):
+            kind = 'bare'
+        elif line.lstrip().startswith('- '):
+            kind = 'list'
+        else:
+            kind = 'prose'
+
+        parts, position = [], 0
+        for match in matches:
+            parts.append(line[position:match.start()])
+            position = match.end()
+            bracketed, prefix = match.group(1), ''
+            if bracketed and ':' in bracketed:
+                # "[Mobile: +91-XXXXXXXXXX]" keeps its label in the output
+                key, _ = bracketed.split(':', 1)
+                prefix = key.strip() + ': '
+            elif kind == 'label' and match is matches[0]:
+                key = label.group(1)
+            elif bracketed:
+                key = renames.get(bracketed.lower(), bracketed)
+            else:
+                key = label.group(1) if label else match.group(2)
+
+            key = ' '.join(key.lower().split())
+            if recipient and kind == 'bare':
+                key = f"recipient {key}"
+            parts.append(Placeholder(FIELD_ALIASES.get(key, key), prefix, kind == 'prose'))
+        parts.append(line[position:])
+        return TemplateLine([part for part in parts if part != ''], kind)
+
+    def missing(self, values: dict) -> list:
+        """Required fields without a value, in order of first use"""
+        fields = []
+        for line in self.lines:
+            for part in line.parts:
+                if isinstance(part, Placeholder) and part.required and not values.get(part.field):
+                    if part.field not in fields:
+                        fields.append(part.field)
+        return fields
+
+    def fill(self, values: dict) -> str:
+        output = []
+        for line in self.lines:
+            if line.kind == 'literal':
+                output.append(line.parts[0])
+                continue
+
+            filled_any = False
+            pieces = []
+            for part in line.parts:
+                if isinstance(part, str):
+                    pieces.append(part)
+                    continue
+                value = values.get(part.field)
+                if value:
+                    filled_any = True
+                    pieces.append(f"{part.prefix}{value}")
+                else:
+                    pieces.append(f"{part.prefix}{BLANK}")
+
+            if not filled_any and line.kind in ('bare', 'list'):
+                continue
+            output.append(''.join(pieces))
+        return '\n'.join(output)
+
+class TemplateEngine:
+    """Loads every template once and matches requests to them.
+
+    Also counts which generation path each document took, with its
+    latency, so the template hit rate and the time saved can be measured.
+    """
+
+    def __init__(self, directory: str = TEMPLATE_DIR, catalog: dict = TEMPLATE_CATALOG):
+        self.templates = []
+        for name, spec in catalog.items():
+            path = os.path.join(directory, f"{name}.txt")
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.templates.append(ApplicationTemplate(name, f.read(), spec))
+            except OSError as e:
+                logger.warning(f"Application template {name} unavailable: {e}")
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    def match(self, message: str):
+        """The template whose keywords the request mentions most, or None if none or tied"""
+        lowered = message.lower()
+        if is_hindi(message) or any(marker in lowered for marker in FREE_FORM_MARKERS):
+            return None
+
+        best, best_score, tied = None, 0, False
+        for template in self.templates:
+            score = sum(1 for keyword in template.keywords if keyword in lowered)
+            if score > best_score:
+                best, best_score, tied = template, score, False
+            elif score and score == best_score:
+                tied = True
+        return None if tied else best
+
+    @staticmethod
+    def values_for(user_data: dict) -> dict:
+        """Extracted user data plus the fields every letter gets, such as today's date"""
+        values = {'date': datetime.now().strftime('%d/%m/%Y')}
+        values.update({field: value for field, value in user_data.items() if value})
+        return values
+
+    def record(self, path: str, elapsed_ms: float):
+        with self._lock:
+            count, total = self._paths.get(path, (0, 0.0))
+            self._paths[path] = (count + 1, total + elapsed_ms)
+
+    def stats(self) -> dict:
+        with self._lock:
+            paths = dict(self._paths)
+        requests_total = sum(count for count, _ in paths.values())
+        hits = sum(count for path, (count, _) in paths.items() if path.startswith('template'))
+        return {
+            'templates': [template.name for template in self.templates],
+            'requests': requests_total,
+            'hit_rate': round(hits / requests_total, 4) if requests_total else 0.0,
+            'paths': {path: {'count': count, 'mean_ms': round(total / count, 1)}
+                      for path, (count, total) in paths.items()},
+        }
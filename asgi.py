@@ -0,0 +1,557 @@
+"""ASGI serving mode: the upstream-bound endpoints run on an event loop.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+/api/chat, /api/generate-document, /api/download and /health are served
+here, with NIM calls on a non-blocking client. PDF rendering runs in the
+thread pool, and through the render process pool if RENDER_PROCESSES is
+set. Every other route (web UI, jobs, batch, cache stats) falls through to
+the Flask app in the same process, so it shares caches, stores and jobs.
+"""
+
+import logging
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+import app as wsgi
+from app import (
+    IDEMPOTENCY_KEY_MAX_LENGTH, NVIDIA_BASE_URL, PDF_CACHE_CONTROL, STREAM_END, JobQueueFull, admission_args,
+    admission_controller, build_nim_payload, cache_response, extract_request_data, finalize_ai_response,
+    idempotency_store, job_manager, model_router, nim_headers, parse_stream_line, pdf_store, pipeline_metrics,
+    progressive_pdf, record_completion, render_document_response, replayed_events, request_client,
+    request_fingerprint, response_cache, response_cache_key, run_document_job, sse_event, stored_document_type,
+    template_document, template_engine, upstream_error_message
+)
+from admission import AdmissionRejected
+from async_nim_client import AsyncNIMClient
+from idempotency import AsyncSingleFlight, FlightAbandoned, IdempotencyKeyReused
+from prompts import estimate_tokens, prompt_language, prompt_tokens
+
+logger = logging.getLogger(__name__)
+
+# One event loop holds every in-flight call, so the pool is sized for concurrency, not threads
+nim_client = AsyncNIMClient(NVIDIA_BASE_URL, pool_size=int(os.getenv('NIM_ASYNC_POOL_SIZE', 256)),
+                            admission=admission_controller)
+
+# Fairness key of the request being served, for upstream admission; set by the route handlers
+current_client = ContextVar('current_client', default=None)
+
+# Identical document requests in flight on this event loop share one generation and render;
+# Idempotency-Key results are kept in the app's store, shared with the Flask routes
+document_flights = AsyncSingleFlight()
+
+DOCUMENT_TYPE_REQUIRED = 'Please select a document type from dropdown to generate PDF'
+
+@asynccontextmanager
+async def upstream_admission(admission: tuple, document_type: str, language: str, hedge: bool = False):
+    """Async counterpart of app.upstream_admission"""
+    cost, priority, client, max_wait = admission
+    started = time.perf_counter()
+    try:
+        ticket = await admission_controller.acquire_async(cost, priority, client, 0 if hedge else max_wait)
+    except AdmissionRejected:
+        pipeline_metrics.upstream_response('rejected')
+        raise
+    pipeline_metrics.observe_upstream('queue', document_type, language, time.perf_counter() - started)
+    try:
+        yield ticket
+    finally:
+        admission_controller.release(ticket)
+
+async def generate_ai_response(prompt: str, document_type: str, bypass_cache: bool = False,
+                              user_data: dict = None) -> str:
+    """Async counterpart of app.generate_ai_response"""
+    if not wsgi.NVIDIA_API_KEY:
+        return "❌ NVIDIA_API_KEY not found. Please add it in Railway Variables."
+
+    try:
+        payload = build_nim_payload(prompt, document_type, user_data)
+
+        cache_key = response_cache_key(prompt, document_type, payload)
+        if cache_key and not bypass_cache:
+            cached = response_cache.get(cache_key)
+            pipeline_metrics.cache_lookup('response', cached is not None)
+            if cached is not None:
+                logger.info(f"Response cache hit for {document_type}")
+                return cached
+
+        language = prompt_language(prompt)
+        admission = admission_args(payload, document_type, current_client.get())
+
+        async def attempt(model: str, hedge: bool):
+            async with upstream_admission(admission, document_type, language, hedge) as ticket:
+                started = time.perf_counter()
+                try:
+                    api_response = await nim_client.chat_completions({**payload, 'model': model}, nim_headers(),
+                                                                     timeout=30)
+                    response_data = await api_response.json(content_type=None)
+                    choice = response_data['choices'][0]
+                    content = choice['message']['content']
+                except Exception:
+                    model_router.record_error(model)
+                    raise
+                elapsed = time.perf_counter() - started
+                model_router.record(model, 'total', elapsed)
+                pipeline_metrics.upstream_response(api_response.status)
+                pipeline_metrics.observe_upstream('total', document_type, language, elapsed)
+                logger.info(f"{model} answered {document_type} after {elapsed:.3f}s "
+                            f"for ~{prompt_tokens(payload)} prompt tokens")
+                ticket.used_tokens = (response_data.get('usage') or {}).get('total_tokens') or (
+                    prompt_tokens(payload) + estimate_tokens(content))
+            yield content, choice.get('finish_reason'), response_data.get('usage')
+
+        answers = model_router.hedged_async(model_router.models(document_type), attempt, 'total',
+                                            final=(AdmissionRejected,))
+        try:
+            model, (content, finish_reason, usage) = await answers.__anext__()
+        finally:
+            await answers.aclose()
+        record_completion(prompt, document_type, content, finish_reason, usage)
+        response = finalize_ai_response(content, document_type)
+        cache_response(cache_key, document_type, payload, model, response)
+
+        return response
+
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        return upstream_error_message(e)
+
+async def document_text(message: str, document_type: str, user_data: dict, bypass_cache: bool, data: dict):
+    """Async counterpart of app.document_text; template filling runs on the thread pool"""
+    started = time.perf_counter()
+    filled = await run_in_threadpool(template_document, message, document_type, user_data, data)
+    if filled:
+        text, info = filled
+    else:
+        text, info = await generate_ai_response(message, document_type, bypass_cache, user_data), {'generation_path': 'llm'}
+    info['generation_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    if not text.startswith('❌'):
+        template_engine.record(info['generation_path'], info['generation_ms'])
+    return text, info
+
+async def stream_ai_response(prompt: str, document_type: str, bypass_cache: bool = False, user_data: dict = None):
+    """Async counterpart of app.stream_ai_response, yielding the same (event, text) pairs"""
+    if not wsgi.NVIDIA_API_KEY:
+        yield 'error', "❌ NVIDIA_API_KEY not found. Please add it in Railway Variables."
+        return
+
+    try:
+        payload = build_nim_payload(prompt, document_type, user_data)
+
+        cache_key = response_cache_key(prompt, document_type, payload)
+        if cache_key and not bypass_cache:
+            cached = response_cache.get(cache_key)
+            pipeline_metrics.cache_lookup('response', cached is not None)
+            if cached is not None:
+                logger.info(f"Response cache hit for {document_type}")
+                yield 'delta', cached
+                yield 'done', cached
+                return
+
+        payload['stream'] = True
+
+        language = prompt_language(prompt)
+        admission = admission_args(payload, document_type, current_client.get())
+        chunks = []
+        finish_reason = model = None
+
+        async def attempt(model: str, hedge: bool):
+            async with upstream_admission(admission, document_type, language, hedge) as ticket:
+                started = time.perf_counter()
+                seen, reason = [], None
+                try:
+                    api_response = await nim_client.chat_completions(
+                        {**payload, 'model': model},
+                        {**nim_headers(), "Accept": "text/event-stream"},
+                        timeout=30,
+                        stream=True
+                    )
+                    pipeline_metrics.upstream_response(api_response.status)
+                    pipeline_metrics.observe_upstream('connect', document_type, language,
+                                                      time.perf_counter() - started)
+                    try:
+                        async for raw in api_response.content:
+                            event = parse_stream_line(raw.decode('utf-8').strip())
+                            if event is STREAM_END:
+                                break
+                            if not event:
+                                continue
+                            delta, reason = event[0], event[1] or reason
+                            if not delta:
+                                continue
+
+                            if not seen:
+                                elapsed = time.perf_counter() - started
+                                model_router.record(model, 'ttft', elapsed)
+                                pipeline_metrics.observe_upstream('ttft', document_type, language, elapsed)
+                                logger.info(f"First token for {document_type} from {model} after {elapsed:.3f}s "
+                                            f"for ~{prompt_tokens(payload)} prompt tokens")
+                            seen.append(delta)
+                            yield delta, None
+                    finally:
+                        api_response.release()
+                    if not seen:
+                        raise Exception("API response format error: empty stream")
+                except Exception:
+                    model_router.record_error(model)
+                    raise
+                finally:
+                    ticket.used_tokens = prompt_tokens(payload) + estimate_tokens(''.join(seen))
+            pipeline_metrics.observe_upstream('total', document_type, language, time.perf_counter() - started)
+            yield None, reason
+
+        async for model, (delta, reason) in model_router.hedged_async(model_router.models(document_type), attempt,
+                                                                      'ttft', final=(AdmissionRejected,)):
+            if delta is None:
+                finish_reason = reason
+                continue
+            chunks.append(delta)
+
+            visible = delta.replace('*', '')
+            if visible:
+                yield 'delta', visible
+
+        content = ''.join(chunks)
+        record_completion(prompt, document_type, content, finish_reason)
+        response = finalize_ai_response(content, document_type)
+        cache_response(cache_key, document_type, payload, model, response)
+
+        yield 'done', response
+
+    except Exception as e:
+        yield 'error', upstream_error_message(e)
+
+async def document_response(message: str, document_type: str, bypass_cache: bool, data: dict) -> tuple:
+    """Async counterpart of app.document_response"""
+    user_data = await run_in_threadpool(extract_request_data, message, document_type)
+    ai_response, generation = await document_text(message, document_type, user_data, bypass_cache, data)
+    if ai_response.startswith('❌'):
+        return {'error': ai_response, 'status': 'error'}, 400
+
+    body, status = await run_in_threadpool(render_document_response, ai_response, document_type, user_data)
+    if status == 200:
+        body.update(generation)
+    return body, status
+
+async def document_events(message: str, document_type: str, bypass_cache: bool, data: dict, outcome: list):
+    """Async counterpart of app.document_events; the final (body, status) is appended to outcome"""
+    user_data = await run_in_threadpool(extract_request_data, message, document_type)
+
+    progressive = None
+    filled = await run_in_threadpool(template_document, message, document_type, user_data, data)
+    if filled:
+        text, generation = filled
+        yield sse_event('done', {'response': text, 'status': 'success', **generation})
+    else:
+        progressive = progressive_pdf(document_type, user_data)
+        async for event, text in stream_ai_response(message, document_type, bypass_cache, user_data):
+            if event == 'delta':
+                yield sse_event('delta', {'text': text})
+                if progressive and progressive.feed(text):
+                    await run_in_threadpool(progressive.lay_out)
+            elif event == 'done':
+                generation = {'generation_path': 'llm'}
+                yield sse_event('done', {'response': text, 'status': 'success'})
+            else:
+                body = {'error': text, 'status': 'error'}
+                outcome.append((body, 400))
+                yield sse_event('error', body)
+                return
+
+    body, status = await run_in_threadpool(render_document_response, text, document_type, user_data, progressive)
+    if status == 200:
+        body.update(generation)
+    outcome.append((body, status))
+    yield sse_event('document' if status == 200 else 'error', body)
+
+def error_response(message: str, status_code: int, **extra) -> JSONResponse:
+    return JSONResponse({'error': message, 'status': 'error', **extra}, status_code=status_code)
+
+def busy_response(retry_after: int) -> JSONResponse:
+    response = error_response('Server is busy. Please try again shortly.', 429, retry_after=retry_after)
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def best_match(request: Request, offered: list) -> str:
+    """Minimal Accept negotiation: the first offered type with the highest q-value (first wins ties)"""
+    quality = {}
+    for part in request.headers.get('accept', '').split(','):
+        media, _, params = part.strip().partition(';')
+        match = re.search(r'q=([0-9.]+)', params)
+        quality[media.strip().lower()] = float(match.group(1)) if match else 1.0
+
+    def q(mimetype):
+        return quality.get(mimetype, quality.get(mimetype.split('/')[0] + '/*', quality.get('*/*', 0.0)))
+
+    best = max(offered, key=q)
+    return best if q(best) > 0 else offered[0]
+
+def wants_event_stream(request: Request, data: dict) -> bool:
+    if data.get('stream') is True:
+        return True
+    return best_match(request, ['application/json', 'text/event-stream']) == 'text/event-stream'
+
+def cache_bypass_requested(request: Request) -> bool:
+    return request.headers.get('x-cache-bypass', '').lower() in ('1', 'true', 'yes')
+
+def event_stream_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def document_reply(request: Request, body: dict, status: int, data: dict, replayed: bool = False) -> Response:
+    """Async-side counterpart of app.document_reply"""
+    stored = None
+    if status == 200 and best_match(request, ['application/json', 'application/pdf']) == 'application/pdf':
+        stored = pdf_store.get(body['pdf_id'])
+    if stored:
+        response = stored_pdf_response(request, stored)
+        response.headers['X-Generation-Path'] = body['generation_path']
+    elif status != 202 and wants_event_stream(request, data):
+        response = event_stream_response(replayed_events(body, status))
+    else:
+        response = JSONResponse(body, status_code=status)
+        if status == 202:
+            response.headers['Location'] = body['status_url']
+
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+async def read_json(request: Request):
+    """Parsed JSON body, or an error response for the caller to return"""
+    if not request.headers.get('content-type', '').startswith('application/json'):
+        return None, error_response('Content-Type must be application/json', 400)
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not data or not isinstance(data, dict):
+        return None, error_response('Invalid JSON data', 400)
+    return data, None
+
+async def chat(request: Request):
+    try:
+        data, error = await read_json(request)
+        if error:
+            return error
+        current_client.set(request_client(request.headers, request.client.host if request.client else ''))
+
+        message = str(data.get('message', '')).strip()
+        document_type = data.get('document_type', 'general')
+        if not message:
+            return error_response('Message is required', 400)
+
+        bypass_cache = cache_bypass_requested(request)
+
+        if wants_event_stream(request, data):
+            async def events():
+                async for event, text in stream_ai_response(message, document_type, bypass_cache):
+                    if event == 'delta':
+                        yield sse_event('delta', {'text': text})
+                    elif event == 'done':
+                        yield sse_event('done', {
+                            'response': text,
+                            'document_type': document_type,
+                            'timestamp': datetime.now().isoformat(),
+                            'status': 'success'
+                        })
+                    else:
+                        yield sse_event('error', {'error': text, 'status': 'error'})
+
+            return event_stream_response(events())
+
+        ai_response = await generate_ai_response(message, document_type, bypass_cache)
+
+        return JSONResponse({
+            'response': ai_response,
+            'document_type': document_type,
+            'timestamp': datetime.now().isoformat(),
+            'status': 'success'
+        })
+
+    except AdmissionRejected as e:
+        return busy_response(e.retry_after)
+    except Exception as e:
+        logger.error(f"Chat error: {e}")
+        return error_response(f'Server error: {str(e)}', 500)
+
+async def generate_document(request: Request):
+    try:
+        data, error = await read_json(request)
+        if error:
+            return error
+        current_client.set(request_client(request.headers, request.client.host if request.client else ''))
+
+        message = str(data.get('message', '')).strip()
+        document_type = data.get('document_type', 'general')
+        if not message:
+            return error_response('Message is required', 400)
+        if len(message) < 3:
+            return error_response('Please provide some details', 400)
+
+        bypass_cache = cache_bypass_requested(request)
+
+        # PDFs are only rendered for document types, so reject general chat before any work
+        if document_type == 'general':
+            return error_response(DOCUMENT_TYPE_REQUIRED, 400)
+
+        idempotency_key = request.headers.get('idempotency-key', '').strip()
+        if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return error_response(f'Idempotency-Key must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters', 400)
+
+        fingerprint = request_fingerprint(data, bypass_cache)
+        if idempotency_key:
+            try:
+                replay = idempotency_store.get(idempotency_key, fingerprint)
+            except IdempotencyKeyReused as e:
+                return error_response(str(e), 422)
+            pipeline_metrics.cache_lookup('idempotency', replay is not None)
+            if replay:
+                logger.info(f"Replaying stored result for Idempotency-Key {idempotency_key!r}")
+                return document_reply(request, *replay, data, replayed=True)
+
+        def remember(body, status):
+            if idempotency_key and status in (200, 202):
+                idempotency_store.put(idempotency_key, fingerprint, body, status)
+
+        # Job mode runs the sync pipeline on the shared job threads, exactly as under WSGI
+        if data.get('async') is True or 'respond-async' in request.headers.get('prefer', ''):
+            try:
+                job = job_manager.submit(run_document_job, message, document_type, bypass_cache, data)
+            except JobQueueFull as e:
+                logger.warning(f"Rejecting document job: {e}")
+                return busy_response(e.retry_after)
+            body = {'job_id': job.id, 'status': job.status, 'status_url': f"/api/jobs/{job.id}"}
+            remember(body, 202)
+            return document_reply(request, body, 202, data)
+
+        if wants_event_stream(request, data):
+            async def events():
+                # A copy of this request already streaming hands over its result when it is done
+                flight, leader = document_flights.begin(fingerprint)
+                pipeline_metrics.cache_lookup('in_flight', not leader)
+                if not leader:
+                    try:
+                        body, status = await flight.wait()
+                    except FlightAbandoned:
+                        pass
+                    else:
+                        for event in replayed_events(body, status):
+                            yield event
+                        return
+
+                outcome = []
+                try:
+                    async for event in document_events(message, document_type, bypass_cache, data, outcome):
+                        yield event
+                finally:
+                    if leader:
+                        document_flights.end(fingerprint, flight, outcome[0] if outcome else None)
+                remember(*outcome[0])
+
+            return event_stream_response(events())
+
+        # Identical requests already in flight wait for that one's result instead of generating again
+        (body, status), shared = await document_flights.do(
+            fingerprint, document_response, message, document_type, bypass_cache, data)
+        pipeline_metrics.cache_lookup('in_flight', shared)
+        remember(body, status)
+        return document_reply(request, body, status, data)
+
+    except AdmissionRejected as e:
+        return busy_response(e.retry_after)
+    except Exception as e:
+        logger.error(f"Document generation error: {e}")
+        return error_response(f'Document generation failed: {str(e)}', 500)
+
+def byte_range(header: str, size: int):
+    """(start, end) for a single-range Range header, None to send it all, or False if unsatisfiable"""
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    if match.group(1) == '':
+        start, end = max(size - int(match.group(2)), 0), size - 1
+    else:
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+def stored_pdf_response(request: Request, stored) -> Response:
+    """Serve a stored PDF with a strong ETag, conditional GET and byte-range support"""
+    max_age = max(int(stored.expires_at - time.time()), 0)
+    headers = {
+        'ETag': f'"{stored.etag}"',
+        'Cache-Control': f"{'public' if PDF_CACHE_CONTROL == 'public' else 'private'}, max-age={max_age}",
+        'Accept-Ranges': 'bytes',
+    }
+
+    if_none_match = request.headers.get('if-none-match', '')
+    if headers['ETag'] in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+        return Response(status_code=304, headers=headers)
+
+    if stored.path:
+        return FileResponse(stored.path, media_type='application/pdf', filename=stored.filename, headers=headers)
+
+    headers['Content-Disposition'] = f'attachment; filename="{stored.filename}"'
+    requested = request.headers.get('range')
+    # A Range with a stale If-Range validator gets the whole (new) file
+    if requested and request.headers.get('if-range', headers['ETag']) == headers['ETag']:
+        span = byte_range(requested, stored.size)
+        if span is False:
+            return Response(status_code=416, headers={**headers, 'Content-Range': f"bytes */{stored.size}"})
+        if span:
+            start, end = span
+            headers['Content-Range'] = f"bytes {start}-{end}/{stored.size}"
+            return Response(stored.data[start:end + 1], status_code=206, media_type='application/pdf',
+                            headers=headers)
+
+    return Response(stored.data, media_type='application/pdf', headers=headers)
+
+async def download_file(request: Request):
+    stored = pdf_store.get(request.path_params['pdf_id'])
+    if not stored:
+        return JSONResponse({'error': 'File not found'}, status_code=404)
+    logger.info(f"Serving PDF: {stored.filename}, size: {stored.size} bytes")
+    started = time.perf_counter()
+    response = stored_pdf_response(request, stored)
+    pipeline_metrics.observe_stage('download', stored_document_type(stored), 'any', time.perf_counter() - started)
+    return response
+
+async def health(request: Request):
+    return JSONResponse({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await nim_client.aclose()
+    wsgi.file_janitor.stop()
+    wsgi.render_pool.shutdown()
+    wsgi.generation_profiles.save()
+
+app = Starlette(
+    routes=[
+        Route('/api/chat', chat, methods=['POST']),
+        Route('/api/generate-document', generate_document, methods=['POST']),
+        Route('/api/download/{pdf_id}', download_file),
+        Route('/health', health),
+        Mount('/', app=WSGIMiddleware(wsgi.app)),
+    ],
+    lifespan=lifespan
+)
@@ -0,0 +1,125 @@
+"""Non-blocking NIM client for the ASGI app, with the same retry and circuit-breaker behaviour as NIMClient"""
+
+import asyncio
+import logging
+
+import aiohttp
+import requests
+
+from nim_client import NIMClient, CircuitBreaker, UpstreamError, RETRYABLE_STATUS, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+class AsyncNIMClient:
+    """aiohttp-based counterpart of NIMClient for use on an event loop.
+
+    Waiting on the upstream costs a coroutine rather than a thread, so one
+    process can hold up to ``pool_size`` calls in flight. Transport failures
+    are re-raised as the matching ``requests`` exceptions, so callers share
+    one error mapping with the sync client.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 256, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_cap: float = 8.0, max_retry_after: float = 10.0,
+                 breaker: CircuitBreaker = None, admission=None):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.breaker = breaker or CircuitBreaker()
+        self.admission = admission
+
+        self._session = None
+        self._loop = None
+
+    backoff_delay = NIMClient.backoff_delay
+
+    def session(self) -> aiohttp.ClientSession:
+        """The keep-alive session, created on (and bound to) the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+            self._loop = loop
+        return self._session
+
+    async def post(self, path: str, payload: dict, headers: dict, timeout: float = 30,
+                   stream: bool = False) -> aiohttp.ClientResponse:
+        """POST to the upstream, retrying transient failures.
+
+        Returns the successful (200) response; a non-streamed body has already
+        been read. The caller must ``release()`` a streamed response. Raises
+        UpstreamError, CircuitOpenError or a ``requests`` exception otherwise.
+        """
+        url = f"{self.base_url}{path}"
+        # Streams may legitimately run long; bound the gaps between chunks instead of the total
+        limit = aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout) if stream \
+            else aiohttp.ClientTimeout(total=timeout)
+        attempt = 0
+
+        while True:
+            probe = self.breaker.before_request()
+
+            try:
+                response = await self.session().post(url, headers=headers, json=payload, timeout=limit)
+                if response.status != 200:
+                    body = await response.text()
+                elif not stream:
+                    await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise requests.exceptions.Timeout(str(e)) from e
+                    raise requests.exceptions.ConnectionError(str(e)) from e
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"NIM request error ({e.__class__.__name__}), retrying in {delay:.2f}s")
+            except BaseException:
+                # Cancelled (a client went away, or a hedge lost): not the upstream's failure, but the
+                # half-open probe must be released or the breaker would fail fast for good
+                if probe:
+                    self.breaker.abandon_probe()
+                raise
+            else:
+                if response.status == 200:
+                    self.breaker.record_success()
+                    if self.admission:
+                        self.admission.record_success()
+                    return response
+
+                error = UpstreamError(
+                    response.status,
+                    body,
+                    parse_retry_after(response.headers.get('Retry-After'))
+                )
+                response.release()
+
+                # Rate limiting shrinks the admission budget for every caller in this process
+                if response.status == 429 and self.admission:
+                    self.admission.record_throttle(error.retry_after)
+
+                # Only server-side failures count against the breaker; 4xx are our problem
+                if response.status >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+
+                if response.status not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    raise error
+                if error.retry_after is not None and error.retry_after > self.max_retry_after:
+                    raise error
+
+                delay = self.backoff_delay(attempt, error.retry_after)
+                logger.warning(f"NIM returned {response.status}, retrying in {delay:.2f}s")
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def chat_completions(self, payload: dict, headers: dict, timeout: float = 30,
+                               stream: bool = False) -> aiohttp.ClientResponse:
+        return await self.post('/chat/completions', payload, headers, timeout=timeout, stream=stream)
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.close()
@@ -0,0 +1,70 @@
+"""Bounded fan-out for batch document generation, and an incremental ZIP writer for streaming it"""
+
+import io
+import itertools
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+def run_bounded(fn, items, concurrency: int = 4):
+    """Call ``fn(item)`` on up to ``concurrency`` threads, yielding ``(index, result, error)`` as each finishes.
+
+    At most ``concurrency`` items are in flight at once, and each result is
+    handed over before the next item starts, so memory is bounded by the window
+    rather than the batch. Exceptions are returned per item, never raised.
+    """
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch')
+    queued = enumerate(items)
+    in_flight = {}
+
+    def fill():
+        for index, item in itertools.islice(queued, concurrency - len(in_flight)):
+            in_flight[executor.submit(fn, item)] = index
+
+    try:
+        fill()
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = in_flight.pop(future)
+                error = future.exception()
+                yield index, (None if error else future.result()), error
+            fill()
+    finally:
+        # A client that disconnects closes the generator; don't start the rest of the batch
+        executor.shutdown(wait=False, cancel_futures=True)
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable file object that collects whatever ZipFile writes until drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class ZipStream:
+    """Writes a ZIP archive one member at a time, returning the bytes to send after each step.
+
+    Members are stored uncompressed: ReportLab already compresses page streams.
+    """
+
+    def __init__(self):
+        self._sink = _ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, 'w', compression=zipfile.ZIP_STORED)
+
+    def add(self, name: str, data) -> bytes:
+        self._zip.writestr(name, data)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._zip.close()
+        return self._sink.drain()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Load test: sync (gunicorn) vs async (uvicorn asgi:app) against a stub upstream
+
+Starts the local NIM stub (nim_stub.py) answering after --latency
+seconds. It then runs the app twice as a subprocess pointed at the
+stub: once under gunicorn (one worker, --sync-threads threads) and once under
+uvicorn. Each run fires --requests document-type /api/chat calls,
+--concurrency at a time. Reports throughput, latency percentiles, errors
+and the server's peak RSS. Runs offline.
+
+    python benchmarks/bench_asgi_load.py --concurrency 200 --requests 1000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from nim_stub import Latency, NIMStub, serve_in_thread
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+def peak_rss_mb(pid: int) -> float:
+    """Peak resident set size of a process and its children, from /proc"""
+    total = 0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    except OSError:
+        pass
+    for each in pids:
+        try:
+            with open(f"/proc/{each}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('VmHWM'))
+        except (OSError, StopIteration):
+            pass
+    return total / 1024
+
+async def drive(base_url: str, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(base_url, connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as client:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    async with client.post('/api/chat', headers={'X-Cache-Bypass': '1'}, json={
+                        'message': f"Leave letter number {i} for my manager",
+                        'document_type': 'letter'
+                    }) as response:
+                        body = await response.json()
+                        if response.status != 200 or body['response'].startswith('❌'):
+                            errors += 1
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'errors': errors,
+    }
+
+def run_server(command: list, env: dict, port: int, args) -> dict:
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(f"http://127.0.0.1:{port}/health")
+        asyncio.run(drive(f"http://127.0.0.1:{port}", min(args.concurrency, args.requests), args.concurrency))
+        result = asyncio.run(drive(f"http://127.0.0.1:{port}", args.requests, args.concurrency))
+        result['rss'] = peak_rss_mb(server.pid)
+        return result
+    finally:
+        server.terminate()
+        server.wait(10)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.5, help="stub upstream response time in seconds")
+    parser.add_argument('--sync-threads', type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    _, stub_url = serve_in_thread(NIMStub(Latency(f"fixed:{args.latency}"), token_rate=0))
+    env = {**os.environ, 'NVIDIA_API_KEY': 'bench', 'NVIDIA_BASE_URL': stub_url,
+           'NIM_POOL_SIZE': str(args.sync_threads), 'NIM_ASYNC_POOL_SIZE': str(args.concurrency),
+           'NIM_REQUESTS_PER_MINUTE': '0'}
+
+    modes = [
+        (f"sync gunicorn 1x{args.sync_threads} threads", lambda port: [
+            sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f"127.0.0.1:{port}",
+            '--workers', '1', '--threads', str(args.sync_threads), '--timeout', '300']),
+        ("async uvicorn 1 process", lambda port: [
+            sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+            '--log-level', 'warning', '--backlog', '4096']),
+    ]
+
+    print(f"Load test: {args.requests} requests, {args.concurrency} concurrent, "
+          f"stub upstream latency {args.latency * 1000:.0f} ms")
+    print("=" * 88)
+    for name, command in modes:
+        port = free_port()
+        result = run_server(command(port), env, port, args)
+        print(f"{name:<30} {result['rps']:8.1f} req/s   p50 {result['p50']:8.0f} ms   "
+              f"p99 {result['p99']:8.0f} ms   errors {result['errors']:4d}   peak RSS {result['rss']:6.1f} MB")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: validate_indian_content, chained checks vs compiled rule sets
+
+Runs the previous hand-written rule chain (legacy_validate in
+test_content_rules.py) and the compiled per-(document type, language)
+rule sets over English and Hindi applications and affidavits of about
+2 KB and 20 KB. Runs offline.
+
+    python benchmarks/bench_content_rules.py --iterations 200
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import IndianDocumentAgent
+from test_content_rules import legacy_validate
+
+ENGLISH_APPLICATION = """To,
+The Principal,
+Government Senior Secondary School, New Delhi 110001
+
+Subject: Application for leave of absence
+
+Dear Sir/Madam,
+
+I, Rahul Sharma s/o Ramesh Sharma, a student of class 10-B, resident of 45 Gandhi Nagar, New Delhi 110031, request leave for three days due to a family function.
+
+I request you to kindly grant me leave from 12th to 14th March.
+
+Thanking you,
+Rahul Sharma
+"""
+
+HINDI_APPLICATION = """सेवा में,
+श्रीमान प्रधानाचार्य जी,
+राजकीय वरिष्ठ माध्यमिक विद्यालय, नई दिल्ली 110001
+
+विषय: अवकाश हेतु आवेदन पत्र
+
+महोदय,
+
+सविनय निवेदन है कि मैं राहुल शर्मा, कक्षा 10-ब का छात्र हूँ। पारिवारिक कार्यक्रम के कारण मैं तीन दिन विद्यालय नहीं आ सकूँगा।
+
+अतः आपसे विनम्र निवेदन है कि मुझे तीन दिन का अवकाश प्रदान करें। मैं आपका आभारी रहूंगा
+"""
+
+ENGLISH_AFFIDAVIT = """AFFIDAVIT
+
+I, Priya Verma d/o Suresh Verma, aged 28 years, resident of 12 MG Road, Bengaluru 560001, do hereby solemnly affirm and declare as under:
+
+1. That I am a citizen of India and the deponent herein.
+2. That my correct date of birth is 01/01/1996.
+"""
+
+def median_us(fn, iterations):
+    fn()  # warm-up
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e6
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    agent = IndianDocumentAgent()
+    cases = [
+        ("application en", ENGLISH_APPLICATION, 'application'),
+        ("application hi", HINDI_APPLICATION, 'application'),
+        ("affidavit en", ENGLISH_AFFIDAVIT, 'affidavit'),
+    ]
+
+    print(f"Content rules benchmark (median of {args.iterations} runs)")
+    print("=" * 78)
+    for name, unit, doc_type in cases:
+        for repeat in (1, 10):
+            text = unit * repeat
+            assert agent.validate_indian_content(text, doc_type) == legacy_validate(text, doc_type)
+            before = median_us(lambda: legacy_validate(text, doc_type), args.iterations)
+            after = median_us(lambda: agent.validate_indian_content(text, doc_type), args.iterations)
+            print(f"{name:<16} {len(text.encode('utf-8')) / 1024:5.1f} KB   before {before:8.1f} us   "
+                  f"after {after:8.1f} us   ({before / after:4.1f}x)")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: entity extraction time on pathological inputs as they grow to 100 KB
+
+Each input is built to defeat a backtracking extractor: long unbroken words,
+keywords repeated with no value after them ("resident of", "from 12",
+"post of", "मेरा नाम"), runs of capitalized words, digits, '@'s and
+PAN-shaped words, plus an address keyword with its PIN code just out of
+reach. Times extract_user_data at each --sizes step and reports the growth
+from the smallest size to the largest next to the growth in length. The exit
+status is 1 when any input grows more than --max-superlinear times faster
+than its length. Runs offline.
+
+    python benchmarks/bench_extractor.py --sizes 10,50,100
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import extract_user_data
+
+REQUEST = ("My name is Rahul Sharma, son of Ramesh Sharma, residing at 45 Gandhi Nagar, New Delhi 110031. "
+           "My mobile is 9876543210 and email rahul.sharma@example.com. I need a letter due to my transfer "
+           "from 12th March to 14th March, working as a software engineer at Infosys Technologies.\n")
+
+# Repeating units; each is tiled up to the target size
+PATHOLOGICAL = {
+    'long_word': 'a',
+    'resident_of': 'resident of ',
+    'resident_of_far_pin': 'resident of ' + 'x' * 190 + ' ',
+    'from_date': 'from 12 ',
+    'post_of': 'post of ',
+    'due_to': 'due to ',
+    'i_am': 'I am Ram ',
+    'capitalized_words': 'Ram ',
+    'digit_groups': '1234 ',
+    'at_signs': '@',
+    'at_words': 'a@b ',
+    'pan_words': 'ABCDE ',
+    'institution_suffixes': 'Bank ',
+    'hindi_name_keyword': 'मेरा नाम ',
+    'devanagari_digits': '१२३४ ',
+    'realistic_request': REQUEST,
+}
+
+def tiled(unit: str, size_kb: int) -> str:
+    return unit * max(1, size_kb * 1024 // len(unit))
+
+def best_ms(text: str, runs: int) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        extract_user_data(text)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10,50,100', help='comma-separated input sizes in KB')
+    parser.add_argument('--runs', type=int, default=3, help='best of this many runs per size')
+    parser.add_argument('--max-superlinear', type=float, default=2.0,
+                        help='allowed ratio of time growth to length growth')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(f"Entity extraction on pathological inputs (best of {args.runs})")
+    print(f"{'input':<22}" + ''.join(f"{f'{size} KB':>12}" for size in sizes) + f"{'growth':>10}{'µs/KB':>10}")
+    print("=" * (42 + 12 * len(sizes)))
+
+    failures = []
+    for name, unit in PATHOLOGICAL.items():
+        texts = [tiled(unit, size) for size in sizes]
+        times = [best_ms(text, args.runs) for text in texts]
+        length_growth = len(texts[-1]) / len(texts[0])
+        time_growth = times[-1] / max(times[0], 1e-3)
+        print(f"{name:<22}" + ''.join(f"{ms:>9.2f} ms" for ms in times)
+              + f"{time_growth:>9.1f}x{times[-1] * 1000 / sizes[-1]:>10.0f}")
+        if time_growth > length_growth * args.max_superlinear:
+            failures.append(f"{name}: {time_growth:.1f}x slower for {length_growth:.1f}x the length")
+
+    if failures:
+        print("\nSuperlinear growth:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nAll inputs grew at most {args.max_superlinear:g}x faster than their length")
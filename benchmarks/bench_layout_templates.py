@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-document render time with precompiled layout templates
+
+Compares the previous per-call style construction (reproduced below as
+legacy_render) with LayoutTemplate.render for a short document and a long
+one of roughly 4000 tokens. Runs offline.
+
+    python benchmarks/bench_layout_templates.py --iterations 100
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+from pdf_layouts import LayoutTemplate
+
+SHORT = """AFFIDAVIT
+I, JOHN DOE, son of ROBERT DOE, aged 30 years, resident of 123 Main Street, New Delhi - 110001, do hereby solemnly affirm and declare as under:
+1. That I am the deponent herein and I am competent to swear to this affidavit.
+2. That I require this affidavit for address proof purposes.
+DEPONENT
+VERIFICATION
+I, the above named deponent, do hereby verify that the contents of this affidavit are true and correct.
+Yours faithfully,
+DEPONENT"""
+
+CLAUSE = ("That the parties agree that the service provider shall deliver the services described in the "
+          "schedule with due care and diligence, in accordance with the applicable laws of India, and shall "
+          "indemnify the client against any loss arising from negligence or wilful misconduct.")
+
+# ~4000 tokens: about 16 KB of contract text across many numbered clauses
+LONG = "SERVICE AGREEMENT\n" + "\n".join(
+    f"{(i % 9) + 1}. {CLAUSE}" if i % 3 else f"WHEREAS {CLAUSE}" for i in range(70)
+) + "\nIN WITNESS WHEREOF, parties execute this agreement.\nYours sincerely,"
+
+def legacy_render(clean_text: str, title: str) -> bytes:
+    """generate_pdf's layout code as it was before the template registry"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=60, leftMargin=60, topMargin=60, bottomMargin=60)
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('Title', parent=styles['Title'], fontSize=18, spaceAfter=24,
+                                 alignment=TA_CENTER, fontName='Helvetica-Bold')
+    heading_style = ParagraphStyle('Heading', parent=styles['Heading2'], fontSize=13, spaceAfter=12,
+                                   spaceBefore=16, fontName='Helvetica-Bold')
+    normal_style = ParagraphStyle('Normal', parent=styles['Normal'], fontSize=11, spaceAfter=12,
+                                  leading=16, fontName='Helvetica')
+    signature_style = ParagraphStyle('Signature', parent=styles['Normal'], fontSize=10, spaceAfter=8,
+                                     alignment=TA_RIGHT, fontName='Helvetica')
+
+    elements = [Paragraph(title.upper(), title_style), Spacer(1, 20)]
+    current_date = datetime.now().strftime("%B %d, %Y")
+    elements.append(Paragraph(f"<b>Date:</b> {current_date}", normal_style))
+    elements.append(Spacer(1, 16))
+
+    for para in clean_text.split('\n'):
+        para = para.strip()
+        if not para:
+            elements.append(Spacer(1, 6))
+            continue
+        is_heading = (
+            para.isupper() and len(para) < 60 or
+            para.startswith(('1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.')) or
+            para.startswith(('To,', 'Subject:', 'DEPONENT', 'VERIFICATION', 'WHEREAS'))
+        )
+        if is_heading:
+            elements.append(Paragraph(para, heading_style))
+        else:
+            elements.append(Paragraph(para, normal_style))
+            if any(phrase in para.lower() for phrase in ['sincerely', 'faithfully', 'regards']):
+                elements.append(Spacer(1, 16))
+
+    elements.append(Spacer(1, 30))
+    elements.append(Paragraph("_" * 35, signature_style))
+    elements.append(Paragraph("Signature & Date", signature_style))
+    doc.build(elements)
+    return buffer.getvalue()
+
+def timed(fn, iterations):
+    fn()  # warm-up
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=100)
+    args = parser.parse_args()
+
+    layout = LayoutTemplate('affidavit')
+    title = "Affidavit Document"
+
+    print(f"Layout template benchmark (median of {args.iterations} renders)")
+    print("=" * 60)
+    for name, text in (("short", SHORT), ("long", LONG)):
+        before = timed(lambda: legacy_render(text, title), args.iterations)
+        after = timed(lambda: layout.render(text, title), args.iterations)
+        print(f"{name:<6} {len(text):>6} chars   before {before:7.2f} ms   after {after:7.2f} ms   "
+              f"({(before - after) / before * 100:+.1f}% faster)")
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Load test: a chat/document/download mix at a target rate, per worker configuration
+
+Starts the local NIM stub (nim_stub.py) with the given latency distribution,
+token rate and error injection. For each --configs entry it runs the app as a
+subprocess pointed at the stub:
+
+    sync:WxT    gunicorn app:app with W workers of T threads
+    asgi:N      uvicorn asgi:app with N worker processes
+
+It then replays requests open-loop at --rps for --duration seconds. The mix
+covers /api/chat, /api/generate-document and downloads of PDFs generated
+earlier in the run. Reports achieved throughput, p50/p90/p99 latency, error
+rate and status codes per request kind, and the upstream statuses the stub
+served. Upstream admission is off unless --rpm sets a per-worker budget;
+with one, 429s from the app show requests turned away before reaching the
+stub. Runs offline.
+
+    python benchmarks/bench_load.py --rps 20 --duration 30 --configs sync:1x8,sync:4x4,asgi:1
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from bench_asgi_load import ROOT, free_port, peak_rss_mb, wait_for
+from nim_stub import Latency, NIMStub, parse_error_rates, serve_in_thread
+
+KINDS = ('chat', 'document', 'download')
+
+DOCUMENT_REQUESTS = (
+    ('affidavit', "Affidavit for name change. My name is Rahul Sharma, son of Ramesh Sharma, resident of "
+                  "45 Gandhi Nagar, New Delhi 110031"),
+    ('letter', "Letter to my bank manager to update my mobile number 9876543210. I am Priya Verma"),
+    ('contract', "Rent agreement between Ramesh Sharma and Rahul Sharma for a flat in Gandhi Nagar at "
+                 "Rs. 15,000 a month"),
+    ('certificate', "Experience certificate for Rahul Sharma, software engineer from 2019 to 2024"),
+    ('application', "Application to the principal for three days leave due to my sister's wedding. "
+                    "My name is Aarav Gupta"),
+    ('application', "हिंदी में आवेदन पत्र: मेरा नाम राहुल शर्मा है, मुझे तीन दिन का अवकाश चाहिए"),
+)
+
+CHAT_MESSAGES = (
+    "What stamp paper value is needed for a rent agreement in Delhi?",
+    "How do I get an affidavit notarised?",
+    "Which documents do I need for a domicile certificate?",
+)
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(','):
+        kind, _, weight = part.partition('=')
+        if kind not in KINDS:
+            raise ValueError(f"Unknown request kind {kind!r}; use {', '.join(KINDS)}")
+        mix[kind] = float(weight)
+    return mix
+
+def server_command(config: str, port: int) -> list:
+    mode, _, shape = config.partition(':')
+    if mode == 'sync':
+        workers, _, threads = shape.partition('x')
+        return [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f"127.0.0.1:{port}",
+                '--workers', workers, '--threads', threads or '1', '--timeout', '300']
+    if mode == 'asgi':
+        return [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+                '--workers', shape or '1', '--log-level', 'warning', '--backlog', '4096']
+    raise ValueError(f"Unknown configuration {config!r}; use sync:WxT or asgi:N")
+
+def schedule(args) -> list:
+    """(start offset in seconds, kind, index) for every request of the run"""
+    rng = random.Random(args.seed)
+    kinds, weights = zip(*args.mix.items())
+    total = int(args.rps * args.duration)
+    offset, plan = 0.0, []
+    for index in range(total):
+        plan.append((offset, rng.choices(kinds, weights)[0], index))
+        offset += rng.expovariate(args.rps) if args.arrivals == 'poisson' else 1 / args.rps
+    return plan
+
+async def replay(base_url: str, plan: list, timeout: float) -> tuple:
+    """Fire the plan open-loop; returns ({kind: [(latency, ok, status)]}, elapsed seconds)"""
+    results = {kind: [] for kind in KINDS}
+    downloads = []
+    connector = aiohttp.TCPConnector(limit=0)
+
+    async with aiohttp.ClientSession(base_url, connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as client:
+        async def one(kind, index):
+            if kind == 'download' and not downloads:
+                kind = 'document'  # nothing generated yet to download
+            started = time.perf_counter()
+            status, ok = 0, False
+            try:
+                if kind == 'chat':
+                    async with client.post('/api/chat', json={
+                        'message': f"{CHAT_MESSAGES[index % len(CHAT_MESSAGES)]} ({index})",
+                        'document_type': 'general'
+                    }) as response:
+                        status, body = response.status, await response.json()
+                        ok = status == 200 and not body.get('response', '').startswith('❌')
+                elif kind == 'document':
+                    document_type, message = DOCUMENT_REQUESTS[index % len(DOCUMENT_REQUESTS)]
+                    async with client.post('/api/generate-document', json={
+                        'message': f"{message} (request {index})", 'document_type': document_type
+                    }) as response:
+                        status, body = response.status, await response.json()
+                        ok = status == 200 and 'download_url' in body
+                        if ok:
+                            downloads.append(body['download_url'])
+                else:
+                    async with client.get(downloads[index % len(downloads)]) as response:
+                        status = response.status
+                        await response.read()
+                        ok = status == 200
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                pass
+            results[kind].append((time.perf_counter() - started, ok, status))
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        tasks = []
+        for offset, kind, index in plan:
+            delay = started + offset - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(kind, index)))
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+
+    return results, elapsed
+
+def percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)] * 1000 if ordered else 0.0
+
+def report(name: str, results: dict, elapsed: float, rss: float):
+    done = sum(len(samples) for samples in results.values())
+    ok = sum(1 for samples in results.values() for _, success, _ in samples if success)
+    print(f"{name}: {ok / elapsed:.1f} successful req/s of {done / elapsed:.1f} completed, "
+          f"{(done - ok) / max(done, 1):.1%} errors, peak RSS {rss:.0f} MB")
+    for kind, samples in results.items():
+        if not samples:
+            continue
+        latencies = sorted(latency for latency, _, _ in samples)
+        statuses = {}
+        for _, _, status in samples:
+            statuses[status] = statuses.get(status, 0) + 1
+        errors = sum(1 for _, success, _ in samples if not success)
+        codes = ' '.join(f"{status or 'conn'}:{count}" for status, count in sorted(statuses.items()))
+        print(f"  {kind:<9} {len(samples):5d} req   p50 {percentile(latencies, 0.5):7.0f} ms   "
+              f"p90 {percentile(latencies, 0.9):7.0f} ms   p99 {percentile(latencies, 0.99):7.0f} ms   "
+              f"errors {errors / len(samples):6.1%}   [{codes}]")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rps', type=float, default=10.0, help='target request rate')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds of traffic per configuration')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('chat=0.3,document=0.5,download=0.2'))
+    parser.add_argument('--arrivals', choices=('poisson', 'uniform'), default='poisson')
+    parser.add_argument('--configs', default='sync:1x8,sync:2x4,asgi:1',
+                        help='comma-separated worker configurations: sync:WxT or asgi:N')
+    parser.add_argument('--latency', type=Latency, default=Latency('lognormal:0.5,0.4'),
+                        help='stub time to first token, e.g. fixed:0.3 or lognormal:0.5,0.4')
+    parser.add_argument('--token-rate', type=float, default=200.0, help='stub tokens per second')
+    parser.add_argument('--errors', type=parse_error_rates, default={},
+                        help='stub error injection, e.g. 429=0.02,503=0.01')
+    parser.add_argument('--rpm', type=float, default=0,
+                        help='upstream admission budget per worker in requests per minute (0 = no limit)')
+    parser.add_argument('--timeout', type=float, default=120.0, help='client timeout per request')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    stub = NIMStub(args.latency, args.token_rate, args.errors)
+    _, stub_url = serve_in_thread(stub)
+    plan = schedule(args)
+
+    print(f"Load test: {len(plan)} requests at {args.rps:g}/s ({args.arrivals}), mix "
+          f"{', '.join(f'{kind}={weight:g}' for kind, weight in args.mix.items())}; stub latency "
+          f"{args.latency.spec}, {args.token_rate:g} tokens/s, errors {args.errors or 'none'}")
+    print("=" * 100)
+    for config in args.configs.split(','):
+        port = free_port()
+        shape = config.partition(':')[2]
+        threads = shape.partition('x')[2] or '8'
+        env = {**os.environ, 'NVIDIA_API_KEY': 'bench', 'NVIDIA_BASE_URL': stub_url, 'NIM_POOL_SIZE': threads,
+               'GENERATION_PROFILE_PATH': '', 'NIM_REQUESTS_PER_MINUTE': str(args.rpm)}
+        before = stub.stats()['statuses']
+        server = subprocess.Popen(server_command(config, port), cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(f"http://127.0.0.1:{port}/health")
+            results, elapsed = asyncio.run(replay(f"http://127.0.0.1:{port}", plan, args.timeout))
+            rss = peak_rss_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait(10)
+
+        report(config, results, elapsed, rss)
+        after = stub.stats()['statuses']
+        upstream = {status: count - before.get(status, 0) for status, count in after.items()}
+        print(f"  upstream  {' '.join(f'{status}:{count}' for status, count in upstream.items() if count)}")
+        print()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of the pipeline metrics per request
+
+Times one stage observation (the context manager plus a histogram
+observe) in single-process mode and in gunicorn's multi-process mode,
+where samples go to memory-mapped files, then the same for the eight
+observations and counter increments a document request makes. Also
+times rendering /metrics. Runs offline.
+
+    python benchmarks/bench_metrics.py --iterations 20000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a fresh interpreter per mode: prometheus_client picks its value store at import
+RUN = """
+import sys, time
+sys.path.insert(0, {repo!r})
+from prometheus_client import CollectorRegistry
+from metrics import PipelineMetrics
+
+metrics = PipelineMetrics(['affidavit'], registry=CollectorRegistry())
+iterations = {iterations}
+
+def per_call_us(fn):
+    fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def stage():
+    with metrics.stage('validate', 'affidavit', 'en'):
+        pass
+
+def document_request():
+    for name in ('extract', 'prompt', 'validate', 'clean', 'pdf_build'):
+        with metrics.stage(name, 'affidavit', 'en'):
+            pass
+    metrics.observe_upstream('total', 'affidavit', 'en', 1.5)
+    metrics.upstream_response(200)
+    metrics.cache_lookup('response', False)
+    metrics.cache_lookup('pdf', False)
+    metrics.pdf_rendered('affidavit', 4000)
+
+print(per_call_us(stage), per_call_us(document_request))
+started = time.perf_counter()
+for _ in range(100):
+    metrics.render()
+print((time.perf_counter() - started) / 100 * 1e3)
+"""
+
+def run(iterations, multiproc_dir=None):
+    env = dict(os.environ)
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    if multiproc_dir:
+        env['PROMETHEUS_MULTIPROC_DIR'] = multiproc_dir
+    output = subprocess.run([sys.executable, '-c', RUN.format(repo=REPO, iterations=iterations)],
+                            env=env, check=True, capture_output=True, text=True).stdout.split('\n')
+    stage_us, request_us = (float(value) for value in output[0].split())
+    return stage_us, request_us, float(output[1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"Metrics overhead benchmark ({args.iterations} iterations)")
+    print("=" * 78)
+    with tempfile.TemporaryDirectory() as multiproc_dir:
+        for name, directory in (("single process", None), ("multi-process", multiproc_dir)):
+            stage_us, request_us, render_ms = run(args.iterations, directory)
+            print(f"{name:<15} stage {stage_us:6.2f} us   per document request {request_us:6.2f} us   "
+                  f"/metrics render {render_ms:6.2f} ms")
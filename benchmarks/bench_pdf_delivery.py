@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: in-memory PDF delivery vs the legacy /tmp write -> stat -> re-read path
+
+Runs offline (no API key needed). Each iteration renders one document and
+downloads it through the Flask test client, the way the browser does.
+
+    python benchmarks/bench_pdf_delivery.py --iterations 200 --threads 4
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import statistics
+import sys
+import time
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import send_file
+
+from app import app, DocumentGenerator, DOCUMENT_TYPES, render_document_response
+
+SAMPLE = """AFFIDAVIT
+
+I, JOHN DOE, son of ROBERT DOE, aged 30 years, resident of 123 Main Street, New Delhi - 110001, do hereby solemnly affirm and declare as under:
+
+1. That I am the deponent herein and I am competent to swear to this affidavit.
+
+2. That I am a resident of the above mentioned address for the past 5 years.
+
+3. That I require this affidavit for address proof purposes.
+
+DEPONENT
+
+VERIFICATION
+
+I, the above named deponent, do hereby verify that the contents of this affidavit are true and correct.
+
+DEPONENT"""
+
+_serial = itertools.count()
+
+def legacy_download(filepath):
+    """The old /api/download/<path> handler body"""
+    if not (os.path.exists(filepath) and os.path.isfile(filepath) and os.access(filepath, os.R_OK)):
+        raise RuntimeError("File not found")
+    if os.path.getsize(filepath) == 0:
+        raise RuntimeError("File is empty")
+    return send_file(filepath, as_attachment=True, download_name=os.path.basename(filepath),
+                     mimetype='application/pdf')
+
+def legacy_round_trip(client):
+    """The pre-change flow: write to /tmp, stat it, then re-read it for download"""
+    pdf_path = DocumentGenerator.generate_pdf(f"{SAMPLE}\n\nRef: {next(_serial)}", DOCUMENT_TYPES['affidavit'], {})
+    if not pdf_path or not os.path.exists(pdf_path) or os.path.getsize(pdf_path) == 0:
+        raise RuntimeError("PDF file was not created")
+    os.path.getsize(pdf_path)
+
+    with app.test_request_context(f"/api/download/{quote(pdf_path, safe='')}"):
+        response = legacy_download(pdf_path)
+        response.direct_passthrough = False
+        response.get_data()
+    os.remove(pdf_path)
+    return response.status_code
+
+def in_memory_round_trip(client):
+    # Unique text per call, so content addressing doesn't turn this into a cache benchmark
+    body, status = render_document_response(f"{SAMPLE}\n\nRef: {next(_serial)}", 'affidavit', {})
+    if status != 200:
+        raise RuntimeError(body['error'])
+
+    response = client.get(body['download_url'])
+    response.get_data()
+    return response.status_code
+
+def run(name, fn, iterations, threads):
+    latencies = []
+
+    def one(_):
+        client = app.test_client()
+        started = time.perf_counter()
+        status = fn(client)
+        latencies.append(time.perf_counter() - started)
+        assert status == 200, status
+
+    fn(app.test_client())  # warm-up
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(iterations)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<12} {iterations / elapsed:>8.1f} req/s   "
+          f"p50 {statistics.median(latencies) * 1000:>7.2f} ms   p99 {p99 * 1000:>7.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=1)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    print(f"PDF delivery benchmark: {args.iterations} documents, {args.threads} thread(s)")
+    print("=" * 60)
+    run("legacy", legacy_round_trip, args.iterations, args.threads)
+    run("in-memory", in_memory_round_trip, args.iterations, args.threads)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Hindi vs English PDF render time and size with the font registry
+
+Renders an English and a Devanagari application, short and long, through
+LayoutTemplate and reports the median render time and the PDF size. It
+also times the per-request alternative, which parses and registers the
+TTF on every call. Uses the Devanagari family the registry finds
+(PDF_FONT_DIR, fonts/, system paths), or ReportLab's Vera as a stand-in
+when there is none. Runs offline.
+
+    python benchmarks/bench_pdf_fonts.py --iterations 50
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reportlab
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from pdf_fonts import FONT_REGISTRY, FontRegistry
+from pdf_layouts import LayoutTemplate
+
+ENGLISH = """To,
+The Principal,
+Government Senior Secondary School, New Delhi - 110001
+Subject: Application for leave of absence
+Respected Sir/Madam,
+I, Rahul Sharma, son of Ramesh Sharma, a student of class 10-B, request leave for three days due to a family function.
+I hereby declare that all the information provided above is true and correct to the best of my knowledge.
+I request you to kindly grant me leave from 12th to 14th March.
+Thanking you,
+Yours faithfully,
+Rahul Sharma"""
+
+HINDI = """सेवा में,
+श्रीमान प्रधानाचार्य जी,
+राजकीय वरिष्ठ माध्यमिक विद्यालय, नई दिल्ली - 110001
+विषय: अवकाश हेतु आवेदन पत्र
+आदरणीय महोदय,
+सविनय निवेदन है कि मैं राहुल शर्मा, कक्षा 10-ब का छात्र हूँ। पारिवारिक कार्यक्रम के कारण मैं तीन दिन विद्यालय नहीं आ सकूँगा।
+मैं घोषणा करता हूँ कि उपरोक्त सभी जानकारी सत्य एवं सही है।
+अतः आपसे विनम्र निवेदन है कि मुझे तीन दिन का अवकाश प्रदान करें। मैं आपका आभारी रहूंगा।
+धन्यवाद सहित,
+राहुल शर्मा"""
+
+def median_ms(fn, iterations):
+    fn()  # warm-up
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+def pick_registry():
+    if FONT_REGISTRY.has_devanagari:
+        return FONT_REGISTRY, FONT_REGISTRY.family_for('hi')[0]
+    stand_in = FontRegistry([os.path.join(os.path.dirname(reportlab.__file__), 'fonts')],
+                            families=(('Vera', 'Vera.ttf', 'VeraBd.ttf'),))
+    return stand_in, "Vera (stand-in, no Devanagari font found)"
+
+def per_request_render(layout, text, title, path):
+    """Parse and register the TTF on every call, as a naive fix would"""
+    pdfmetrics.registerFont(TTFont(layout.styles['hi'].normal_style.fontName, path))
+    return layout.render(text, title, 'hi')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    registry, family = pick_registry()
+    layout = LayoutTemplate('application', fonts=registry)
+    regular_font = pdfmetrics.getFont(layout.styles['hi'].normal_style.fontName)
+    title = "Application Form"
+
+    print(f"Font registry benchmark (median of {args.iterations} renders), Hindi family: {family}")
+    print("=" * 80)
+    for name, unit in (("English", ENGLISH), ("Hindi", HINDI)):
+        for size, repeat in (("short", 1), ("long", 20)):
+            text = "\n".join([unit] * repeat)
+            pdf_bytes = layout.render(text, title)
+            elapsed = median_ms(lambda: layout.render(text, title), args.iterations)
+            print(f"{name:<8} {size:<6} {len(text):>6} chars   render {elapsed:7.2f} ms   "
+                  f"PDF {len(pdf_bytes) / 1024:6.1f} KB")
+
+    font_path = regular_font.face.filename
+    naive = median_ms(lambda: per_request_render(layout, HINDI, title, font_path), args.iterations)
+    cached = median_ms(lambda: layout.render(HINDI, title, 'hi'), args.iterations)
+    print(f"Hindi short, TTF registered per request {naive:7.2f} ms   registry {cached:7.2f} ms   "
+          f"(font file {os.path.getsize(font_path) / 1024:.1f} KB)")
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the document pipeline's CPU stages against a committed baseline
+
+Times extract_user_data, validate_indian_content, clean_text_for_pdf and
+DocumentGenerator.generate_pdf over a generated corpus: every
+DOCUMENT_TYPES key, in English and Hindi, one paragraph, about a page and
+about a dozen pages long, plus adversarial inputs for the regexes (long
+unbroken words, repeated keywords with no terminator, runs of digits and
+unclosed tags). Reports ops/s, p50/p99 and peak traced memory per case.
+Runs offline, with no API key.
+
+Results are compared to benchmarks/baseline_pipeline.json. Times are
+scaled by a calibration loop run on both machines, so a baseline recorded
+elsewhere is still a fair reference. The exit status is 1 when any case's
+p50 or peak memory regressed by more than the allowed fraction.
+
+    python benchmarks/bench_pipeline.py                     # compare to the baseline
+    python benchmarks/bench_pipeline.py --filter extract    # only matching cases
+    python benchmarks/bench_pipeline.py --save-baseline     # record a new baseline
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import DOCUMENT_TYPES, DocumentGenerator, document_agent, extract_user_data, file_janitor
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_pipeline.json')
+
+# About one paragraph, one page and a dozen pages of A4
+SIZES = {'paragraph': 0, 'page': 3 * 1024, 'pages': 30 * 1024}
+ADVERSARIAL_BYTES = 8 * 1024
+
+REQUEST_EN = ("My name is Rahul Sharma, son of Ramesh Sharma, residing at 45 Gandhi Nagar, New Delhi 110031. "
+              "My mobile is 9876543210 and email rahul.sharma@example.com. I need a {what} due to my transfer "
+              "from 12th March to 14th March, working as a software engineer at Infosys Technologies.\n")
+REQUEST_HI = ("मेरा नाम राहुल शर्मा है, पुत्र श्री रमेश शर्मा, निवासी 45 गांधी नगर, नई दिल्ली 110031। "
+              "मेरा मोबाइल 9876543210 है। मुझे {what} हिंदी में चाहिए, क्योंकि मेरा स्थानांतरण हो गया है।\n")
+
+BODY_EN = {
+    'affidavit': ("AFFIDAVIT\n\nI, Rahul Sharma s/o Ramesh Sharma, aged 30 years, resident of 45 Gandhi Nagar, "
+                  "New Delhi 110031, do hereby solemnly affirm and declare as under:\n\n"
+                  "1. That I am a citizen of India and the deponent herein.\n"
+                  "2. That my correct date of birth is 01/01/1995.\n\nDEPONENT\n"),
+    'letter': ("To,\nThe Manager,\nState Bank of India, Connaught Place, New Delhi 110001\n\n"
+               "Subject: Change of registered mobile number\n\nDear Sir/Madam,\n\n"
+               "I hold savings account 1234567890 at your branch and request you to update my mobile number "
+               "to 9876543210 with effect from today.\n\nThanking you,\nYours faithfully,\nRahul Sharma\n"),
+    'contract': ("RENT AGREEMENT\n\nThis agreement is made at New Delhi between Ramesh Sharma (LESSOR) and "
+                 "Rahul Sharma (LESSEE).\n\nWHEREAS the lessor owns the premises at 45 Gandhi Nagar, New Delhi "
+                 "110031;\n\n1. That the monthly rent shall be Rs. 15,000 payable before the 5th of each month.\n"
+                 "2. That the security deposit of Rs. 30,000 shall be refunded on vacating the premises.\n"),
+    'certificate': ("CERTIFICATE\n\nThis is to certify that Mr. Rahul Sharma s/o Ramesh Sharma has worked with "
+                    "Infosys Technologies Ltd. as a Software Engineer from 01/06/2019 to 31/05/2024.\n\n"
+                    "During his tenure his conduct was found to be good.\n\nAuthorised Signatory\n"),
+    'application': ("To,\nThe Principal,\nGovernment Senior Secondary School, New Delhi 110001\n\n"
+                    "Subject: Application for leave\n\nDear Sir/Madam,\n\nI, Rahul Sharma d/o Ramesh Sharma, "
+                    "a student of class 10-B, request leave for three days due to a family function.\n\n"
+                    "I request you to kindly grant me leave.\n\nThanking you,\nRahul Sharma\n"),
+    'custom': ("MEETING MINUTES\n\nThe residents' welfare association of Gandhi Nagar met on 12/03/2025 at "
+               "New Delhi 110031.\n\n**Decisions**\n\n- Water tank cleaning every quarter\n"
+               "- Security charges revised to Rs. 500 per flat <b>from April</b> &amp; onwards\n"),
+}
+
+BODY_HI = {
+    'affidavit': ("शपथ पत्र\n\nमैं, राहुल शर्मा, पुत्र श्री रमेश शर्मा, आयु 30 वर्ष, निवासी 45 गांधी नगर, "
+                  "नई दिल्ली 110031, सत्यनिष्ठा से घोषणा करता हूं:\n\n1. कि मैं भारत का नागरिक हूं।\n"
+                  "2. कि मेरी सही जन्म तिथि 01/01/1995 है।\n\nशपथकर्ता\n"),
+    'letter': ("सेवा में,\nशाखा प्रबंधक,\nभारतीय स्टेट बैंक, नई दिल्ली 110001\n\nविषय: मोबाइल नंबर बदलने हेतु\n\n"
+               "महोदय,\n\nमेरा बचत खाता आपकी शाखा में है। कृपया मेरा मोबाइल नंबर 9876543210 दर्ज करें।\n\n"
+               "धन्यवाद सहित,\nराहुल शर्मा\n"),
+    'contract': ("किराया अनुबंध\n\nयह अनुबंध नई दिल्ली में रमेश शर्मा (मकान मालिक) और राहुल शर्मा (किरायेदार) "
+                 "के बीच किया गया है।\n\n1. कि मासिक किराया 15,000 रुपये होगा।\n"
+                 "2. कि 30,000 रुपये की जमानत राशि मकान खाली करने पर लौटाई जाएगी।\n"),
+    'certificate': ("प्रमाण पत्र\n\nप्रमाणित किया जाता है कि श्री राहुल शर्मा, पुत्र श्री रमेश शर्मा, ने इस संस्था में "
+                    "01/06/2019 से 31/05/2024 तक कार्य किया है।\n\nउनका आचरण अच्छा रहा।\n\nअधिकृत हस्ताक्षरकर्ता\n"),
+    'application': ("सेवा में,\nश्रीमान प्रधानाचार्य जी,\nराजकीय वरिष्ठ माध्यमिक विद्यालय, नई दिल्ली 110001\n\n"
+                    "विषय: अवकाश हेतु आवेदन पत्र\n\nमहोदय,\n\nसविनय निवेदन है कि मैं तीन दिन विद्यालय नहीं आ सकूँगा।\n\n"
+                    "अतः आपसे विनम्र निवेदन है कि मुझे अवकाश प्रदान करें। मैं आपका आभारी रहूंगा\n"),
+    'custom': ("बैठक का विवरण\n\nगांधी नगर निवासी कल्याण संघ की बैठक 12/03/2025 को हुई।\n\n**निर्णय**\n\n"
+               "- पानी की टंकी की सफाई हर तिमाही\n- सुरक्षा शुल्क 500 रुपये प्रति फ्लैट <b>अप्रैल से</b>\n"),
+}
+
+# Inputs that make backtracking regexes or per-character scans go quadratic
+ADVERSARIAL = {
+    'extract_user_data': {
+        'long_word': 'a' * ADVERSARIAL_BYTES,
+        'repeated_resident_of': 'resident of ' * (ADVERSARIAL_BYTES // 12),
+        'repeated_from_date': 'from 12 ' * (ADVERSARIAL_BYTES // 8),
+        'repeated_post_of': 'post of ' * (ADVERSARIAL_BYTES // 8),
+        'capitalized_words': 'Ram ' * (ADVERSARIAL_BYTES // 4),
+    },
+    'validate_indian_content': {
+        'digit_run': '1' * ADVERSARIAL_BYTES,
+        'repeated_s_o': 's/o ' * (ADVERSARIAL_BYTES // 4),
+    },
+    'clean_text_for_pdf': {
+        'unclosed_tags': '<' * ADVERSARIAL_BYTES,
+        'ampersands': '&' * ADVERSARIAL_BYTES,
+        'blank_lines': '\n \n' * (ADVERSARIAL_BYTES // 3),
+    },
+    'generate_pdf': {
+        'unbroken_line': 'A' * ADVERSARIAL_BYTES,
+        'one_word_lines': 'word\n' * (ADVERSARIAL_BYTES // 5),
+    },
+}
+
+def scaled(unit: str, size: str) -> str:
+    target = SIZES[size]
+    return unit * max(1, math.ceil(target / len(unit.encode('utf-8'))))
+
+def generate_pdf(text: str, document_type: str) -> int:
+    path = DocumentGenerator.generate_pdf(text, DOCUMENT_TYPES[document_type],
+                                          {'full_name': 'Rahul Sharma'}, document_type)
+    size = os.path.getsize(path)
+    file_janitor.remove(path)
+    return size
+
+def build_corpus() -> list:
+    """(case name, zero-argument callable) for every benchmarked case"""
+    cases = []
+    for document_type in DOCUMENT_TYPES:
+        for language, bodies, request in (('en', BODY_EN, REQUEST_EN), ('hi', BODY_HI, REQUEST_HI)):
+            for size in SIZES:
+                suffix = f"{document_type}/{language}/{size}"
+                message = scaled(request.format(what=DOCUMENT_TYPES[document_type].lower()), size)
+                text = scaled(bodies[document_type], size)
+                cases += [
+                    (f"extract_user_data/{suffix}", lambda m=message: extract_user_data(m)),
+                    (f"validate_indian_content/{suffix}",
+                     lambda t=text, d=document_type: document_agent.validate_indian_content(t, d)),
+                    (f"clean_text_for_pdf/{suffix}", lambda t=text: DocumentGenerator.clean_text_for_pdf(t)),
+                    (f"generate_pdf/{suffix}", lambda t=text, d=document_type: generate_pdf(t, d)),
+                ]
+
+    runners = {
+        'extract_user_data': extract_user_data,
+        'validate_indian_content': lambda text: document_agent.validate_indian_content(text, 'application'),
+        'clean_text_for_pdf': DocumentGenerator.clean_text_for_pdf,
+        'generate_pdf': lambda text: generate_pdf(text, 'custom'),
+    }
+    for function, inputs in ADVERSARIAL.items():
+        for name, text in inputs.items():
+            cases.append((f"{function}/adversarial/{name}", lambda f=runners[function], t=text: f(t)))
+    return cases
+
+def quantile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+def measure(fn, min_time: float, min_runs: int, max_runs: int) -> dict:
+    fn()  # warm-up
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_runs and (len(samples) < min_runs or time.perf_counter() - started < min_time):
+        call_started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - call_started)
+    total = sum(samples)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples.sort()
+    return {
+        'runs': len(samples),
+        'ops_per_sec': round(len(samples) / total, 1),
+        'p50_ms': round(quantile(samples, 0.5) * 1000, 4),
+        'p99_ms': round(quantile(samples, 0.99) * 1000, 4),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+def calibrate() -> float:
+    """Milliseconds for a fixed mix of regex, string and dict work; the best of five runs"""
+    text = "Rahul Sharma, 45 Gandhi Nagar, New Delhi 110031. " * 200
+    pattern = re.compile(r"([A-Z][a-z]+\s+[A-Z][a-z]+)|(\d{6})")
+    best = float('inf')
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(20):
+            counts = {}
+            for match in pattern.finditer(text):
+                counts[match.group()] = counts.get(match.group(), 0) + 1
+            ' '.join(text.split()).replace('Delhi', 'Dilli').lower()
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 3)
+
+def regressions(results: dict, baseline: dict, max_regression: float, max_memory_regression: float,
+                noise_floor_ms: float) -> list:
+    """Human-readable lines for every case slower or bigger than the baseline allows"""
+    scale = results['calibration_ms'] / baseline['calibration_ms']
+    found = []
+    for name, current in results['cases'].items():
+        before = baseline['cases'].get(name)
+        if before is None:
+            continue
+        allowed_ms = before['p50_ms'] * scale * (1 + max_regression)
+        if current['p50_ms'] > allowed_ms and current['p50_ms'] - before['p50_ms'] * scale > noise_floor_ms:
+            found.append(f"{name}: p50 {current['p50_ms']:.3f} ms vs baseline {before['p50_ms'] * scale:.3f} ms "
+                         f"(machine-scaled), allowed {allowed_ms:.3f} ms")
+        allowed_kb = before['peak_kb'] * (1 + max_memory_regression)
+        if current['peak_kb'] > allowed_kb and current['peak_kb'] - before['peak_kb'] > 64:
+            found.append(f"{name}: peak {current['peak_kb']:.0f} KB vs baseline {before['peak_kb']:.0f} KB")
+    return found
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filter', default='', help='only run cases whose name contains this')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds to spend timing each case')
+    parser.add_argument('--min-runs', type=int, default=5)
+    parser.add_argument('--max-runs', type=int, default=1000)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--max-regression', type=float, default=0.5,
+                        help='allowed fractional p50 increase over the baseline (default 0.5)')
+    parser.add_argument('--max-memory-regression', type=float, default=0.5,
+                        help='allowed fractional peak-memory increase over the baseline (default 0.5)')
+    parser.add_argument('--noise-floor-ms', type=float, default=0.05,
+                        help='p50 increases smaller than this are never regressions')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    results = {'version': 1, 'python': platform.python_version(), 'calibration_ms': calibrate(), 'cases': {}}
+    print("Pipeline benchmark")
+    print("=" * 100)
+    print(f"{'case':<56} {'ops/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'peak KB':>10}")
+    for name, fn in build_corpus():
+        if args.filter not in name:
+            continue
+        result = measure(fn, args.min_time, args.min_runs, args.max_runs)
+        results['cases'][name] = result
+        print(f"{name:<56} {result['ops_per_sec']:>10.1f} {result['p50_ms']:>10.3f} {result['p99_ms']:>10.3f} "
+              f"{result['peak_kb']:>10.1f}")
+
+    # Calibrated before and after, keeping the faster, so a burst of load at either end doesn't skew the scale
+    results['calibration_ms'] = min(results['calibration_ms'], calibrate())
+    print(f"\nCalibration loop: {results['calibration_ms']:.2f} ms")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+        sys.exit(0)
+
+    try:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        sys.exit(0)
+
+    found = regressions(results, baseline, args.max_regression, args.max_memory_regression, args.noise_floor_ms)
+    compared = sum(1 for name in results['cases'] if name in baseline['cases'])
+    if found:
+        print(f"\n{len(found)} regressions against {args.baseline}:")
+        for line in found:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions in {compared} cases compared with {args.baseline}")
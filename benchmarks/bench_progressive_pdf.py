@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time from the last streamed token to the finished PDF, progressive vs full render
+
+Streams canned documents (one to about a dozen pages) into ProgressivePdf
+a few characters at a time, then times what is left once the final text is
+known: validation, cleaning and finish(). The alternative renders the
+whole cleaned text from scratch, as a non-streamed request does. Also
+reports the layout time spent during the stream, which overlaps the LLM.
+Runs offline.
+
+    python benchmarks/bench_progressive_pdf.py --iterations 20
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import DOCUMENT_TYPES, LAYOUT_TEMPLATES, finalize_ai_response, progressive_pdf
+from nim_stub import CANNED_OUTPUTS
+from text_normalizer import normalize_for_pdf
+
+def deltas(text, size=6):
+    return [text[position:position + size] for position in range(0, len(text), size)]
+
+def progressive_run(text, document_type):
+    """(ms of layout during the stream, ms from the last token to the PDF)"""
+    progressive = progressive_pdf(document_type, {'language': 'en'})
+    streaming = 0.0
+    for delta in deltas(text):
+        if progressive.feed(delta):
+            started = time.perf_counter()
+            progressive.lay_out()
+            streaming += time.perf_counter() - started
+    started = time.perf_counter()
+    clean_text = normalize_for_pdf(finalize_ai_response(text, document_type))
+    pdf_bytes = progressive.finish(clean_text, DOCUMENT_TYPES[document_type])
+    after = time.perf_counter() - started
+    assert pdf_bytes, progressive.discarded
+    return streaming * 1000, after * 1000
+
+def full_run(text, document_type):
+    started = time.perf_counter()
+    clean_text = normalize_for_pdf(finalize_ai_response(text, document_type))
+    LAYOUT_TEMPLATES[document_type].render(clean_text, DOCUMENT_TYPES[document_type], 'en')
+    return (time.perf_counter() - started) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"Progressive PDF assembly (median of {args.iterations} runs)")
+    print("=" * 80)
+    for document_type in ('affidavit', 'contract', 'letter'):
+        unit = CANNED_OUTPUTS[(document_type, 'en')]
+        for size, repeat in (("short", 1), ("long", 12)):
+            text = "\n\n".join(unit.format(reference=f"BENCH-{index}") for index in range(repeat))
+            progressive_run(text, document_type)  # warm-up
+            runs = [progressive_run(text, document_type) for _ in range(args.iterations)]
+            full = statistics.median(full_run(text, document_type) for _ in range(args.iterations))
+            streaming = statistics.median(run[0] for run in runs)
+            after = statistics.median(run[1] for run in runs)
+            print(f"{document_type:<10} {size:<6} {len(text):>6} chars   after last token: "
+                  f"progressive {after:6.2f} ms, full render {full:6.2f} ms   (laid out while streaming {streaming:6.2f} ms)")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: upstream prompt size and assembly time, before and after precompiled prompt sets
+
+Before, an application prompt carried both the English and the Hindi
+format, plus a second checklist repeating the requirements, and every call
+built a new IndianDocumentAgent. legacy_payload reproduces that for
+applications. Other document types only gained the token budget. Token
+counts use prompts.estimate_tokens. Runs offline; the live effect on
+time-to-first-token shows up in the "First token ... for ~N prompt tokens"
+log lines.
+
+    python benchmarks/bench_prompt_assembly.py --iterations 2000
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import NVIDIA_MODEL, build_nim_payload
+from prompts import APPLICATION_FORMATS, prompt_tokens
+
+LEGACY_APPLICATION_SYSTEM = """You are an expert Indian government application specialist with deep knowledge of both English and Hindi official formats. You have 25+ years experience in Indian bureaucracy and understand regional preferences.
+
+CRITICAL REQUIREMENTS:
+✓ DETECT LANGUAGE: If user mentions Hindi/हिंदी or uses Hindi words, create Hindi application
+✓ Use exact Indian government format for both English and Hindi
+✓ Include all mandatory personal details in appropriate language
+✓ Use respectful government tone (आदरणीय for Hindi, Respected for English)
+✓ Add proper enclosure list in respective language
+✓ Include declaration clause for truthfulness
+✓ Use correct closing (धन्यवाद सहित for Hindi, Yours faithfully for English)
+
+ENGLISH FORMAT:
+""" + APPLICATION_FORMATS['en']['format'] + """
+
+HINDI FORMAT:
+""" + APPLICATION_FORMATS['hi']['format'] + """
+
+USE APPROPRIATE FORMAT BASED ON USER'S LANGUAGE PREFERENCE OR REQUEST."""
+
+LEGACY_APPLICATION_USER = """Create a PERFECT Indian government application following EXACT official format used in all Indian government offices.
+
+USER REQUEST: {prompt}
+
+CRITICAL REQUIREMENTS:
+✓ LANGUAGE DETECTION: Check if user wants Hindi format (look for Hindi words or explicit request)
+✓ Use EXACT Indian government application format (English or Hindi as appropriate)
+✓ Include ALL mandatory personal details in proper sequence
+✓ Use respectful government communication language
+✓ Add proper justification with supporting reasons
+✓ Include declaration clause for truthfulness
+✓ Use correct Indian date format (DD/MM/YYYY)
+✓ Add complete enclosure list with specific document names
+✓ Use appropriate closing ("Yours faithfully" for English, "धन्यवाद सहित" for Hindi)
+✓ Include date and place at bottom as per government format
+✓ Ensure document meets all Indian government standards
+
+Generate a COMPLETE, GOVERNMENT-READY application that can be submitted immediately."""
+
+def legacy_payload(prompt: str) -> dict:
+    """build_nim_payload for an English application, as it was"""
+    return {
+        "model": NVIDIA_MODEL,
+        "messages": [
+            {"role": "system", "content": LEGACY_APPLICATION_SYSTEM},
+            {"role": "user", "content": LEGACY_APPLICATION_USER.format(prompt=prompt)}
+        ],
+        "temperature": 0.1,
+        "max_tokens": 4000,
+        "top_p": 0.8
+    }
+
+REQUESTS = [
+    ("application en", 'application', "Application for an income certificate for my daughter's college admission"),
+    ("application hi", 'application', "मेरी बेटी के कॉलेज प्रवेश के लिए आय प्रमाण पत्र हेतु आवेदन, हिंदी में"),
+    ("affidavit en", 'affidavit', "Affidavit for change of name after marriage"),
+    ("letter, 40 KB paste", 'letter', "Complaint letter to the electricity board. " + "Meter readings attached. " * 1700),
+]
+
+def median_us(fn, iterations):
+    fn()  # warm-up
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e6
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"Prompt assembly benchmark (median of {args.iterations} builds)")
+    print("=" * 84)
+    legacy = legacy_payload(REQUESTS[0][2])
+    print(f"{'application (legacy)':<22} ~{prompt_tokens(legacy):5d} prompt tokens   "
+          f"{median_us(lambda: legacy_payload(REQUESTS[0][2]), args.iterations):7.1f} us")
+    for name, document_type, message in REQUESTS:
+        tokens = prompt_tokens(build_nim_payload(message, document_type))
+        elapsed = median_us(lambda: build_nim_payload(message, document_type), args.iterations)
+        print(f"{name:<22} ~{tokens:5d} prompt tokens   {elapsed:7.1f} us")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF render throughput on request threads vs a process pool
+
+Renders the long (~4000 token) contract from bench_layout_templates on
+--threads concurrent request threads, first inline (every render holds the
+GIL) and then through RenderPool with 1, 2, ... up to --processes children.
+While renders run, a probe thread times a tiny pure-Python task, standing in
+for a cheap /api/chat request sharing the worker process. Throughput should
+scale with the number of cores; on a single-core machine it cannot.
+
+    python benchmarks/bench_render_pool.py --renders 40 --threads 8
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_layout_templates import LONG
+from pdf_layouts import build_layout_registry
+from render_pool import RenderPool
+
+DOCUMENT_TYPES = {'contract': 'Contract/Agreement', 'custom': 'Custom Document'}
+
+def probe(stop, samples):
+    """Time a ~1 ms pure-Python task repeatedly until ``stop`` is set"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        sum(i * i for i in range(20000))
+        samples.append(time.perf_counter() - started)
+        time.sleep(0.01)
+
+def run(pool, renders, threads):
+    stop, samples = threading.Event(), []
+    prober = threading.Thread(target=probe, args=(stop, samples))
+    prober.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: pool.render(LONG, "Contract/Agreement", 'contract'), range(renders)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    prober.join()
+    return renders / elapsed, statistics.median(samples) * 1000, max(samples) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--renders', type=int, default=40)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    layouts = build_layout_registry(DOCUMENT_TYPES)
+    counts = [0] + sorted({n for n in (1, 2, 4, 8, args.processes) if n <= args.processes})
+
+    print(f"Render pool benchmark: {args.renders} long renders on {args.threads} threads, "
+          f"{os.cpu_count()} CPU(s)")
+    print("=" * 72)
+    for processes in counts:
+        # Queue bound equals thread count, so nothing falls back to inline while measuring the pool
+        pool = RenderPool(layouts, processes=processes, max_pending=args.threads, timeout=120)
+        pool.warm()
+        rate, probe_median, probe_max = run(pool, args.renders, args.threads)
+        stats = pool.stats()
+        pool.shutdown()
+        label = "inline" if not processes else f"pool x{processes}"
+        print(f"{label:<10} {rate:7.2f} renders/s   probe median {probe_median:7.2f} ms   "
+              f"max {probe_max:8.2f} ms   (pool {stats['pool']}, inline {stats['inline']})")
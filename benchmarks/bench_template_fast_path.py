@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: application documents from the bundled templates, no LLM call
+
+For one request per bundled template, times extract_user_data plus the
+template fill (what replaces the 70B call on a hit), and the fill plus the
+PDF render. Field completion is switched off,
+so missing required fields stay blank. Runs offline; compare with the
+generation_ms the API reports for 'llm' documents.
+
+    python benchmarks/bench_template_fast_path.py --iterations 100
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import DocumentGenerator, extract_user_data, template_document
+
+REQUESTS = [
+    "My name is Rahul Sharma s/o Ramesh Sharma, I live at 45 Gandhi Nagar, New Delhi 110031. I need leave "
+    "from 12th March to 14th March due to my sister's wedding. Mobile 9876543210, email rahul@example.com.",
+    "I am Priya Verma, applying for the post of accountant at Tata Consultancy Services Ltd. "
+    "PAN ABCDE1234F, Aadhaar 1234 5678 9012, mobile 9123456780.",
+    "My name is Anil Kapoor, I want to open a savings account in State Bank of India. "
+    "Address: 7 Park Street, Kolkata 700016. Occupation: teacher.",
+    "My name is Neha Gupta. Admission of my son Aarav Gupta to class 5 in Delhi Public School.",
+    "My name is Amit Kumar s/o Raj Kumar, I need an income certificate. Address: 12 MG Road, Lucknow 226001.",
+]
+
+def median_ms(fn, iterations):
+    fn()  # warm-up
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=100)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    app_module.NVIDIA_API_KEY = None
+
+    def fill(message):
+        return template_document(message, 'application', extract_user_data(message))
+
+    def fill_and_render(message):
+        text, _ = fill(message)
+        return DocumentGenerator.generate_pdf_bytes(text, "Application Form", {}, 'application')
+
+    print(f"Template fast path benchmark (median of {args.iterations} runs)")
+    print("=" * 78)
+    for message in REQUESTS:
+        text, info = fill(message)
+        filled = median_ms(lambda: fill(message), args.iterations)
+        rendered = median_ms(lambda: fill_and_render(message), max(args.iterations // 5, 1))
+        print(f"{info['template']:<34} fill {filled:6.2f} ms   fill + PDF {rendered:7.2f} ms   "
+              f"blanks {text.count('__________'):2d}")
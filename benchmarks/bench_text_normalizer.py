@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: response post-processing, chained passes vs text_normalizer
+
+Runs the markdown cleanup from finalize_ai_response plus clean_text_for_pdf
+over English and Devanagari documents of 1 KB, 10 KB and 100 KB, and over
+adversarial text full of '<' that is never closed. The old chained
+re.sub/replace passes are reproduced below as legacy_pipeline.
+Reports the median time, time per KB (flat means linear) and peak extra
+memory as a multiple of the input size. Runs offline.
+
+    python benchmarks/bench_text_normalizer.py --iterations 50
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_normalizer import normalize_for_pdf, strip_markdown
+
+ENGLISH = """**AFFIDAVIT**
+
+
+I, **JOHN DOE**, son of ROBERT DOE, aged 30 years, resident of 123 Main Street,  New Delhi - 110001, do hereby solemnly affirm and declare as under:
+
+1. That I am the deponent herein &amp; I am competent to swear to this affidavit.
+2. That the address mentioned above is my permanent residence since 2015.
+3. That I require this affidavit for <b>address proof</b> purposes.
+
+
+
+"""
+
+DEVANAGARI = """**शपथ पत्र**
+
+
+मैं, **राहुल शर्मा**, पुत्र श्री रमेश शर्मा, आयु 30 वर्ष, निवासी 45 गांधी नगर,  नई दिल्ली - 110001, सत्यनिष्ठा से घोषणा करता हूं:
+
+1. कि मैं इस शपथ पत्र का अभिसाक्षी हूं &amp; शपथ लेने के लिए सक्षम हूं।
+2. कि उपरोक्त पता वर्ष 2015 से मेरा स्थायी निवास है।
+3. कि मुझे यह शपथ पत्र <b>पते के प्रमाण</b> हेतु चाहिए।
+
+
+
+"""
+
+# Every '<' is unclosed: a tag pattern that may span another '<' rescans the rest of the text for each one
+UNCLOSED = "a < b "
+
+def legacy_pipeline(text: str) -> str:
+    """finalize_ai_response's cleanup followed by clean_text_for_pdf, as they were"""
+    text = text.replace('**', '').replace('*', '')
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = text.replace('\n\n\n', '\n\n')
+
+    text = re.sub(r'<[^>]+>', '', text)
+    text = text.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
+    text = text.replace('&nbsp;', ' ').replace('&quot;', '"').replace('&#39;', "'")
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return text.strip()
+
+def new_pipeline(text: str) -> str:
+    return normalize_for_pdf(strip_markdown(text))
+
+def document(unit: str, kb: int) -> str:
+    size = len(unit.encode('utf-8'))
+    return unit * max(1, kb * 1024 // size)
+
+def median_ms(fn, text, iterations):
+    fn(text)  # warm-up
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+def peak_copies(fn, text) -> float:
+    """Peak memory allocated during one call, in multiples of the input's size"""
+    tracemalloc.start()
+    fn(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / sys.getsizeof(text)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"Text normalization benchmark (median of {args.iterations} runs)")
+    print("=" * 96)
+    for language, unit in (("English", ENGLISH), ("Devanagari", DEVANAGARI), ("Unclosed <", UNCLOSED)):
+        for kb in (1, 10, 100):
+            text = document(unit, kb)
+            before = median_ms(legacy_pipeline, text, args.iterations)
+            after = median_ms(new_pipeline, text, args.iterations)
+            print(f"{language:<10} {kb:>4} KB   before {before:8.3f} ms ({before / kb * 1000:6.1f} us/KB, "
+                  f"{peak_copies(legacy_pipeline, text):4.1f}x)   after {after:8.3f} ms "
+                  f"({after / kb * 1000:6.1f} us/KB, {peak_copies(new_pipeline, text):4.1f}x)")
@@ -0,0 +1,149 @@
+"""Declarative Indian-document content rules, compiled once per (document type, language)"""
+
+import re
+
+class Append:
+    """Append ``text`` unless any of the ``unless`` phrases already occurs"""
+
+    def __init__(self, text: str, unless: tuple = ()):
+        self.text = text
+        self.unless = unless
+        self.ignore_case = False
+
+class Replace:
+    """Replace every occurrence of ``phrase`` unless any of the ``unless`` phrases occurs"""
+
+    def __init__(self, phrase: str, replacement: str, unless: tuple = (), ignore_case: bool = False):
+        self.phrase = phrase
+        self.replacement = replacement
+        self.unless = unless
+        self.ignore_case = ignore_case
+
+class Token:
+    """Rewrite whole-word matches of ``pattern``.
+
+    ``template`` is either a format string given the matched text as {0}, or
+    a dict from the lower-cased match to its replacement. Word boundaries are
+    checked after matching rather than with \\b, which would stop the regex
+    engine from skipping ahead to the pattern's first character.
+    """
+
+    def __init__(self, pattern: str, template):
+        self.pattern = re.compile(pattern)
+        self.template = template
+        self.unless = ()
+        self.ignore_case = False
+
+    def rewrite(self, match) -> str:
+        text, content = match.group(), match.string
+        start, end = match.span()
+        if (start and _is_word_char(content[start - 1])) or (end < len(content) and _is_word_char(content[end])):
+            return text
+        if isinstance(self.template, dict):
+            return self.template[text.lower()]
+        return self.template.format(text)
+
+def _is_word_char(char: str) -> bool:
+    # Same definition as the regex engine's \w for str patterns
+    return char.isalnum() or char == '_'
+
+DECLARATION_HI = "\n\nमैं घोषणा करता/करती हूँ कि उपरोक्त सभी जानकारी सत्य एवं सही है।"
+DECLARATION_EN = ("\n\nI hereby declare that all the information provided above is true and correct "
+                  "to the best of my knowledge.")
+
+# Six digits on their own are a PIN code; unrolled, \d runs faster than \d{6}
+PIN_CODE = Token(r'\d\d\d\d\d\d', '- {0}')
+
+# Rules per (document type, language); '*' rules apply to every document type.
+# Guards ("unless") are checked against the response as it came back; appends go last.
+CONTENT_RULES = {
+    ('*', 'en'): (
+        PIN_CODE,
+        Token(r'[sSdD]/[oO]', {'s/o': 'son of', 'd/o': 'daughter of'}),
+    ),
+    ('*', 'hi'): (
+        PIN_CODE,
+    ),
+    ('affidavit', 'en'): (
+        Append("\n\nVERIFICATION\n\nI verify that the contents are true to my knowledge.\n\nDEPONENT",
+               unless=('VERIFICATION', 'सत्यापन')),
+    ),
+    ('affidavit', 'hi'): (
+        Append("\n\nसत्यापन\n\nमैं सत्यापित करता/करती हूँ कि उपरोक्त विवरण मेरी जानकारी के अनुसार सत्य है।\n\nशपथकर्ता",
+               unless=('VERIFICATION', 'सत्यापन')),
+    ),
+    ('application', 'en'): (
+        Replace('Dear Sir/Madam', 'Respected Sir/Madam', unless=('Respected Sir/Madam',)),
+        Replace('I request you to kindly', DECLARATION_EN + '\n\nI request you to kindly',
+                unless=('declare that all the information',), ignore_case=True),
+        Replace('Thanking you,', 'Thanking you,\n\nYours faithfully,', unless=('Yours faithfully', 'Yours sincerely', 'Yours obediently')),
+    ),
+    ('application', 'hi'): (
+        Replace('महोदय', 'आदरणीय महोदय', unless=('आदरणीय महोदय', 'आदरणीय महोदया')),
+        Replace('अतः आपसे विनम्र निवेदन', DECLARATION_HI + '\n\nअतः आपसे विनम्र निवेदन',
+                unless=('घोषणा करता', 'घोषणा करती')),
+        Replace('आभारी रहूंगा', 'आभारी रहूंगा।\n\nधन्यवाद सहित,', unless=('धन्यवाद सहित',)),
+    ),
+}
+
+LANGUAGES = ('en', 'hi')
+
+class RuleSet:
+    """The rules for one (document type, language), ordered tokens → phrases → appends.
+
+    Guards are evaluated once, up front, against the original content. Each
+    surviving rule then costs one C-level pass: a substring search and
+    replace for phrases, one precompiled scan per token pattern. Rules are
+    written so their matches never overlap, which makes the result the same
+    as applying them one after another.
+    """
+
+    def __init__(self, rules: tuple):
+        self.tokens = [rule for rule in rules if isinstance(rule, Token)]
+        self.phrases = [rule for rule in rules if isinstance(rule, Replace)]
+        self.appends = [rule for rule in rules if isinstance(rule, Append)]
+        self.guarded = [rule for rule in self.phrases + self.appends if rule.unless]
+
+    def blocked(self, content: str) -> set:
+        """The guarded rules whose ``unless`` phrases occur in the content"""
+        lowered = None
+        blocked = set()
+        for rule in self.guarded:
+            if rule.ignore_case:
+                if lowered is None:
+                    lowered = content.lower()
+                haystack, phrases = lowered, [phrase.lower() for phrase in rule.unless]
+            else:
+                haystack, phrases = content, rule.unless
+            if any(phrase in haystack for phrase in phrases):
+                blocked.add(rule)
+        return blocked
+
+    def rewrite(self, content: str, blocked=frozenset()) -> str:
+        """The token and phrase rewrites, without the ``blocked`` rules and without appends"""
+        for rule in self.tokens:
+            content = rule.pattern.sub(rule.rewrite, content)
+
+        for rule in self.phrases:
+            if rule not in blocked and rule.phrase in content:
+                content = content.replace(rule.phrase, rule.replacement)
+        return content
+
+    def apply(self, content: str) -> str:
+        blocked = self.blocked(content)
+        content = self.rewrite(content, blocked)
+        for rule in self.appends:
+            if rule not in blocked:
+                content += rule.text
+        return content
+
+def build_rule_sets(document_types) -> dict:
+    """Compile a RuleSet for every document type and language, plus '*' for unknown types"""
+    rule_sets = {}
+    for document_type in ('*', *document_types):
+        for language in LANGUAGES:
+            rules = CONTENT_RULES[('*', language)]
+            if document_type != '*':
+                rules = rules + CONTENT_RULES.get((document_type, language), ())
+            rule_sets[(document_type, language)] = RuleSet(rules)
+    return rule_sets
@@ -0,0 +1,324 @@
+"""Single-pass extraction of personal details from a request, in time linear in its length.
+
+One compiled scan finds every trigger in the text: a keyword ("my name is",
+"s/o", "निवासी", "born on", ...), a run of digits, an '@', a PAN-shaped word
+or an institution suffix. Names are only read after a keyword: a run of
+capitalized words on its own is as often a bank, a course or the other
+party to an agreement as it is the requester. Each trigger reads its value
+with a pattern anchored where it occurs, and every quantifier in those
+patterns is bounded, so no trigger costs more than a fixed window however
+adversarial the text. Devanagari digits are read as ASCII, and Hindi
+keywords are recognised alongside English ones.
+"""
+
+import re
+import unicodedata
+
+from prompts import prompt_language
+
+DEVANAGARI_DIGITS = str.maketrans('०१२३४५६७८९', '0123456789')
+
+_WORD = r"[A-Z][a-z]{1,30}"
+# A name word as written after "I am" / "I,": capitalized, or all caps
+_CAPITALIZED_WORD = r"[A-Z](?:[a-z]{1,30}|[A-Z]{1,30})"
+_HINDI_WORD = r"[\u0900-\u0963\u0971-\u097F]{1,30}"
+_HINDI_WORDS = rf"\s{{0,3}}:?\s{{0,3}}({_HINDI_WORD}(?:\s{{1,3}}{_HINDI_WORD}){{0,5}})"
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]{0,6}\.?"
+_DATE = (rf"[0-9]{{1,2}}(?:st|nd|rd|th)?(?:[/.-][0-9]{{1,2}}[/.-][0-9]{{2,4}}"
+         rf"|\s{{1,3}}(?:of\s{{1,3}})?{_MONTH}(?:,?\s{{1,3}}[0-9]{{4}})?)?")
+_PIN = r"(?<![0-9])(?:[0-9]{6}|[0-9]{3}\s[0-9]{3})(?![0-9])"
+
+# An address runs from its keyword to a PIN code within this many characters
+ADDRESS_WINDOW = 200
+
+# After the PIN code an address may name its town or state, up to the next clause
+_CLAUSE = r"(?:and|but|my|i|name|mobile|phone|email|aged?|s/o|d/o|w/o|with|for|who|और|मेरा|मेरी|मैं)(?=[\s:,]|$)"
+_ADDRESS = (rf"\s{{0,3}}:?\s{{0,3}}([^.\n।]{{1,{ADDRESS_WINDOW}}}?{_PIN}"
+            rf"(?:(?!\s{{1,3}}{_CLAUSE})[^.\n।,;]){{0,40}})")
+
+INSTITUTION_SUFFIXES = ('Bank', 'School', 'College', 'University', 'Vidyalaya', 'Institute', 'Ltd.', 'Ltd',
+                        'Limited', 'Technologies', 'Corporation', 'Hospital')
+
+# Words that end a Hindi name: verbs, relations and the keywords of other fields
+HINDI_STOPWORDS = frozenset((
+    'है', 'हैं', 'हूं', 'हूँ', 'था', 'थी', 'और', 'का', 'की', 'के', 'को', 'मेरा', 'मेरी', 'मुझे', 'मैं',
+    'पुत्र', 'पुत्री', 'सुपुत्र', 'सुपुत्री', 'पत्नी', 'पिता', 'निवासी', 'पता', 'आयु', 'उम्र', 'वर्ष',
+    'जन्म', 'स्थान', 'मोबाइल', 'ईमेल', 'आवेदन', 'पत्र',
+))
+HINDI_HONORIFICS = frozenset(('श्री', 'श्रीमती', 'श्रीमान', 'सुश्री', 'कुमारी'))
+
+# Words that end an English name read case-insensitively ("i am writing to...", "my name is ramesh and...")
+ENGLISH_STOPWORDS = frozenset((
+    'a', 'an', 'the', 'and', 'or', 'but', 'of', 'to', 'for', 'from', 'in', 'at', 'on', 'with', 'by', 'as', 'is',
+    'am', 'are', 'was', 'not', 'no', 'this', 'that', 'my', 'your', 'here', 'very', 'really', 'currently', 'also',
+    'writing', 'applying', 'requesting', 'working', 'looking', 'going', 'residing', 'living', 'staying', 'studying',
+    'resident', 'student', 'employee', 'son', 'daughter', 'wife', 'aged', 'age', 'years', 'year', 'old',
+    'please', 'want', 'need', 'would', 'like', 'have', 'has', 'will', 'can', 'do', 'hereby', 'who', 'which',
+))
+
+def _is_word_char(char: str) -> bool:
+    # \w plus combining marks, so a Devanagari vowel sign continues its word
+    return char.isalnum() or char == '_' or unicodedata.category(char)[0] == 'M'
+
+def hindi_name(value: str):
+    """Up to three words of a Hindi name, without honorifics and stopping at the next verb or keyword"""
+    words = value.split()
+    while words and words[0] in HINDI_HONORIFICS:
+        words.pop(0)
+    name = []
+    for word in words[:3]:
+        if word in HINDI_STOPWORDS:
+            break
+        name.append(word)
+    return ' '.join(name) or None
+
+def english_name(value: str):
+    """Up to four words of an English name, stopping at the first stopword; all-lowercase names are title-cased"""
+    name = []
+    for word in value.split()[:4]:
+        if word.lower() in ENGLISH_STOPWORDS:
+            break
+        name.append(word)
+    name = ' '.join(name)
+    return (name.title() if name.islower() else name) or None
+
+def full_english_name(value: str):
+    """An English name of at least two words, so "I am Ramesh and..." doesn't read a bare word"""
+    name = english_name(value)
+    return name if name and ' ' in name else None
+
+class Field:
+    """Fields read by ``pattern`` (one per group) wherever one of ``keywords`` occurs.
+
+    The pattern is matched where the keyword ends, or where it starts with
+    ``from_keyword``. ``clean`` may rewrite a value, or reject it with None.
+    """
+
+    def __init__(self, fields, keywords: tuple, pattern: str, flags=re.IGNORECASE, from_keyword: bool = False,
+                 clean=None):
+        self.fields = (fields,) if isinstance(fields, str) else fields
+        self.keywords = keywords
+        self.pattern = re.compile(pattern, flags)
+        self.from_keyword = from_keyword
+        self.clean = clean
+
+# In priority order: for each field, the first rule to match anywhere wins, then the first occurrence
+FIELDS = (
+    # Only an explicit "my name is" / "name:" introduces a name in any case; "I am unwell" is not one
+    Field('full_name', ('my name is', 'name:'),
+          rf"\s{{0,3}}:?\s{{0,3}}({_WORD}(?:\s{{1,3}}{_WORD}){{1,3}})", clean=full_english_name),
+    Field('full_name', ('i am', 'i,'),
+          rf"\s{{0,3}}({_CAPITALIZED_WORD}(?:\s{{1,3}}{_CAPITALIZED_WORD}){{1,3}})", 0, clean=full_english_name),
+    Field('full_name', ('मेरा नाम', 'नाम:'), _HINDI_WORDS, 0, clean=hindi_name),
+    Field('father_name', ('s/o', 'd/o', 'w/o', 'son of', 'daughter of', 'wife of', "father's name", 'fathers name',
+                          'father name'),
+          rf"\s{{0,3}}:?\s{{0,3}}(?:shri\s{{1,3}}|sh\.\s{{0,3}}|mr\.?\s{{1,3}})?({_WORD}(?:\s{{1,3}}{_WORD}){{0,3}})",
+          clean=english_name),
+    Field('father_name', ('पुत्र', 'पुत्री', 'सुपुत्र', 'सुपुत्री', 'पत्नी', 'पिता का नाम', 'पिता'), _HINDI_WORDS, 0,
+          clean=hindi_name),
+    Field('address', ('address', 'live at', 'living at', 'residing at', 'resident of', 'r/o', 'निवासी', 'पता'),
+          _ADDRESS),
+    Field(('start_date', 'end_date'), ('from', 'between'),
+          rf"\s{{1,3}}({_DATE})\s{{1,3}}(?:to|till|until|and)\s{{1,3}}({_DATE})"),
+    Field('address', ('from',), _ADDRESS),
+    Field('date_of_birth', ('born on', 'date of birth', 'dob', 'जन्म तिथि'), rf"\s{{0,3}}:?\s{{0,3}}({_DATE})"),
+    Field('age', ('aged', 'age', 'आयु', 'उम्र'),
+          r"\s{0,3}[:-]?\s{0,3}(?:(?:of|about)\s{1,3})?([0-9]{1,3})(?![0-9])"),
+    Field('reason', ('due to', 'because of', 'on account of'), r"\s{1,3}([^.,;\n।]{1,150})"),
+    Field('position', ('post of', 'position of', 'role of', 'job as', 'vacancy for'),
+          r"\s{1,3}(?:an?\s{1,3}|the\s{1,3})?([a-z][a-z ]{0,60}?)(?=\s{1,3}(?:at|in|with|for)\b|[.,;\n]|$)"),
+    Field('relation', ('my son', 'my daughter', 'my ward'), r"my\s{1,3}(son|daughter|ward)", from_keyword=True,
+          clean=str.lower),
+    Field('student_name', ('my son', 'my daughter', 'my ward', 'child'),
+          rf"(?:\s{{1,3}}named)?,?\s{{1,3}}({_WORD}(?:\s{{1,3}}{_WORD}){{0,2}})", clean=english_name),
+    Field('class_name', ('class', 'standard', 'grade', 'lkg', 'ukg', 'nursery'),
+          r"((?:class|standard|grade)\s{1,3}(?:[0-9]{1,2}(?:st|nd|rd|th)?|[IVX]{1,5})|lkg|ukg|nursery)(?!\w)",
+          from_keyword=True),
+    Field('purpose', ('income', 'caste', 'domicile', 'residence', 'residential', 'birth', 'death', 'character',
+                      'marriage', 'ews', 'obc'),
+          r"((?:income|caste|domicile|residence|residential|birth|death|character|marriage|ews|obc)"
+          r"\s{1,3}certificate)", from_keyword=True),
+    Field('employee_id', ('employee id', 'emp id', 'roll no', 'roll number'), r"[:.]?\s{0,3}([A-Z0-9-]{1,30})"),
+    Field('occupation', ('occupation',), r":?\s{1,3}([a-z]{1,30}(?:\s[a-z]{1,30})?)"),
+    Field('occupation', ('working as', 'work as'), r"\s{1,3}an?\s{1,3}([a-z]{1,30}(?:\s[a-z]{1,30})?)"),
+    Field('place', ('place',), r"\s{0,3}:\s{0,3}([A-Z][A-Za-z]{1,30}(?:\s{1,3}[A-Z][A-Za-z]{1,30}){0,2})", 0),
+    Field('place', ('स्थान',), _HINDI_WORDS, 0, clean=hindi_name),
+)
+
+# Words, runs of digits and runs of '@'; keywords, PAN numbers and institutions start at a word
+_TOKEN = re.compile(r"(?P<word>[A-Za-z\u0900-\u0963\u0971-\u097F]+)|(?P<digits>[0-9]+)|(?P<email>@+)")
+INSTITUTION_WORDS = frozenset(suffix.rstrip('.') for suffix in INSTITUTION_SUFFIXES)
+
+_PAN = re.compile(r"[A-Z]{5}[0-9]{4}[A-Z](?!\w)")
+_AADHAAR = re.compile(r"[0-9]{4}[\s-]?[0-9]{4}[\s-]?[0-9]{4}(?![0-9])")
+_PIN_CODE = re.compile(_PIN)
+_AGE_SUFFIX = re.compile(r"[\s-]{0,3}(?:years?|yrs?)\.?[\s-]{0,3}old", re.IGNORECASE)
+_EMAIL_DOMAIN = re.compile(r"[\w-]{1,63}(?:\.[\w-]{1,63}){1,8}")
+_SUFFIXES = '|'.join(map(re.escape, INSTITUTION_SUFFIXES))
+_INSTITUTION_TAIL = re.compile(rf"(?<=Ltd)\.|(?:\s{{1,3}}(?:{_SUFFIXES})(?!\w)){{0,3}}(?:\s{{1,3}}of\s{{1,3}}[A-Z]\w{{1,30}})?")
+
+class EntityExtractor:
+    """Extracts the user_data fields the templates, prompts and PDFs use, in one scan of the text"""
+
+    def __init__(self, fields=FIELDS):
+        self.fields = fields
+
+        # First word of each keyword → (keyword, [(priority, rule)]), longest keyword first
+        rules = {}
+        for priority, rule in enumerate(fields):
+            for keyword in rule.keywords:
+                rules.setdefault(keyword.lower(), []).append((priority, rule))
+        self.keywords = {}
+        for keyword in sorted(rules, key=len, reverse=True):
+            first_word = _TOKEN.match(keyword).group()
+            self.keywords.setdefault(first_word, []).append((keyword, rules[keyword]))
+
+    def extract(self, text: str) -> dict:
+        if not text:
+            return {}
+
+        # Same length as the original, so positions and values line up
+        scanned = text.translate(DEVANAGARI_DIGITS)
+        found = {}      # field -> (priority, value)
+        fallback = {}   # pin_code read without a keyword, used when no address is found
+        last = len(scanned)
+        next_pin = -1
+
+        for token in _TOKEN.finditer(scanned):
+            kind, start = token.lastgroup, token.start()
+
+            if kind == 'digits':
+                self._number(scanned, start, token.end(), found, fallback)
+                continue
+            if kind == 'email':
+                if 'email' not in found and token.end() - start == 1:
+                    email = self._email(scanned, start)
+                    if email:
+                        found['email'] = (0, email)
+                continue
+            if start and _is_word_char(scanned[start - 1]):
+                continue
+
+            word = token.group()
+            for keyword, rules in self.keywords.get(word.lower(), ()):
+                end = start + len(keyword)
+                if scanned[start:end].lower() != keyword or (
+                        end < last and _is_word_char(scanned[end]) and _is_word_char(scanned[end - 1])):
+                    continue
+                for priority, rule in rules:
+                    if all(field in found and found[field][0] <= priority for field in rule.fields):
+                        continue
+                    if 'address' in rule.fields:
+                        # Skip the window scan unless a PIN code is close enough to end it
+                        if next_pin < end:
+                            pin = _PIN_CODE.search(scanned, end)
+                            next_pin = pin.start() if pin else last + ADDRESS_WINDOW + 1
+                        if next_pin - end > ADDRESS_WINDOW + 7:
+                            continue
+                    value = rule.pattern.match(scanned, start if rule.from_keyword else end)
+                    if not value:
+                        continue
+                    values = [group.strip() for group in value.groups()]
+                    if rule.clean:
+                        values = [rule.clean(group) for group in values]
+                        if None in values:
+                            continue
+                    for field, group in zip(rule.fields, values):
+                        if field not in found or found[field][0] > priority:
+                            found[field] = (priority, group)
+                break
+
+            if not 'A' <= word[0] <= 'Z':
+                continue
+            if 'pan' not in found and len(word) == 5 and word.isupper():
+                pan = _PAN.match(scanned, start)
+                if pan:
+                    found['pan'] = (0, pan.group())
+            if 'institution' not in found and word in INSTITUTION_WORDS:
+                tail = _INSTITUTION_TAIL.match(scanned, token.end())
+                found['institution'] = (0, scanned[self._institution_start(scanned, start):tail.end()].strip())
+
+        data = {field: value for field, (_, value) in found.items()}
+
+        # PIN code and place come from the address when there is one
+        if 'address' in data:
+            pin = _PIN_CODE.search(data['address'])
+            data['pin_code'] = pin.group().replace(' ', '')
+            if 'place' not in data:
+                place = self._place(data['address'][:pin.start()])
+                if place:
+                    data['place'] = place
+        elif 'pin_code' in fallback:
+            data['pin_code'] = fallback['pin_code']
+
+        # Canonical forms used in documents
+        if 'mobile' in data:
+            data['mobile'] = f"+91-{data['mobile']}"
+        if 'aadhaar' in data:
+            digits = re.sub(r'\D', '', data['aadhaar'])
+            if digits == re.sub(r'\D', '', data.get('mobile', '')):
+                del data['aadhaar']
+            else:
+                data['aadhaar'] = f"{digits[:4]}-{digits[4:8]}-{digits[8:]}"
+
+        data['language'] = prompt_language(text)
+        return data
+
+    @staticmethod
+    def _number(text: str, start: int, end: int, found: dict, fallback: dict):
+        """Classify one run of digits as a mobile number, Aadhaar, PIN code or age"""
+        run = text[start:end]
+        if 'mobile' not in found:
+            if len(run) == 12 and start and text[start - 1] == '+' and run.startswith('91'):
+                run = run[2:]
+            elif len(run) == 11 and run[0] == '0':
+                run = run[1:]
+            if len(run) == 10 and run[0] in '6789':
+                found['mobile'] = (0, run)
+                return
+        if 'aadhaar' not in found and len(run) in (4, 12) and (start == 0 or text[start - 1] != '+'):
+            aadhaar = _AADHAAR.match(text, start)
+            if aadhaar:
+                found['aadhaar'] = (0, aadhaar.group())
+                return
+        if 'pin_code' not in fallback and len(run) in (3, 6):
+            pin = _PIN_CODE.match(text, start)
+            if pin and (start == 0 or text[start - 1] != '+'):
+                fallback['pin_code'] = pin.group().replace(' ', '')
+                return
+        if 'age' not in found and len(run) <= 3 and _AGE_SUFFIX.match(text, end):
+            found['age'] = (len(FIELDS), run)
+
+    @staticmethod
+    def _email(text: str, at: int):
+        local = at
+        while local > 0 and at - local < 64 and (text[local - 1].isalnum() or text[local - 1] in '_.+-'):
+            local -= 1
+        domain = _EMAIL_DOMAIN.match(text, at + 1)
+        if local == at or not domain:
+            return None
+        return text[local:domain.end()]
+
+    @staticmethod
+    def _institution_start(text: str, start: int) -> int:
+        """Start of the (up to five) capitalized words before an institution suffix"""
+        for _ in range(5):
+            space = start
+            while space > 0 and start - space < 3 and text[space - 1].isspace():
+                space -= 1
+            word = space
+            while word > 0 and space - word < 40 and (_is_word_char(text[word - 1]) or text[word - 1] in "&'.-"):
+                word -= 1
+            if word == space or space == start or not text[word].isupper():
+                break
+            start = word
+        return start
+
+    @staticmethod
+    def _place(head: str):
+        """The town in an address: its last comma-separated part before the PIN code that has no digits"""
+        for part in reversed(head.split(',')):
+            part = part.strip(' -')
+            if part and not any(char.isdigit() for char in part):
+                return part
+        return None
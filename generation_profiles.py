@@ -0,0 +1,142 @@
+"""Per-(document type, language) completion lengths, used to size max_tokens from what documents actually need"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class GenerationProfiles:
+    """Recent completion lengths and finish reasons per (document type, language).
+
+    Once a profile has ``min_samples`` completions, its max_tokens is the
+    ``percentile`` of the recent lengths times ``headroom``, rounded up to a
+    multiple of ``step`` (so request payloads, and the response cache keys
+    derived from them, only change when the estimate moves a whole step)
+    and clamped to [``floor``, ``ceiling``]. A completion cut off by the
+    limit (finish_reason "length") only shows the document needed more, so
+    it counts as twice its length. Until then the caller's default applies.
+
+    With ``path`` set, profiles are loaded from that JSON file at start and
+    written back at most every ``save_interval`` seconds and on save().
+    """
+
+    def __init__(self, path: str = None, window: int = 500, min_samples: int = 20, percentile: float = 0.95,
+                 headroom: float = 1.2, step: int = 256, floor: int = 256, ceiling: int = 8192,
+                 save_interval: float = 60.0):
+        self.path = path
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.headroom = headroom
+        self.step = step
+        self.floor = floor
+        self.ceiling = ceiling
+        self.save_interval = save_interval
+
+        self._lengths = {}         # (document_type, language) -> deque of effective lengths
+        self._finish_reasons = {}  # (document_type, language) -> {reason: count}
+        self._limits = {}          # (document_type, language) -> computed max_tokens, or None
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        if path:
+            self._load()
+
+    def max_tokens(self, document_type: str, language: str, default: int) -> int:
+        key = (document_type, language)
+        with self._lock:
+            if key not in self._limits:
+                self._limits[key] = self._compute(key)
+            limit = self._limits[key]
+        return default if limit is None else limit
+
+    def record(self, document_type: str, language: str, completion_tokens: int, finish_reason: str = None):
+        key = (document_type, language)
+        effective = completion_tokens * 2 if finish_reason == 'length' else completion_tokens
+        with self._lock:
+            lengths = self._lengths.get(key)
+            if lengths is None:
+                lengths = self._lengths[key] = deque(maxlen=self.window)
+            lengths.append(min(effective, self.ceiling))
+            reasons = self._finish_reasons.setdefault(key, {})
+            reason = finish_reason or 'unknown'
+            reasons[reason] = reasons.get(reason, 0) + 1
+            self._limits.pop(key, None)
+            self._dirty = True
+            due = self.path and time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            self.save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            keys = list(self._lengths)
+        profiles = {}
+        for key in sorted(keys):
+            with self._lock:
+                lengths = sorted(self._lengths[key])
+                reasons = dict(self._finish_reasons.get(key, {}))
+            profiles[f"{key[0]}/{key[1]}"] = {
+                'samples': len(lengths),
+                'p50': self._quantile(lengths, 0.5),
+                f"p{round(self.percentile * 100)}": self._quantile(lengths, self.percentile),
+                'max_tokens': self.max_tokens(key[0], key[1], None),
+                'finish_reasons': reasons,
+            }
+        return {'min_samples': self.min_samples, 'profiles': profiles}
+
+    def save(self):
+        """Write the profiles to ``path`` atomically, if anything changed"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {f"{key[0]}/{key[1]}": {'lengths': list(lengths), 'finish_reasons': self._finish_reasons.get(key, {})}
+                    for key, lengths in self._lengths.items()}
+            self._dirty = False
+            self._saved_at = time.monotonic()
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'profiles': data}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save generation profiles: {e}")
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable generation profiles {self.path}: {e}")
+            return
+
+        for name, profile in data.get('profiles', {}).items():
+            document_type, _, language = name.rpartition('/')
+            key = (document_type, language)
+            self._lengths[key] = deque((int(n) for n in profile.get('lengths', ())), maxlen=self.window)
+            self._finish_reasons[key] = dict(profile.get('finish_reasons', {}))
+        logger.info(f"Loaded generation profiles for {len(self._lengths)} document types from {self.path}")
+
+    def _compute(self, key):
+        lengths = self._lengths.get(key)
+        if not lengths or len(lengths) < self.min_samples:
+            return None
+        estimate = self._quantile(sorted(lengths), self.percentile) * self.headroom
+        limit = math.ceil(estimate / self.step) * self.step
+        return max(self.floor, min(self.ceiling, limit))
+
+    @staticmethod
+    def _quantile(ordered: list, q: float) -> int:
+        if not ordered:
+            return 0
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
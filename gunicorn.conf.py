@@ -0,0 +1,28 @@
+"""Gunicorn settings, picked up automatically by `gunicorn app:app`"""
+
+import os
+import shutil
+import tempfile
+
+# Workers write their metrics to files here so /metrics on any worker reports them all.
+# Set before the app (and prometheus_client) is imported in any worker.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'docgen_metrics'))
+
+def on_starting(server):
+    # Samples from a previous run would be added to this one's
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+def child_exit(server, worker):
+    # Drop a dead worker's live gauges (temp-dir usage); its counters and histograms are kept
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+def worker_exit(server, worker):
+    # Stop this worker's PDF janitor thread and render processes cleanly before it exits,
+    # and keep what it learned about completion lengths
+    from app import file_janitor, generation_profiles, render_pool
+    file_janitor.stop()
+    render_pool.shutdown()
+    generation_profiles.save()
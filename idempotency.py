@@ -0,0 +1,169 @@
+"""Deduplication of document requests: single-flight coalescing and Idempotency-Key replay.
+
+SingleFlight lets concurrent identical requests share one pipeline run: the
+first caller for a key runs it and later callers wait for its result. When
+the running caller ends without a result (its client went away, or the
+work raised), each waiting caller runs the work itself instead.
+
+IdempotencyStore keeps completed responses per Idempotency-Key header for a
+window, so a retried request gets the stored response back instead of
+running the pipeline again.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+class FlightAbandoned(Exception):
+    """The caller running a shared call finished without a result"""
+
+class Flight:
+    """One in-flight call; ``result`` is set before ``done``, and stays None if the call was abandoned"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+    def wait(self):
+        self.done.wait()
+        if self.result is None:
+            raise FlightAbandoned()
+        return self.result
+
+class AsyncFlight(Flight):
+    def __init__(self):
+        self.done = asyncio.Event()
+        self.result = None
+
+    async def wait(self):
+        await self.done.wait()
+        if self.result is None:
+            raise FlightAbandoned()
+        return self.result
+
+class SingleFlight:
+    """One run per key at a time; concurrent callers with the same key share its result.
+
+    Results must not be None, which marks an abandoned call.
+    """
+
+    flight_class = Flight
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.counters = {'runs': 0, 'shared': 0, 'abandoned': 0}
+
+    def begin(self, key) -> tuple:
+        """(flight, True) for the caller that should run the work, (flight, False) for one that should wait"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.counters['shared'] += 1
+                return flight, False
+            flight = self._flights[key] = self.flight_class()
+            self.counters['runs'] += 1
+            return flight, True
+
+    def end(self, key, flight, result=None):
+        """Hand the result (None if there is none) to the waiting callers; the next caller runs afresh"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if result is None:
+                self.counters['abandoned'] += 1
+        flight.result = result
+        flight.done.set()
+
+    def do(self, key, fn, *args) -> tuple:
+        """(fn(*args), False), or (the result of an identical call already in flight, True)"""
+        flight, leader = self.begin(key)
+        if not leader:
+            try:
+                return flight.wait(), True
+            except FlightAbandoned:
+                return fn(*args), False
+
+        result = None
+        try:
+            result = fn(*args)
+        finally:
+            self.end(key, flight, result)
+        return result, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'in_flight': len(self._flights), **self.counters}
+
+class AsyncSingleFlight(SingleFlight):
+    """SingleFlight for coroutine functions on one event loop"""
+
+    flight_class = AsyncFlight
+
+    async def do(self, key, fn, *args) -> tuple:
+        flight, leader = self.begin(key)
+        if not leader:
+            try:
+                return await flight.wait(), True
+            except FlightAbandoned:
+                return await fn(*args), False
+
+        result = None
+        try:
+            result = await fn(*args)
+        finally:
+            self.end(key, flight, result)
+        return result, False
+
+class IdempotencyKeyReused(Exception):
+    """An Idempotency-Key was sent again with a different request"""
+
+    def __init__(self, key: str):
+        super().__init__(f"Idempotency-Key {key!r} was already used for a different request")
+
+class IdempotencyStore:
+    """Completed (body, status) responses per Idempotency-Key, replayed for ``ttl`` seconds.
+
+    Each entry remembers the fingerprint of the request that produced it; the
+    same key with a different request raises IdempotencyKeyReused instead of
+    replaying. At most ``max_entries`` keys are kept, least recently used out.
+    """
+
+    def __init__(self, ttl: float = 600, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, fingerprint, body, status)
+        self._lock = threading.Lock()
+        self.counters = {'replays': 0, 'misses': 0, 'stores': 0, 'conflicts': 0}
+
+    def get(self, key: str, fingerprint: str):
+        """The stored (body, status) for the key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            if entry[1] != fingerprint:
+                self.counters['conflicts'] += 1
+                raise IdempotencyKeyReused(key)
+            self._entries.move_to_end(key)
+            self.counters['replays'] += 1
+            return entry[2], entry[3]
+
+    def put(self, key: str, fingerprint: str, body: dict, status: int):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, fingerprint, body, status)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.counters['stores'] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'keys': len(self._entries), 'ttl': self.ttl, **self.counters}
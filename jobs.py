@@ -0,0 +1,149 @@
+"""Bounded in-process worker pool for asynchronous document-generation jobs"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFull(Exception):
+    """Raised when the queue is at capacity; ``retry_after`` is a hint in seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class Job:
+    """State of one queued job. Readers wait on ``changed`` for progress updates."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = self.QUEUED
+        self.stage = 'queued'
+        self.progress = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.version = 0
+        self.changed = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def update(self, stage: str, progress: int):
+        with self.changed:
+            self.status = self.RUNNING
+            self.stage = stage
+            self.progress = progress
+            self._bump()
+
+    def finish(self, result: dict = None, error: str = None):
+        with self.changed:
+            self.status = self.FAILED if error else self.SUCCEEDED
+            self.stage = 'done'
+            self.progress = 100
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self._bump()
+
+    def wait(self, version: int, timeout: float) -> int:
+        """Block until the job changes past ``version`` (or timeout); returns the current version"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def to_dict(self) -> dict:
+        with self.changed:
+            data = {
+                'job_id': self.id,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': self.progress,
+                'created_at': self.created_at,
+            }
+            if self.result is not None:
+                data['result'] = self.result
+            if self.error is not None:
+                data['error'] = self.error
+            return data
+
+    def _bump(self):
+        self.version += 1
+        self.changed.notify_all()
+
+class JobManager:
+    """Runs jobs on ``workers`` threads with at most ``max_queue`` waiting.
+
+    Submissions beyond that are rejected with JobQueueFull so the web tier
+    can answer 429 immediately instead of piling up work.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 32, ttl: float = 3600):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='doc-job')
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self._avg_duration = 10.0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args) -> Job:
+        """Queue ``fn(job, *args)``; it should return the result dict or raise"""
+        with self._lock:
+            self._prune()
+            if self._pending >= self.workers + self.max_queue:
+                waves = self._pending / self.workers
+                raise JobQueueFull(max(1, int(waves * self._avg_duration)))
+
+            job = Job(uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._pending += 1
+
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'capacity': self.workers + self.max_queue,
+                'tracked': len(self._jobs),
+            }
+
+    def _run(self, job: Job, fn, args):
+        started = time.monotonic()
+        try:
+            job.finish(result=fn(job, *args))
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job.finish(error=str(e))
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._pending -= 1
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * elapsed
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if not job.done or job.finished_at > cutoff:
+                break
+            self._jobs.popitem(last=False)
@@ -0,0 +1,111 @@
+"""Prometheus metrics for the document pipeline: per-stage latency histograms and counters.
+
+Under gunicorn, PROMETHEUS_MULTIPROC_DIR is set before any worker starts,
+so every worker writes its samples to memory-mapped files there and a
+scrape of any one worker reports the sum over all of them.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+import requests
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from nim_client import CircuitOpenError, UpstreamError
+
+# From sub-millisecond text stages up to a slow 70B completion
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+STAGES = ('extract', 'prompt', 'validate', 'clean', 'pdf_build', 'download')
+UPSTREAM_PHASES = ('queue', 'connect', 'ttft', 'total')
+
+def upstream_outcome(e: Exception):
+    """Status label for a failed upstream call, or None if the failure wasn't the upstream's"""
+    if isinstance(e, UpstreamError):
+        return str(e.status_code)
+    if isinstance(e, CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(e, requests.exceptions.Timeout):
+        return 'timeout'
+    if isinstance(e, requests.exceptions.RequestException):
+        return 'connection_error'
+    return None
+
+class PipelineMetrics:
+    """The pipeline's metrics, registered once per process.
+
+    Document types outside ``document_types`` are reported as 'other', so
+    request input can't grow the label set.
+    """
+
+    def __init__(self, document_types, registry: CollectorRegistry = REGISTRY):
+        self.document_types = frozenset(document_types) | {'general'}
+        self.registry = registry
+
+        self.stage_seconds = Histogram(
+            'docgen_stage_seconds', 'Time spent in each pipeline stage',
+            ('stage', 'document_type', 'language'), buckets=LATENCY_BUCKETS, registry=registry)
+        self.upstream_seconds = Histogram(
+            'docgen_upstream_seconds',
+            'Upstream call latency: waiting for admission (queue), until response headers (connect), '
+            'first token (ttft) and complete (total)',
+            ('phase', 'document_type', 'language'), buckets=LATENCY_BUCKETS, registry=registry)
+        self.upstream_responses = Counter(
+            'docgen_upstream_responses', 'Upstream call outcomes by HTTP status or transport failure',
+            ('status',), registry=registry)
+        self.cache_lookups = Counter(
+            'docgen_cache_lookups', 'Response cache, rendered-PDF reuse, in-flight request and Idempotency-Key lookups',
+            ('cache', 'result'), registry=registry)
+        self.pdf_bytes = Counter(
+            'docgen_pdf_bytes', 'Bytes of PDF rendered', ('document_type',), registry=registry)
+        self.temp_files = Gauge(
+            'docgen_temp_files', 'PDF files on disk awaiting expiry', registry=registry,
+            multiprocess_mode='livesum')
+        self.temp_bytes = Gauge(
+            'docgen_temp_bytes', 'Bytes of PDF files on disk awaiting expiry', registry=registry,
+            multiprocess_mode='livesum')
+
+    def label(self, document_type: str) -> str:
+        return document_type if document_type in self.document_types else 'other'
+
+    @contextmanager
+    def stage(self, stage: str, document_type: str, language: str):
+        """Time the enclosed block as one observation of ``stage``"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds.labels(stage, self.label(document_type), language).observe(
+                time.perf_counter() - started)
+
+    def observe_stage(self, stage: str, document_type: str, language: str, seconds: float):
+        self.stage_seconds.labels(stage, self.label(document_type), language).observe(seconds)
+
+    def observe_upstream(self, phase: str, document_type: str, language: str, seconds: float):
+        self.upstream_seconds.labels(phase, self.label(document_type), language).observe(seconds)
+
+    def upstream_response(self, status):
+        self.upstream_responses.labels(str(status)).inc()
+
+    def cache_lookup(self, cache: str, hit: bool):
+        self.cache_lookups.labels(cache, 'hit' if hit else 'miss').inc()
+
+    def pdf_rendered(self, document_type: str, size: int):
+        self.pdf_bytes.labels(self.label(document_type)).inc(size)
+
+    def temp_dir(self, janitor_stats: dict):
+        self.temp_files.set(janitor_stats['files'])
+        self.temp_bytes.set(janitor_stats['bytes'])
+
+    def render(self) -> tuple:
+        """(body, content type) of the Prometheus text exposition, across every worker when multi-process"""
+        registry = self.registry
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,360 @@
+"""Model routing per document type, with hedged requests and fallback on failure.
+
+Each document type routes to an ordered list of models, primary first. A
+call goes to the first model, and if that fails before answering, to the
+next. With hedging, a call the first model hasn't started answering by its
+recent p95 time to first output is also sent to the next model; whichever
+answers first is used and the other is abandoned. Whole non-streamed
+answers are only hedged once their p95 is known, since they legitimately
+take tens of seconds and a guessed deadline would send most of them twice. Recent latencies and
+outcomes per model drive both: hedge deadlines come from the latency
+samples, and a model failing most of its recent calls is tried after the
+healthy ones.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+
+# Route for document types without one of their own
+DEFAULT_ROUTE = '*'
+
+# Latency kinds: time to the first streamed token, and to a whole non-streamed answer
+LATENCY_KINDS = ('ttft', 'total')
+
+def parse_model_routes(spec: str) -> dict:
+    """"general=small,large;*=large,other" → {'general': ('small', 'large'), '*': ('large', 'other')}"""
+    routes = {}
+    for part in filter(None, (part.strip() for part in (spec or '').split(';'))):
+        document_type, _, models = part.partition('=')
+        models = tuple(filter(None, (model.strip() for model in models.split(','))))
+        if not document_type.strip() or not models:
+            raise ValueError(f"Model routes are written type=model,model;...: {part!r}")
+        routes[document_type.strip()] = models
+    return routes
+
+class ModelStats:
+    """Recent latencies per kind and recent call outcomes of one model"""
+
+    def __init__(self, window: int):
+        self.latencies = {kind: deque(maxlen=window) for kind in LATENCY_KINDS}
+        self.outcomes = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.hedges = 0
+        self.hedges_won = 0
+
+    def quantile(self, kind: str, q: float, min_samples: int = 1):
+        samples = sorted(self.latencies[kind])
+        if len(samples) < max(min_samples, 1):
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+    def error_rate(self, min_samples: int) -> float:
+        if len(self.outcomes) < min_samples:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+class ModelRouter:
+    """Routes calls to models per document type and runs them hedged.
+
+    ``routes`` maps document types (and DEFAULT_ROUTE) to models, primary
+    first. The hedge delay for a model is its ``hedge_quantile`` latency
+    times ``hedge_factor``, at least ``min_hedge``. Time to first token is
+    capped at ``max_hedge`` and is ``default_hedge`` until the model has
+    ``min_samples`` samples; whole answers are not capped and are not
+    hedged until then.
+    """
+
+    def __init__(self, routes: dict, hedging: bool = True, hedge_quantile: float = 0.95,
+                 hedge_factor: float = 1.0, min_hedge: float = 0.25, max_hedge: float = 10.0,
+                 default_hedge: float = 5.0, min_samples: int = 20, error_threshold: float = 0.5,
+                 window: int = 200):
+        if DEFAULT_ROUTE not in routes:
+            raise ValueError(f"Model routes need a default ({DEFAULT_ROUTE!r}) route")
+        self.routes = {document_type: tuple(models) for document_type, models in routes.items()}
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.hedge_factor = hedge_factor
+        self.min_hedge = min_hedge
+        self.max_hedge = max_hedge
+        self.default_hedge = default_hedge
+        self.min_samples = min_samples
+        self.error_threshold = error_threshold
+        self.window = window
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model: str) -> ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats.setdefault(model, ModelStats(self.window))
+        return stats
+
+    def primary(self, document_type: str) -> str:
+        """The configured first model for a document type"""
+        return self.routes.get(document_type, self.routes[DEFAULT_ROUTE])[0]
+
+    def models(self, document_type: str) -> list:
+        """Models to try for a document type, healthy ones first, each group in route order"""
+        route = self.routes.get(document_type, self.routes[DEFAULT_ROUTE])
+        with self._lock:
+            failing = {model for model in route
+                       if self._model(model).error_rate(self.min_samples // 4 or 1) > self.error_threshold}
+        return sorted(route, key=lambda model: model in failing)
+
+    def record(self, model: str, kind: str, seconds: float):
+        """A successful call and its latency to first output"""
+        with self._lock:
+            stats = self._model(model)
+            stats.latencies[kind].append(seconds)
+            stats.outcomes.append(True)
+            stats.calls += 1
+
+    def record_error(self, model: str):
+        with self._lock:
+            stats = self._model(model)
+            stats.outcomes.append(False)
+            stats.calls += 1
+            stats.failures += 1
+
+    def _record_hedge(self, model: str, won: bool = False):
+        with self._lock:
+            stats = self._model(model)
+            if won:
+                stats.hedges_won += 1
+            else:
+                stats.hedges += 1
+
+    def hedge_delay(self, model: str, kind: str):
+        """Seconds to wait for a model's first output before racing the next model against it, or None not to"""
+        with self._lock:
+            latency = self._model(model).quantile(kind, self.hedge_quantile, self.min_samples)
+        if kind == 'total':
+            return None if latency is None else max(latency * self.hedge_factor, self.min_hedge)
+        if latency is None:
+            return self.default_hedge
+        return min(max(latency * self.hedge_factor, self.min_hedge), self.max_hedge)
+
+    def _sequential(self, models: list, attempt, final: tuple):
+        error = None
+        for model in models:
+            items = iter(attempt(model, False))
+            produced = False
+            try:
+                for item in items:
+                    produced = True
+                    yield model, item
+                if produced:
+                    return
+            except Exception as e:
+                if produced or isinstance(e, final):
+                    raise
+                error = e
+            finally:
+                close = getattr(items, 'close', None)
+                if close:
+                    close()
+        if error:
+            raise error
+
+    def hedged(self, models: list, attempt, kind: str, final: tuple = ()):
+        """Yield (model, item) for the items of the first model to produce one.
+
+        ``attempt(model, hedge)`` returns an iterator of items; ``hedge`` is
+        True for a call raced against a slower one, which should only use
+        spare capacity. An attempt that fails or ends before its first item
+        hands over to the next model, unless its exception is one of the
+        ``final`` types. Once an attempt has produced an item the others are
+        stopped, and its own later failure is raised.
+        """
+        if not self.hedging or len(models) < 2:
+            yield from self._sequential(models, attempt, final)
+            return
+
+        events = queue.Queue()
+        stops, hedges, running = [], set(), set()
+
+        def pump(index: int, model: str, hedge: bool):
+            items = None
+            try:
+                items = iter(attempt(model, hedge))
+                for item in items:
+                    if stops[index].is_set():
+                        return
+                    events.put((index, 'item', item))
+                events.put((index, 'end', None))
+            except Exception as e:
+                events.put((index, 'error', e))
+            finally:
+                close = getattr(items, 'close', None)
+                if close:
+                    close()
+
+        def start(hedge: bool):
+            index = len(stops)
+            stops.append(threading.Event())
+            running.add(index)
+            if hedge:
+                hedges.add(index)
+                self._record_hedge(models[index])
+            threading.Thread(target=pump, args=(index, models[index], hedge), daemon=True,
+                             name=f"hedge-{models[index]}").start()
+            delay = self.hedge_delay(models[index], kind)
+            return None if delay is None else time.monotonic() + delay
+
+        hedge_at = start(False)
+        winner, error = None, None
+        try:
+            while True:
+                timeout = None
+                if winner is None and hedge_at is not None and len(stops) < len(models):
+                    timeout = max(hedge_at - time.monotonic(), 0.0)
+                try:
+                    index, event, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    # Nothing from the running model(s) in time: race the next one against them
+                    hedge_at = start(True)
+                    continue
+
+                if winner is None:
+                    if event == 'item':
+                        winner = index
+                        for other in running - {index}:
+                            stops[other].set()
+                        if index in hedges:
+                            self._record_hedge(models[index], won=True)
+                    else:
+                        running.discard(index)
+                        error = value if event == 'error' else error
+                        if running:
+                            continue
+                        if len(stops) == len(models) or isinstance(error, final):
+                            if error:
+                                raise error
+                            return
+                        hedge_at = start(False)
+                        continue
+
+                if index != winner:
+                    continue
+                if event == 'item':
+                    yield models[index], value
+                elif event == 'end':
+                    return
+                else:
+                    raise value
+        finally:
+            for stop in stops:
+                stop.set()
+
+    async def _sequential_async(self, models: list, attempt, final: tuple):
+        error = None
+        for model in models:
+            items = attempt(model, False)
+            produced = False
+            try:
+                async for item in items:
+                    produced = True
+                    yield model, item
+                if produced:
+                    return
+            except Exception as e:
+                if produced or isinstance(e, final):
+                    raise
+                error = e
+            finally:
+                await items.aclose()
+        if error:
+            raise error
+
+    async def hedged_async(self, models: list, attempt, kind: str, final: tuple = ()):
+        """Async counterpart of hedged; ``attempt`` returns an async generator and losers are cancelled"""
+        if not self.hedging or len(models) < 2:
+            async for result in self._sequential_async(models, attempt, final):
+                yield result
+            return
+
+        events = asyncio.Queue()
+        tasks, hedges, running = [], set(), set()
+
+        async def pump(index: int, model: str, hedge: bool):
+            items = attempt(model, hedge)
+            try:
+                async for item in items:
+                    events.put_nowait((index, 'item', item))
+                events.put_nowait((index, 'end', None))
+            except Exception as e:
+                events.put_nowait((index, 'error', e))
+            finally:
+                await items.aclose()
+
+        def start(hedge: bool):
+            index = len(tasks)
+            running.add(index)
+            if hedge:
+                hedges.add(index)
+                self._record_hedge(models[index])
+            tasks.append(asyncio.create_task(pump(index, models[index], hedge)))
+            delay = self.hedge_delay(models[index], kind)
+            return None if delay is None else time.monotonic() + delay
+
+        hedge_at = start(False)
+        winner, error = None, None
+        try:
+            while True:
+                timeout = None
+                if winner is None and hedge_at is not None and len(tasks) < len(models):
+                    timeout = max(hedge_at - time.monotonic(), 0.0)
+                try:
+                    index, event, value = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    hedge_at = start(True)
+                    continue
+
+                if winner is None:
+                    if event == 'item':
+                        winner = index
+                        for other in running - {index}:
+                            tasks[other].cancel()
+                        if index in hedges:
+                            self._record_hedge(models[index], won=True)
+                    else:
+                        running.discard(index)
+                        error = value if event == 'error' else error
+                        if running:
+                            continue
+                        if len(tasks) == len(models) or isinstance(error, final):
+                            if error:
+                                raise error
+                            return
+                        hedge_at = start(False)
+                        continue
+
+                if index != winner:
+                    continue
+                if event == 'item':
+                    yield models[index], value
+                elif event == 'end':
+                    return
+                else:
+                    raise value
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {}
+            for model, stats in sorted(self._stats.items()):
+                latency = {f"{kind}_{name}": round(value, 3)
+                           for kind in LATENCY_KINDS
+                           for name, q in (('p50', 0.5), ('p95', self.hedge_quantile))
+                           if (value := stats.quantile(kind, q)) is not None}
+                models[model] = {'calls': stats.calls, 'failures': stats.failures,
+                                 'error_rate': round(stats.error_rate(1), 3), 'hedges': stats.hedges,
+                                 'hedges_won': stats.hedges_won, **latency}
+        return {'hedging': self.hedging, 'routes': {document_type: list(models_) for document_type, models_
+                                                    in self.routes.items()}, 'models': models}
@@ -0,0 +1,199 @@
+"""Pooled HTTP client for the NVIDIA NIM upstream with retries and a circuit breaker"""
+
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limiting and transient gateway/server failures
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class UpstreamError(Exception):
+    """Non-200 response from the NIM upstream"""
+
+    def __init__(self, status_code: int, text: str = "", retry_after: float = None):
+        super().__init__(f"API request failed: {status_code} - {text[:200]}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class CircuitOpenError(Exception):
+    """Raised without contacting the upstream while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"NVIDIA API temporarily unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Closed → open after consecutive failures → half-open probe after a cool-down"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self) -> bool:
+        """Raise CircuitOpenError unless a request may go upstream right now; True if it is the half-open probe"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            # Half-open lets exactly one probe through; everyone else keeps failing fast
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            raise CircuitOpenError(max(remaining, 1.0))
+
+    def abandon_probe(self):
+        """Let another probe through after one ended without an outcome (cancelled, or a bug on our side)"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("NIM circuit breaker closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"NIM circuit breaker opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+def parse_retry_after(value: str):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class NIMClient:
+    """Keep-alive client for the NIM chat completions API.
+
+    One instance (and so one connection pool) is shared per worker process.
+    The pool is bounded and blocking, so at most ``pool_size`` sockets are
+    ever open to the upstream. 429s and successes are reported to
+    ``admission`` (an AdmissionController) when one is given.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 8, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_cap: float = 8.0, max_retry_after: float = 10.0,
+                 breaker: CircuitBreaker = None, admission=None):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.breaker = breaker or CircuitBreaker()
+        self.admission = admission
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def backoff_delay(self, attempt: int, retry_after: float = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def post(self, path: str, payload: dict, headers: dict, timeout: float = 30, stream: bool = False) -> requests.Response:
+        """POST to the upstream, retrying transient failures.
+
+        Returns the successful (200) response; raises UpstreamError,
+        CircuitOpenError or a requests exception otherwise. Streamed responses
+        are only retried before any body has been read, so retries are safe.
+        """
+        url = f"{self.base_url}{path}"
+        attempt = 0
+
+        while True:
+            probe = self.breaker.before_request()
+
+            try:
+                response = self.session.post(url, headers=headers, json=payload, timeout=timeout, stream=stream)
+                body = response.text if response.status_code != 200 else None
+            except requests.exceptions.RequestException as e:
+                # Any transport failure counts against the breaker; only dropped connections and timeouts are retried
+                self.breaker.record_failure()
+                transient = isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                if not transient or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"NIM request error ({e.__class__.__name__}), retrying in {delay:.2f}s")
+            except BaseException:
+                if probe:
+                    self.breaker.abandon_probe()
+                raise
+            else:
+                if response.status_code == 200:
+                    self.breaker.record_success()
+                    if self.admission:
+                        self.admission.record_success()
+                    return response
+
+                error = UpstreamError(
+                    response.status_code,
+                    body,
+                    parse_retry_after(response.headers.get('Retry-After'))
+                )
+                response.close()
+
+                # Rate limiting shrinks the admission budget for every caller in this process
+                if response.status_code == 429 and self.admission:
+                    self.admission.record_throttle(error.retry_after)
+
+                # Only server-side failures count against the breaker; 4xx are our problem
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+
+                if response.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    raise error
+                if error.retry_after is not None and error.retry_after > self.max_retry_after:
+                    raise error
+
+                delay = self.backoff_delay(attempt, error.retry_after)
+                logger.warning(f"NIM returned {response.status_code}, retrying in {delay:.2f}s")
+
+            time.sleep(delay)
+            attempt += 1
+
+    def chat_completions(self, payload: dict, headers: dict, timeout: float = 30, stream: bool = False) -> requests.Response:
+        return self.post('/chat/completions', payload, headers, timeout=timeout, stream=stream)
@@ -0,0 +1,378 @@
+"""Local stand-in for the NVIDIA NIM chat completions API, for load tests that shouldn't spend credits.
+
+    python nim_stub.py --port 8001 --latency lognormal:0.8,0.4 --token-rate 40 --errors 429=0.02,503=0.01
+    NVIDIA_BASE_URL=http://127.0.0.1:8001/v1 NVIDIA_API_KEY=stub gunicorn app:app
+
+POST /v1/chat/completions answers with a canned Indian document chosen from
+the request's system prompt and language, streamed as SSE when the payload
+has "stream": true. The time to the first token is drawn from the latency
+distribution. The tokens then follow at the token rate. Responses honour
+max_tokens (finish_reason "length") and report usage. A fraction of
+requests can be failed with given status codes; 429s carry Retry-After.
+Named fake models can override the latency, token rate and error rates, to
+stand in for a fast and a slow model behind one endpoint. GET /stats
+reports what was served.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from prompts import estimate_tokens, prompt_language
+
+class Latency:
+    """A delay distribution written as "kind:params", in seconds.
+
+    fixed:S, uniform:LOW,HIGH, normal:MEAN,SD, lognormal:MEDIAN,SIGMA and
+    exponential:MEAN. Samples are never negative.
+    """
+
+    KINDS = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2, 'exponential': 1}
+
+    def __init__(self, spec: str):
+        kind, _, params = spec.partition(':')
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution {kind!r}; use one of {', '.join(self.KINDS)}")
+        try:
+            values = [float(value) for value in params.split(',')] if params else []
+        except ValueError:
+            raise ValueError(f"Latency parameters must be numbers: {spec!r}")
+        if len(values) != self.KINDS[kind]:
+            raise ValueError(f"{kind} latency takes {self.KINDS[kind]} parameter(s): {spec!r}")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+
+    def sample(self) -> float:
+        if self.kind == 'fixed':
+            return max(self.values[0], 0.0)
+        a, b = self.values[0], self.values[-1]
+        if self.kind == 'uniform':
+            return random.uniform(a, b)
+        if self.kind == 'normal':
+            return max(random.gauss(a, b), 0.0)
+        if self.kind == 'lognormal':
+            return random.lognormvariate(math.log(a), b) if a > 0 else 0.0
+        return random.expovariate(1 / a) if a > 0 else 0.0
+
+def parse_error_rates(spec: str) -> dict:
+    """"429=0.02,503=0.01" → {429: 0.02, 503: 0.01}"""
+    rates = {}
+    for part in filter(None, (part.strip() for part in (spec or '').split(','))):
+        status, _, rate = part.partition('=')
+        rates[int(status)] = float(rate)
+    if sum(rates.values()) > 1:
+        raise ValueError(f"Error rates add up to more than 1: {spec!r}")
+    return rates
+
+def parse_fake_model(spec: str) -> tuple:
+    """"meta/llama-3.1-8b-instruct=fixed:0.1" → ('meta/llama-3.1-8b-instruct', FakeModel(Latency('fixed:0.1')))"""
+    name, _, latency = spec.rpartition('=')
+    if not name:
+        raise ValueError(f"Fake models are written NAME=LATENCY: {spec!r}")
+    return name, FakeModel(Latency(latency))
+
+class FakeModel:
+    """Behaviour of one model name; None falls back to the stub's own setting"""
+
+    def __init__(self, latency: Latency = None, token_rate: float = None, error_rates: dict = None):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.error_rates = error_rates
+
+# (marker in the system prompt, document type); the first match wins
+DOCUMENT_MARKERS = (
+    ('JSON object', 'fields'),
+    ('legal document specialist', 'affidavit'),
+    ('business communication', 'letter'),
+    ('contract law', 'contract'),
+    ('certification authority', 'certificate'),
+    ('application specialist', 'application'),
+)
+
+# {reference} makes every answer, and so every rendered PDF, distinct
+CANNED_OUTPUTS = {
+    ('affidavit', 'en'): """AFFIDAVIT
+
+I, Rahul Sharma, son of Ramesh Sharma, aged 30 years, resident of 45 Gandhi Nagar, New Delhi 110031, do hereby solemnly affirm and declare as under:
+
+1. That I am a citizen of India and the deponent herein, and competent to swear this affidavit.
+2. That my correct name is Rahul Sharma and my date of birth is 01/01/1995.
+3. That this affidavit is required for correction of records (reference {reference}).
+4. That the statements made above are true and nothing material has been concealed.
+
+DEPONENT
+
+VERIFICATION
+
+Verified at New Delhi that the contents of this affidavit are true and correct to the best of my knowledge and belief.
+
+DEPONENT""",
+    ('affidavit', 'hi'): """शपथ पत्र
+
+मैं, राहुल शर्मा, पुत्र श्री रमेश शर्मा, आयु 30 वर्ष, निवासी 45 गांधी नगर, नई दिल्ली 110031, सत्यनिष्ठा से घोषणा करता हूं:
+
+1. कि मैं भारत का नागरिक हूं और इस शपथ पत्र का शपथकर्ता हूं।
+2. कि मेरा सही नाम राहुल शर्मा है और मेरी जन्म तिथि 01/01/1995 है।
+3. कि यह शपथ पत्र अभिलेखों में सुधार हेतु आवश्यक है (संदर्भ {reference})।
+
+शपथकर्ता
+
+सत्यापन
+
+मैं सत्यापित करता हूं कि उपरोक्त विवरण मेरी जानकारी के अनुसार सत्य है।
+
+शपथकर्ता""",
+    ('letter', 'en'): """To,
+The Branch Manager,
+State Bank of India, Connaught Place, New Delhi 110001
+
+Date: 12/03/2025
+
+Subject: Request to update registered mobile number (reference {reference})
+
+Dear Sir/Madam,
+
+I hold savings account number 12345678901 at your branch. I request you to update my registered mobile number to +91-9876543210 with immediate effect, as my previous number is no longer in use.
+
+I have enclosed a self-attested copy of my Aadhaar card for verification.
+
+Thanking you,
+Yours faithfully,
+Rahul Sharma""",
+    ('contract', 'en'): """RENT AGREEMENT
+
+This Rent Agreement (reference {reference}) is made at New Delhi on 12/03/2025 between Ramesh Sharma, hereinafter called the LESSOR, and Rahul Sharma, hereinafter called the LESSEE.
+
+WHEREAS the Lessor is the owner of the premises at 45 Gandhi Nagar, New Delhi 110031;
+
+1. That the monthly rent shall be Rs. 15,000, payable on or before the 5th day of each month.
+2. That the Lessee has paid a security deposit of Rs. 30,000, refundable without interest on vacating the premises.
+3. That the tenancy shall be for eleven months, renewable by mutual consent.
+4. That either party may terminate this agreement with one month's written notice.
+
+IN WITNESS WHEREOF the parties have signed this agreement on the date above.
+
+LESSOR                                  LESSEE""",
+    ('certificate', 'en'): """EXPERIENCE CERTIFICATE
+
+Certificate No. {reference}
+
+This is to certify that Mr. Rahul Sharma, son of Ramesh Sharma, worked with Infosys Technologies Ltd. as a Software Engineer from 01/06/2019 to 31/05/2024.
+
+During his tenure his conduct and performance were found to be good. We wish him success in his future endeavours.
+
+Authorised Signatory
+Infosys Technologies Ltd., Bengaluru""",
+    ('application', 'en'): """To,
+The Principal,
+Government Senior Secondary School, New Delhi 110001
+
+Date: 12/03/2025
+
+Subject: Application for leave of absence (reference {reference})
+
+Respected Sir/Madam,
+
+I, Rahul Sharma, a student of class 10-B, request leave for three days, from 12th March to 14th March, due to a family function.
+
+I request you to kindly grant me leave for the above period. I will complete the work missed during my absence.
+
+Thanking you,
+Yours obediently,
+Rahul Sharma
+Class 10-B""",
+    ('application', 'hi'): """सेवा में,
+श्रीमान प्रधानाचार्य जी,
+राजकीय वरिष्ठ माध्यमिक विद्यालय, नई दिल्ली 110001
+
+विषय: अवकाश हेतु आवेदन पत्र (संदर्भ {reference})
+
+आदरणीय महोदय,
+
+सविनय निवेदन है कि मैं राहुल शर्मा, कक्षा 10-ब का छात्र हूं। पारिवारिक कार्यक्रम के कारण मैं 12 मार्च से 14 मार्च तक विद्यालय नहीं आ सकूंगा।
+
+अतः आपसे विनम्र निवेदन है कि मुझे तीन दिन का अवकाश प्रदान करें। मैं आपका आभारी रहूंगा।
+
+धन्यवाद सहित,
+आपका आज्ञाकारी शिष्य
+राहुल शर्मा""",
+    ('general', 'en'): """An affidavit is a written statement confirmed by oath, used as evidence in India. Draft it on stamp paper of the value your state prescribes, have it signed before a notary or oath commissioner, and keep a copy (reference {reference}).""",
+}
+
+class NIMStub:
+    """The chat completions stand-in: canned outputs, latency, token pacing and error injection"""
+
+    def __init__(self, latency: Latency = None, token_rate: float = 50.0, error_rates: dict = None,
+                 retry_after: float = 1.0, outputs: dict = CANNED_OUTPUTS, models: dict = None):
+        self.latency = latency or Latency('fixed:0')
+        self.token_rate = token_rate
+        self.error_rates = error_rates or {}
+        self.retry_after = retry_after
+        self.outputs = outputs
+        self.models = models or {}
+        self._statuses = {}
+        self._models = {}
+        self._streams = 0
+        self._served = 0
+        self._lock = threading.Lock()
+
+    def document_for(self, payload: dict) -> tuple:
+        """(document type, language) the request is asking for"""
+        messages = payload.get('messages') or [{}]
+        system = next((m.get('content', '') for m in messages if m.get('role') == 'system'), '')
+        user = messages[-1].get('content', '')
+        document_type = next((kind for marker, kind in DOCUMENT_MARKERS if marker in system), 'general')
+        return document_type, prompt_language(user)
+
+    def completion(self, payload: dict) -> tuple:
+        """(text, tokens, finish reason) for a request, cut to its max_tokens"""
+        document_type, language = self.document_for(payload)
+        if document_type == 'fields':
+            fields = re.search(r'Fields: (\[.*\])', payload['messages'][-1].get('content', ''))
+            text = json.dumps({field: None for field in json.loads(fields.group(1))} if fields else {})
+            return text, [text], 'stop'
+
+        with self._lock:
+            self._served += 1
+            reference = f"STUB-{self._served:06d}"
+        template = self.outputs.get((document_type, language)) or self.outputs.get((document_type, 'en')) \
+            or self.outputs[('general', 'en')]
+        # Whole words (with their trailing whitespace) stand in for tokens
+        tokens = re.findall(r'\S+\s*', template.format(reference=reference))
+        max_tokens = payload.get('max_tokens') or len(tokens)
+        if len(tokens) > max_tokens:
+            return ''.join(tokens[:max_tokens]), tokens[:max_tokens], 'length'
+        return ''.join(tokens), tokens, 'stop'
+
+    def behaviour(self, model: str) -> tuple:
+        """(latency, token rate, error rates) for a model name"""
+        fake = self.models.get(model) or FakeModel()
+        return (fake.latency or self.latency, self.token_rate if fake.token_rate is None else fake.token_rate,
+                self.error_rates if fake.error_rates is None else fake.error_rates)
+
+    def injected_error(self, error_rates: dict):
+        roll = random.random()
+        for status, rate in error_rates.items():
+            if roll < rate:
+                return status
+            roll -= rate
+        return None
+
+    def count(self, status: int, stream: bool = False, model: str = None):
+        with self._lock:
+            self._statuses[status] = self._statuses.get(status, 0) + 1
+            self._streams += stream
+            if model is not None:
+                self._models[model] = self._models.get(model, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'statuses': {str(status): n for status, n in sorted(self._statuses.items())},
+                    'streams': self._streams, 'models': dict(sorted(self._models.items())),
+                    'latency': self.latency.spec, 'token_rate': self.token_rate,
+                    'error_rates': {str(status): rate for status, rate in self.error_rates.items()}}
+
+    async def chat_completions(self, request: Request):
+        try:
+            payload = await request.json()
+        except ValueError:
+            self.count(400)
+            return JSONResponse({'error': 'Invalid JSON body'}, status_code=400)
+
+        model = payload.get('model', 'stub')
+        latency, token_rate, error_rates = self.behaviour(model)
+        await asyncio.sleep(latency.sample())
+        status = self.injected_error(error_rates)
+        if status:
+            self.count(status, model=model)
+            headers = {'Retry-After': f"{self.retry_after:g}"} if status == 429 else {}
+            return JSONResponse({'error': f"Injected {status} from the NIM stub"}, status_code=status,
+                                headers=headers)
+
+        text, tokens, finish_reason = self.completion(payload)
+        usage = {'prompt_tokens': sum(estimate_tokens(m.get('content', '')) for m in payload.get('messages', [])),
+                 'completion_tokens': len(tokens)}
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        created = int(time.time())
+        pace = 1 / token_rate if token_rate > 0 else 0
+
+        if not payload.get('stream'):
+            self.count(200, model=model)
+            await asyncio.sleep(len(tokens) * pace)
+            return JSONResponse({
+                'id': f"chatcmpl-stub-{created}", 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text},
+                             'finish_reason': finish_reason}],
+                'usage': usage,
+            })
+
+        self.count(200, stream=True, model=model)
+
+        def chunk(delta: dict, reason=None) -> str:
+            return "data: " + json.dumps({
+                'id': f"chatcmpl-stub-{created}", 'object': 'chat.completion.chunk', 'created': created,
+                'model': model, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': reason}],
+            }, ensure_ascii=False) + "\n\n"
+
+        async def events():
+            yield chunk({'role': 'assistant'})
+            for token in tokens:
+                yield chunk({'content': token})
+                if pace:
+                    await asyncio.sleep(pace)
+            yield chunk({}, finish_reason)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type='text/event-stream')
+
+    def app(self) -> Starlette:
+        async def stats(request):
+            return JSONResponse(self.stats())
+
+        return Starlette(routes=[
+            Route('/v1/chat/completions', self.chat_completions, methods=['POST']),
+            Route('/stats', stats),
+        ])
+
+def serve_in_thread(stub: NIMStub, host: str = '127.0.0.1', port: int = 0):
+    """Run the stub under uvicorn on a daemon thread; returns (server, base URL for NVIDIA_BASE_URL)"""
+    sock = socket.socket()
+    sock.bind((host, port))
+    config = uvicorn.Config(stub.app(), log_level='error', backlog=4096, limit_concurrency=None)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://{host}:{sock.getsockname()[1]}/v1"
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local stand-in for the NVIDIA NIM chat completions API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=Latency, default=Latency('lognormal:0.5,0.4'),
+                        help='time to first token, e.g. fixed:0.3, uniform:0.2,0.8 or lognormal:0.5,0.4')
+    parser.add_argument('--token-rate', type=float, default=50.0, help='tokens per second after the first (0: instant)')
+    parser.add_argument('--errors', type=parse_error_rates, default={},
+                        help='fraction of requests to fail per status, e.g. 429=0.02,503=0.01')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds on injected 429s')
+    parser.add_argument('--model', type=parse_fake_model, action='append', default=[],
+                        help='latency for one model name, e.g. meta/llama-3.1-8b-instruct=fixed:0.1 (repeatable)')
+    args = parser.parse_args()
+
+    stub = NIMStub(args.latency, args.token_rate, args.errors, args.retry_after, models=dict(args.model))
+    print(f"NIM stub on http://{args.host}:{args.port}/v1 (latency {args.latency.spec}, "
+          f"{args.token_rate:g} tokens/s, errors {args.errors or 'none'})")
+    uvicorn.run(stub.app(), host=args.host, port=args.port, log_level='warning', backlog=4096)
@@ -0,0 +1,97 @@
+"""Process-wide font registry for PDF rendering.
+
+TrueType families are parsed and registered with ReportLab once per
+process, never per request. ReportLab embeds TrueType fonts as subsets,
+so a PDF only carries the glyphs its text actually uses.
+"""
+
+import logging
+import os
+import threading
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+logger = logging.getLogger(__name__)
+
+# Built into every PDF viewer, so nothing is embedded; Latin only
+BUILTIN_FAMILY = ('Helvetica', 'Helvetica-Bold')
+
+# Devanagari+Latin families in order of preference: (name, regular file, bold file)
+DEVANAGARI_FAMILIES = (
+    ('NotoSansDevanagari', 'NotoSansDevanagari-Regular.ttf', 'NotoSansDevanagari-Bold.ttf'),
+    ('Mukta', 'Mukta-Regular.ttf', 'Mukta-Bold.ttf'),
+    ('Lohit-Devanagari', 'Lohit-Devanagari.ttf', None),
+)
+
+# Noto Sans Devanagari ships with the app (SIL OFL, see fonts/OFL.txt), so no host needs a system font
+BUNDLED_FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+SYSTEM_FONT_DIRS = (
+    '/usr/share/fonts/truetype/noto',
+    '/usr/share/fonts/noto',
+    '/usr/share/fonts/opentype/noto',
+    '/usr/share/fonts/truetype/lohit-devanagari',
+    '/usr/share/fonts/truetype/fonts-deva-extra',
+)
+
+def default_font_dirs() -> list:
+    """$PDF_FONT_DIR, then the bundled fonts/ directory, then common system locations"""
+    dirs = [os.getenv('PDF_FONT_DIR', ''), BUNDLED_FONT_DIR, *SYSTEM_FONT_DIRS]
+    return [path for path in dirs if path]
+
+class FontRegistry:
+    """Resolves a (regular, bold) font family per language, registering each TTF at most once"""
+
+    def __init__(self, font_dirs=None, families=DEVANAGARI_FAMILIES):
+        self.font_dirs = list(font_dirs) if font_dirs is not None else default_font_dirs()
+        self.families = families
+        self._devanagari = None
+        self._lock = threading.Lock()
+
+    def family_for(self, language: str) -> tuple:
+        """Font names for 'hi' or 'en'; English stays on the built-in Helvetica"""
+        if language != 'hi':
+            return BUILTIN_FAMILY
+        if self._devanagari is None:
+            with self._lock:
+                if self._devanagari is None:
+                    self._devanagari = self._load_devanagari()
+        return self._devanagari
+
+    @property
+    def has_devanagari(self) -> bool:
+        return self.family_for('hi') != BUILTIN_FAMILY
+
+    def _find(self, filename: str):
+        for directory in self.font_dirs:
+            path = os.path.join(directory, filename)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _load_devanagari(self) -> tuple:
+        for name, regular_file, bold_file in self.families:
+            regular_path = self._find(regular_file)
+            if not regular_path:
+                continue
+            bold_path = self._find(bold_file) if bold_file else None
+            try:
+                regular = register_ttf(name, regular_path)
+                bold = register_ttf(f"{name}-Bold", bold_path) if bold_path else regular
+            except Exception as e:
+                logger.warning(f"Could not load font {regular_path}: {e}")
+                continue
+            pdfmetrics.registerFontFamily(name, normal=regular, bold=bold, italic=regular, boldItalic=bold)
+            logger.info(f"Registered Devanagari font family {name} from {os.path.dirname(regular_path)}")
+            return (regular, bold)
+
+        logger.warning(f"No Devanagari font found in {self.font_dirs}; Hindi PDFs fall back to Helvetica")
+        return BUILTIN_FAMILY
+
+def register_ttf(name: str, path: str) -> str:
+    """Parse and register a TTF under ``name`` unless a font of that name is already registered"""
+    if name not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(name, path))
+    return name
+
+FONT_REGISTRY = FontRegistry()
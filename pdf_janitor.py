@@ -0,0 +1,167 @@
+"""Background janitor for the PDF files this worker process writes to disk"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class FileJanitor:
+    """Expires tracked files from an in-memory heap, without scanning directories.
+
+    Files are indexed by expiry time, so finding the next file to delete is
+    O(1) and tracking or expiring one is O(log n). A total file-count and
+    byte quota is enforced on every ``track`` by deleting the files closest
+    to expiry first. One daemon thread per process does the timed deletes;
+    it is started lazily and restarted after a fork.
+    """
+
+    def __init__(self, ttl: float = 3600, max_files: int = 1000, max_bytes: int = 512 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._reset()
+
+        if hasattr(os, 'register_at_fork'):
+            # Gunicorn forks workers from the master; each worker gets its own index and thread
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._heap = []  # (expires_at, seq, path)
+        self._files = {}  # path -> (expires_at, seq, size)
+        self._bytes = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.removed = 0
+
+    def track(self, path: str, size: int, ttl: float = None):
+        """Schedule ``path`` for deletion after ``ttl`` seconds"""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._cond:
+            if path in self._files:
+                self._forget(path)
+
+            seq = next(self._seq)
+            self._files[path] = (expires_at, seq, size)
+            self._bytes += size
+            heapq.heappush(self._heap, (expires_at, seq, path))
+
+            over_quota = self._pop_over_quota()
+
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name='pdf-janitor', daemon=True)
+                self._thread.start()
+            else:
+                # The new file may expire first: wake the thread so it re-arms its timer
+                self._cond.notify()
+
+        self._delete(over_quota)
+
+    def remove(self, path: str):
+        """Stop tracking ``path`` and delete it now"""
+        with self._cond:
+            if path not in self._files:
+                return
+            self._forget(path)
+        self._delete([path])
+
+    def __contains__(self, path: str) -> bool:
+        with self._cond:
+            return path in self._files
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'files': len(self._files),
+                'bytes': self._bytes,
+                'removed': self.removed,
+                'running': self._thread is not None and self._thread.is_alive(),
+            }
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread (files already on disk are left alone)"""
+        with self._cond:
+            self._stopping = True
+            thread = self._thread
+            self._cond.notify()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _forget(self, path: str):
+        # The heap entry is left behind and skipped when popped (lazy deletion)
+        _, _, size = self._files.pop(path)
+        self._bytes -= size
+
+    def _pop_valid(self):
+        """Pop the earliest heap entry that is still tracked, or None"""
+        while self._heap:
+            expires_at, seq, path = heapq.heappop(self._heap)
+            record = self._files.get(path)
+            if record is not None and record[1] == seq:
+                self._forget(path)
+                return path
+        return None
+
+    def _peek_expiry(self):
+        while self._heap:
+            expires_at, seq, path = self._heap[0]
+            record = self._files.get(path)
+            if record is not None and record[1] == seq:
+                return expires_at
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_over_quota(self) -> list:
+        victims = []
+        while len(self._files) > self.max_files or self._bytes > self.max_bytes:
+            path = self._pop_valid()
+            if path is None:
+                break
+            victims.append(path)
+        if victims:
+            logger.info(f"PDF janitor quota exceeded, removing {len(victims)} file(s)")
+        return victims
+
+    def _pop_expired(self, now: float) -> list:
+        expired = []
+        while True:
+            expires_at = self._peek_expiry()
+            if expires_at is None or expires_at > now:
+                return expired
+            expired.append(self._pop_valid())
+
+    def _delete(self, paths: list):
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not clean up {path}: {e}")
+                continue
+            removed += 1
+
+        if removed:
+            with self._cond:
+                self.removed += removed
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                expired = self._pop_expired(time.time())
+                if not expired:
+                    next_expiry = self._peek_expiry()
+                    timeout = None if next_expiry is None else max(next_expiry - time.time(), 0)
+                    self._cond.wait(timeout)
+                    continue
+
+            self._delete(expired)
+            logger.info(f"PDF janitor removed {len(expired)} expired file(s)")
@@ -0,0 +1,232 @@
+"""Precompiled per-document-type PDF layouts.
+
+Everything that is identical between requests (style sheets, the title,
+date and signature flowables, and the heading/closing classifiers) is
+built once per document type and language, so rendering only pays for
+the content. Hindi layouts use the Devanagari family from pdf_fonts.
+IncrementalDocTemplate lays a document out a few flowables at a time, for
+text that is still arriving.
+"""
+
+import copy
+import io
+import threading
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfgen import canvas
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Frame, PageTemplate
+
+from pdf_fonts import FONT_REGISTRY
+from text_normalizer import is_hindi
+
+# Bump when the rendered output changes so content-addressed PDFs are re-rendered
+LAYOUT_VERSION = 4
+
+HEADING_PREFIXES = ('1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.',
+                    'To,', 'Subject:', 'DEPONENT', 'VERIFICATION', 'WHEREAS')
+CLOSING_PHRASES = ('sincerely', 'faithfully', 'regards')
+LANGUAGES = ('en', 'hi')
+PLACE_LABELS = {'en': 'Place', 'hi': 'स्थान'}
+PAGE_SETUP = {'pagesize': A4, 'rightMargin': 60, 'leftMargin': 60, 'topMargin': 60, 'bottomMargin': 60}
+
+def printed_date() -> str:
+    """Today's date as printed under the title"""
+    return datetime.now().strftime("%B %d, %Y")
+
+def signature_details(user_data: dict) -> tuple:
+    """The signer's name and place printed under the signature line, from extracted user data"""
+    user_data = user_data or {}
+    return user_data.get('full_name'), user_data.get('place')
+
+_BASE_STYLES = getSampleStyleSheet()
+
+class LayoutStyles:
+    """Paragraph styles and the signature block in one font family"""
+
+    def __init__(self, regular_font: str, bold_font: str):
+        self.title_style = ParagraphStyle(
+            'Title',
+            parent=_BASE_STYLES['Title'],
+            fontSize=18,
+            spaceAfter=24,
+            alignment=TA_CENTER,
+            fontName=bold_font
+        )
+
+        self.heading_style = ParagraphStyle(
+            'Heading',
+            parent=_BASE_STYLES['Heading2'],
+            fontSize=13,
+            spaceAfter=12,
+            spaceBefore=16,
+            fontName=bold_font
+        )
+
+        self.normal_style = ParagraphStyle(
+            'Normal',
+            parent=_BASE_STYLES['Normal'],
+            fontSize=11,
+            spaceAfter=12,
+            leading=16,
+            fontName=regular_font
+        )
+
+        self.signature_style = ParagraphStyle(
+            'Signature',
+            parent=_BASE_STYLES['Normal'],
+            fontSize=10,
+            spaceAfter=8,
+            alignment=TA_RIGHT,
+            fontName=regular_font
+        )
+
+        self.signature_flowables = [
+            Spacer(1, 30),
+            Paragraph("_" * 35, self.signature_style),
+            Paragraph("Signature & Date", self.signature_style),
+        ]
+
+class LayoutTemplate:
+    """Styles, fixed flowables and paragraph classifiers for one document type"""
+
+    def __init__(self, document_type: str, heading_prefixes=HEADING_PREFIXES, closing_phrases=CLOSING_PHRASES,
+                 fonts=None):
+        self.document_type = document_type
+
+        # One style set per language; fonts are registered process-wide, not per layout
+        fonts = fonts or FONT_REGISTRY
+        self.styles = {language: LayoutStyles(*fonts.family_for(language)) for language in LANGUAGES}
+
+        # Tuples keep the checks in C: str.startswith takes a tuple, and lowercase
+        # substring search beats an IGNORECASE regex alternation
+        self.heading_prefixes = tuple(heading_prefixes)
+        self.closing_phrases = tuple(phrase.lower() for phrase in closing_phrases)
+
+        self._title_cache = {}
+        self._date_cache = {}
+        self._lock = threading.Lock()
+
+    def is_heading(self, para: str) -> bool:
+        return (para.isupper() and len(para) < 60) or para.startswith(self.heading_prefixes)
+
+    def is_closing(self, para: str) -> bool:
+        lowered = para.lower()
+        return any(phrase in lowered for phrase in self.closing_phrases)
+
+    def header_flowables(self, title: str, language: str = 'en') -> list:
+        """Title and date block; parsed Paragraphs are cached and handed out as copies"""
+        styles = self.styles[language]
+        current_date = printed_date()
+
+        with self._lock:
+            title_para = self._title_cache.get((title, language))
+            if title_para is None:
+                if len(self._title_cache) >= 32:
+                    self._title_cache.clear()
+                title_para = self._title_cache[(title, language)] = Paragraph(title.upper(), styles.title_style)
+
+            cached_date, date_para = self._date_cache.get(language, (None, None))
+            if cached_date != current_date:
+                date_para = Paragraph(f"<b>Date:</b> {current_date}", styles.normal_style)
+                self._date_cache[language] = (current_date, date_para)
+
+        return [copy.copy(title_para), Spacer(1, 20), copy.copy(date_para), Spacer(1, 16)]
+
+    def content_flowables(self, clean_text: str, language: str = 'en') -> list:
+        styles = self.styles[language]
+        elements = []
+        for para in clean_text.split('\n'):
+            para = para.strip()
+            if not para:
+                elements.append(Spacer(1, 6))
+                continue
+
+            if self.is_heading(para):
+                elements.append(Paragraph(para, styles.heading_style))
+            else:
+                elements.append(Paragraph(para, styles.normal_style))
+
+                # Extra spacing after certain phrases
+                if self.is_closing(para):
+                    elements.append(Spacer(1, 16))
+        return elements
+
+    def signature_flowables(self, language: str = 'en', user_data: dict = None) -> list:
+        """The signature block, with the signer's name and place when the request gave them"""
+        styles = self.styles[language]
+        flowables = [copy.copy(flowable) for flowable in styles.signature_flowables]
+        name, place = signature_details(user_data)
+        if name:
+            flowables.append(Paragraph(escape(name), styles.signature_style))
+        if place:
+            flowables.append(Paragraph(f"{PLACE_LABELS[language]}: {escape(place)}", styles.signature_style))
+        return flowables
+
+    def render(self, clean_text: str, title: str, language: str = None, user_data: dict = None) -> bytes:
+        """Lay out already-cleaned text and return the PDF bytes.
+
+        The font family follows ``language`` ('en' or 'hi'), detected from the
+        text when not given. ``user_data`` fills in the signature block.
+        """
+        if language is None:
+            language = 'hi' if is_hindi(clean_text) else 'en'
+
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, **PAGE_SETUP)
+
+        elements = self.header_flowables(title, language)
+        elements.extend(self.content_flowables(clean_text, language))
+        elements.extend(self.signature_flowables(language, user_data))
+
+        doc.build(elements)
+        return buffer.getvalue()
+
+class IncrementalDocTemplate(SimpleDocTemplate):
+    """A SimpleDocTemplate built a few flowables at a time: add() them in order, then finish().
+
+    Platypus places flowables strictly in order, so this gives the same pages
+    as one build() over the whole list; a flowable kept with the next one is
+    held back until that arrives. The steps are those of SimpleDocTemplate
+    and BaseDocTemplate.build in reportlab 4.0, without page callbacks.
+    """
+
+    def __init__(self, buffer, **options):
+        super().__init__(buffer, **options)
+        self._calc()
+        frame = Frame(self.leftMargin, self.bottomMargin, self.width, self.height, id='normal')
+        self.addPageTemplates([PageTemplate(id='First', frames=frame, pagesize=self.pagesize),
+                               PageTemplate(id='Later', frames=frame, pagesize=self.pagesize)])
+        self._held = []
+        self._started = False
+
+    def _handle(self, flowables: list):
+        if not self._started:
+            self._startBuild(None, canvas.Canvas)
+            self.canv._doctemplate = self
+            self._started = True
+        while flowables:
+            self.clean_hanging()
+            self.handle_flowable(flowables)
+
+    def add(self, flowables):
+        flowables = self._held + list(flowables)
+        ready = len(flowables)
+        while ready and flowables[ready - 1].getKeepWithNext():
+            ready -= 1
+        self._held = flowables[ready:]
+        self._handle(flowables[:ready])
+
+    def finish(self):
+        """Lay out anything held back and write the document to its buffer"""
+        self._handle(self._held)
+        self._held = []
+        del self.canv._doctemplate
+        self._endBuild()
+
+def build_layout_registry(document_types) -> dict:
+    """One precompiled layout per document type"""
+    return {document_type: LayoutTemplate(document_type) for document_type in document_types}
@@ -0,0 +1,134 @@
+"""Bounded, content-addressed in-process store for generated PDFs awaiting download"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class StoredPdf:
+    """A generated PDF held in memory, or spilled to disk if it was large"""
+
+    __slots__ = ('pdf_id', 'etag', 'filename', 'size', 'data', 'path', 'expires_at')
+
+    def __init__(self, pdf_id: str, etag: str, filename: str, size: int, data: bytes = None, path: str = None,
+                 expires_at: float = 0.0):
+        self.pdf_id = pdf_id
+        self.etag = etag
+        self.filename = filename
+        self.size = size
+        self.data = data
+        self.path = path
+        self.expires_at = expires_at
+
+def content_key(*parts) -> str:
+    """Hash of everything that determines a rendered PDF"""
+    material = json.dumps(parts, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+def short_id(key: str = None) -> str:
+    """Opaque 16-character download id (96 bits), derived from a content key or random"""
+    raw = bytes.fromhex(key)[:12] if key else os.urandom(12)
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+class PdfStore:
+    """LRU store of rendered PDFs keyed by opaque download ids.
+
+    When PDFs are stored under a content key, identical documents map to the
+    same id, so callers can look the key up and skip rendering. PDFs stay in memory unless they exceed ``spill_threshold`` bytes, in
+    which case they are written once to ``spill_dir`` and served from there.
+    In-memory bytes are bounded by ``max_bytes``; entries expire after ``ttl``.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, ttl: float = 3600,
+                 spill_threshold: int = 2 * 1024 * 1024, spill_dir: str = None, janitor=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir or tempfile.gettempdir()
+        self.janitor = janitor
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, data: bytes, filename: str, key: str = None) -> StoredPdf:
+        if not data:
+            raise ValueError("Cannot store an empty PDF")
+
+        pdf_id = short_id(key)
+        # Strong validator over the exact bytes: a re-render after eviction gets a new ETag
+        etag = hashlib.sha256(data).hexdigest()[:32]
+        entry = StoredPdf(pdf_id, etag, filename, len(data), expires_at=time.time() + self.ttl)
+
+        if len(data) > self.spill_threshold:
+            entry.path = os.path.join(self.spill_dir, f"doc_{pdf_id}_{os.urandom(4).hex()}.pdf")
+            with open(entry.path, 'wb') as f:
+                f.write(data)
+            if self.janitor is not None:
+                self.janitor.track(entry.path, entry.size, self.ttl)
+            logger.info(f"Spilled large PDF to disk: {entry.path}, {entry.size} bytes")
+        else:
+            entry.data = data
+
+        with self._lock:
+            if pdf_id in self._entries:
+                self._remove(pdf_id)
+            self._entries[pdf_id] = entry
+            if entry.data is not None:
+                self._bytes += entry.size
+            self._evict()
+
+        return entry
+
+    def get_by_key(self, key: str):
+        return self.get(short_id(key))
+
+    def get(self, pdf_id: str):
+        with self._lock:
+            entry = self._entries.get(pdf_id)
+            if entry is None:
+                return None
+            # Spilled files may already have been reclaimed by the janitor's disk quota
+            if entry.expires_at <= time.time() or (entry.path and self.janitor is not None
+                                                   and entry.path not in self.janitor):
+                self._remove(pdf_id)
+                return None
+            self._entries.move_to_end(pdf_id)
+            return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'memory_bytes': self._bytes,
+                'spilled': sum(1 for entry in self._entries.values() if entry.path),
+            }
+
+    def _evict(self):
+        now = time.time()
+        for pdf_id in [key for key, entry in self._entries.items() if entry.expires_at <= now]:
+            self._remove(pdf_id)
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, pdf_id: str):
+        entry = self._entries.pop(pdf_id)
+        if entry.data is not None:
+            self._bytes -= entry.size
+        if entry.path:
+            if self.janitor is not None:
+                self.janitor.remove(entry.path)
+                return
+            try:
+                os.remove(entry.path)
+            except OSError as e:
+                logger.warning(f"Could not remove spilled PDF {entry.path}: {e}")
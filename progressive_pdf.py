@@ -0,0 +1,121 @@
+"""Progressive PDF assembly: lay out a streamed document paragraph by paragraph while its text arrives.
+
+A streamed document's final text is only known once the stream ends:
+content rules rewrite it and may append whole blocks (a missing
+VERIFICATION, say), and the PDF text is cleaned from the result. Each line
+that has finished streaming goes through the same rewrites and cleaning on
+its own and is laid out straight away. At the end, the paragraphs laid out
+so far are checked against the final cleaned text. If they are its
+beginning, only the rest (the last line and anything appended) and the
+signature block are left to lay out. If not, because a guard phrase came
+later in the text or markup spanned lines, the partial layout is discarded
+and the document is rendered as usual.
+"""
+
+import io
+
+from content_rules import RuleSet
+from pdf_layouts import IncrementalDocTemplate, LayoutTemplate, PAGE_SETUP, printed_date
+from text_normalizer import is_hindi, normalize_for_pdf
+
+class ProgressivePdf:
+    """One streamed document: feed() it deltas, lay_out() when lines are waiting, then finish().
+
+    ``language`` is the expected language of the text, which picks the
+    content rules and fonts; a final text in the other language discards
+    the layout. Not thread-safe: calls must come one at a time.
+    """
+
+    def __init__(self, layout: LayoutTemplate, rule_set: RuleSet, title: str, language: str):
+        self.layout = layout
+        self.rule_set = rule_set
+        self.title = title
+        self.language = language
+        self.paragraphs = []  # cleaned lines laid out so far, '' between paragraphs
+        self.discarded = None  # why the layout so far can't be used, once it can't
+        self._partial = ''
+        self._lines = []
+        self._blocked = set()
+        self._blank = False
+        self._buffer = None
+        self._doc = None
+        self._date = None
+
+    def feed(self, delta: str) -> bool:
+        """Take the next streamed text; True when finished lines are waiting for lay_out()"""
+        if self.discarded:
+            return False
+        if '\n' not in delta:
+            self._partial += delta
+            return False
+        lines = (self._partial + delta).split('\n')
+        self._partial = lines.pop()
+        self._lines.extend(lines)
+        return True
+
+    def _start(self):
+        self._buffer = io.BytesIO()
+        self._doc = IncrementalDocTemplate(self._buffer, **PAGE_SETUP)
+        self._date = printed_date()
+        self._doc.add(self.layout.header_flowables(self.title, self.language))
+
+    def _clean(self, line: str) -> list:
+        """The cleaned lines a finished streamed line becomes, as validation and normalize_for_pdf would"""
+        # A guard phrase blocks its rule from the line it appears on onwards
+        self._blocked |= self.rule_set.blocked(line)
+        cleaned = []
+        for piece in self.rule_set.rewrite(line, self._blocked).replace('*', '').split('\n'):
+            piece = normalize_for_pdf(piece)
+            if not piece:
+                self._blank = True
+                continue
+            if self._blank and (self.paragraphs or cleaned):
+                cleaned.append('')
+            cleaned.append(piece)
+            self._blank = False
+        return cleaned
+
+    def lay_out(self):
+        """Clean the waiting lines and lay out their paragraphs"""
+        lines, self._lines = self._lines, []
+        if self.discarded:
+            return
+        try:
+            if self._doc is None:
+                self._start()
+            cleaned = [piece for line in lines for piece in self._clean(line)]
+            if cleaned:
+                self._doc.add(self.layout.content_flowables('\n'.join(cleaned), self.language))
+                self.paragraphs.extend(cleaned)
+        except Exception as e:
+            self.discarded = f"layout failed: {e}"
+
+    def _mismatch(self, clean_text: str, title: str, language: str):
+        if title != self.title:
+            return f"title is {title!r}, laid out as {self.title!r}"
+        if language != self.language:
+            return f"text is in {language}, laid out for {self.language}"
+        if self._date is not None and self._date != printed_date():
+            return "the printed date changed"
+        if clean_text.split('\n')[:len(self.paragraphs)] != self.paragraphs:
+            return "the final text differs from the streamed paragraphs"
+        return None
+
+    def finish(self, clean_text: str, title: str, user_data: dict = None):
+        """The PDF for the final cleaned text, or None (with ``discarded`` set) if the layout so far doesn't fit it"""
+        language = 'hi' if is_hindi(clean_text) else 'en'
+        self.discarded = self.discarded or self._mismatch(clean_text, title, language)
+        if self.discarded:
+            return None
+        try:
+            if self._doc is None:
+                self._start()
+            rest = clean_text.split('\n')[len(self.paragraphs):]
+            if rest:
+                self._doc.add(self.layout.content_flowables('\n'.join(rest), language))
+            self._doc.add(self.layout.signature_flowables(language, user_data))
+            self._doc.finish()
+        except Exception as e:
+            self.discarded = f"layout failed: {e}"
+            return None
+        return self._buffer.getvalue()
@@ -0,0 +1,391 @@
+"""Prompt assembly: system and user prompts precompiled per (document type, language), within a token budget.
+
+Only the section for the request's language is sent, and every instruction
+is sent once. A request whose message would push the prompt past its
+document type's budget has the message trimmed to fit.
+"""
+
+from text_normalizer import is_hindi
+
+SYSTEM_PROMPTS = {
+    'affidavit': """You are an expert Indian legal document specialist with 20+ years experience. Create PERFECT Indian affidavits following Supreme Court guidelines.
+
+CRITICAL REQUIREMENTS:
+✓ Use EXACT Indian legal format and terminology
+✓ Include proper verification clause as per Indian Evidence Act
+✓ Use "son/daughter of" format (not "s/o" or "d/o")
+✓ Include complete address with PIN code
+✓ Use formal legal language with "That" clauses
+✓ Add proper deponent signature blocks
+✓ Include notarization space
+
+STRUCTURE:
+AFFIDAVIT
+
+I, [FULL NAME], son/daughter of [FATHER'S NAME], aged [AGE] years, resident of [COMPLETE ADDRESS WITH PIN], do hereby solemnly affirm and declare as under:
+
+1. That I am the deponent herein and competent to swear to this affidavit.
+2. That [MAIN STATEMENT with specific details].
+3. That [SUPPORTING FACTS with evidence].
+4. That [ADDITIONAL CLAUSES as needed].
+5. That I undertake to inform concerned authorities if any information is found false.
+6. That this affidavit is made for [SPECIFIC PURPOSE] only.
+
+DEPONENT
+
+VERIFICATION
+I, the above-named deponent, verify that contents are true to my knowledge and belief, nothing material concealed.
+
+Verified at [PLACE] on [DATE].
+
+DEPONENT
+
+Before me:
+Notary Public/Oath Commissioner""",
+
+    'letter': """You are a senior Indian business communication expert. Create PERFECT Indian business letters following government and corporate standards.
+
+CRITICAL REQUIREMENTS:
+✓ Use proper Indian business letter format
+✓ Include complete sender details with PIN code
+✓ Use respectful Indian business language
+✓ Add proper subject line format
+✓ Include reference numbers if applicable
+✓ Use "Yours faithfully" for unknown recipients, "Yours sincerely" for known
+✓ Add enclosure list if documents attached
+
+STRUCTURE:
+[SENDER NAME]
+[DESIGNATION]
+[ORGANIZATION]
+[COMPLETE ADDRESS]
+[CITY - PIN CODE]
+[EMAIL] | [MOBILE]
+
+Ref: [REFERENCE NUMBER]
+Date: [DD/MM/YYYY]
+
+To,
+[RECIPIENT NAME]
+[DESIGNATION]
+[ORGANIZATION]
+[COMPLETE ADDRESS]
+[CITY - PIN CODE]
+
+Subject: [CLEAR SUBJECT LINE]
+
+Dear Sir/Madam,
+
+I hope this letter finds you in good health.
+
+[OPENING PARAGRAPH - Purpose]
+[MAIN CONTENT - Details with bullet points if needed]
+[CLOSING PARAGRAPH - Action requested]
+
+I shall be grateful for your kind consideration and early response.
+
+Thanking you,
+
+Yours faithfully/sincerely,
+
+[SIGNATURE]
+[FULL NAME]
+[DESIGNATION]
+
+Enclosures: [LIST IF ANY]""",
+
+    'contract': """You are an Indian contract law expert. Create LEGALLY SOUND contracts following Indian Contract Act 1872.
+
+CRITICAL REQUIREMENTS:
+✓ Follow Indian Contract Act provisions
+✓ Include proper parties identification
+✓ Add consideration clause
+✓ Include jurisdiction and governing law
+✓ Add dispute resolution mechanism
+✓ Include termination clauses
+✓ Add witness signatures
+
+STRUCTURE:
+[CONTRACT TYPE]
+
+This Agreement is made on [DATE] between:
+
+PARTY 1: [FULL DETAILS]
+PARTY 2: [FULL DETAILS]
+
+WHEREAS [RECITALS]
+
+NOW THEREFORE, parties agree:
+
+1. SCOPE OF WORK/SERVICE
+2. CONSIDERATION AND PAYMENT
+3. DURATION AND COMMENCEMENT
+4. OBLIGATIONS OF PARTIES
+5. TERMINATION CONDITIONS
+6. DISPUTE RESOLUTION
+7. GOVERNING LAW
+8. MISCELLANEOUS
+
+IN WITNESS WHEREOF, parties execute this agreement.
+
+PARTY 1: ________________
+WITNESS: ________________
+
+PARTY 2: ________________
+WITNESS: ________________""",
+
+    'certificate': """You are an Indian certification authority expert. Create OFFICIAL certificates following government standards.
+
+CRITICAL REQUIREMENTS:
+✓ Use official certificate format
+✓ Include proper authority details
+✓ Add certificate number and date
+✓ Include official seal placement
+✓ Use formal certification language
+✓ Add validity period if applicable
+
+STRUCTURE:
+[ORGANIZATION LETTERHEAD]
+
+CERTIFICATE OF [TYPE]
+Certificate No: [NUMBER]
+Date: [DD/MM/YYYY]
+
+This is to certify that [RECIPIENT NAME], son/daughter of [FATHER'S NAME], has successfully [ACHIEVEMENT/COMPLETION].
+
+[DETAILED DESCRIPTION]
+
+This certificate is issued on [DATE] and is valid [VALIDITY PERIOD].
+
+[AUTHORIZED SIGNATURE]
+[NAME AND DESIGNATION]
+[OFFICIAL SEAL]""",
+}
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant."
+
+APPLICATION_SYSTEM_PROMPT = """You are an expert Indian government application specialist with deep knowledge of {language_name} official formats. You have 25+ years experience in Indian bureaucracy and understand regional preferences.
+
+CRITICAL REQUIREMENTS:
+✓ Write the application in {language_name}
+✓ Use EXACT Indian government application format used in all Indian government offices
+✓ Include ALL mandatory personal details in proper sequence
+✓ Use respectful government tone ({salutation})
+✓ Add proper justification with supporting reasons
+✓ Include declaration clause for truthfulness
+✓ Use correct Indian date format (DD/MM/YYYY), with date and place at the bottom
+✓ Add complete enclosure list with specific document names
+✓ Use correct closing ({closing})
+
+FORMAT:
+{format}"""
+
+APPLICATION_FORMATS = {
+    'en': {
+        'language_name': 'English',
+        'salutation': 'Respected Sir/Madam',
+        'closing': 'Yours faithfully',
+        'format': """To,
+[OFFICER DESIGNATION]
+[DEPARTMENT/OFFICE]
+[COMPLETE ADDRESS]
+[CITY - PIN CODE]
+
+Subject: Application for [SPECIFIC PURPOSE]
+
+Respected Sir/Madam,
+
+I, [FULL NAME], son/daughter of [FATHER'S NAME], aged [AGE] years, resident of [ADDRESS], would like to submit this application for [PURPOSE].
+
+My details are as follows:
+1. Full Name: [NAME]
+2. Father's/Husband's Name: [NAME]
+3. Date of Birth: [DD/MM/YYYY]
+4. Address: [COMPLETE ADDRESS WITH PIN]
+5. Mobile Number: [10-DIGIT NUMBER]
+6. Email ID: [EMAIL]
+7. Educational Qualification: [DETAILS]
+
+I hereby declare that all information provided is true and correct.
+
+I request you to kindly consider my application favorably. I shall be highly obliged.
+
+Thanking you,
+Yours faithfully,
+
+[SIGNATURE]
+[FULL NAME]
+Date: [DD/MM/YYYY]
+Place: [CITY NAME]
+
+Enclosures:
+1. [DOCUMENT 1]
+2. [DOCUMENT 2]""",
+    },
+    'hi': {
+        'language_name': 'Hindi (Devanagari script)',
+        'salutation': 'आदरणीय महोदय/महोदया',
+        'closing': 'धन्यवाद सहित',
+        'format': """सेवा में,
+[अधिकारी पदनाम]
+[विभाग/कार्यालय]
+[पूरा पता]
+[शहर - पिन कोड]
+
+विषय: [विशिष्ट उद्देश्य] हेतु आवेदन पत्र
+
+आदरणीय महोदय/महोदया,
+
+मैं [पूरा नाम], पुत्र/पुत्री श्री [पिता का नाम], आयु [आयु] वर्ष, निवासी [पूरा पता], आपके समक्ष [उद्देश्य] हेतु यह आवेदन पत्र प्रस्तुत कर रहा/रही हूँ।
+
+मेरा विवरण निम्नलिखित है:
+1. पूरा नाम: [नाम]
+2. पिता/पति का नाम: [नाम]
+3. जन्म तिथि: [DD/MM/YYYY]
+4. पता: [पूरा पता पिन कोड सहित]
+5. मोबाइल नंबर: [10 अंकीय नंबर]
+6. ईमेल आईडी: [ईमेल]
+7. शैक्षणिक योग्यता: [विवरण]
+
+[मुख्य अनुरोध पैराग्राफ औचित्य सहित]
+
+मैं घोषणा करता/करती हूँ कि उपरोक्त सभी जानकारी सत्य एवं सही है।
+
+अतः आपसे विनम्र निवेदन है कि मेरे आवेदन पर कृपया विचार करें। मैं आपका/आपकी अत्यंत आभारी रहूंगा/रहूंगी।
+
+धन्यवाद सहित,
+आपका/आपकी विश्वासपात्र,
+
+[हस्ताक्षर]
+[पूरा नाम]
+दिनांक: [DD/MM/YYYY]
+स्थान: [शहर का नाम]
+
+संलग्नक:
+1. [दस्तावेज 1]
+2. [दस्तावेज 2]""",
+    },
+}
+
+USER_PROMPTS = {
+    ('general', 'en'): "User question: {prompt}\n\nProvide helpful information about Indian documents or general assistance.",
+    ('application', 'en'): """Create a PERFECT Indian government application.
+
+USER REQUEST: {prompt}
+
+Generate a COMPLETE, GOVERNMENT-READY application that can be submitted immediately.""",
+    ('application', 'hi'): """भारतीय सरकारी कार्यालयों में प्रयुक्त होने वाले सटीक प्रारूप में एक परफेक्ट हिंदी आवेदन पत्र बनाएं।
+
+उपयोगकर्ता का अनुरोध: {prompt}
+
+एक पूर्ण, सरकार-तैयार आवेदन तैयार करें जो तुरंत जमा किया जा सके।""",
+}
+
+DOCUMENT_USER_PROMPT = """Create a professional {document_type} following EXACT Indian legal/official format.
+
+USER REQUEST: {{prompt}}
+
+IMPORTANT INSTRUCTIONS:
+✓ Use ONLY Indian legal terminology and format
+✓ Include ALL mandatory sections and clauses
+✓ Use proper Indian address format with PIN codes
+✓ Add appropriate legal language and phrases
+✓ Include signature blocks and witness lines
+✓ Ensure document is legally compliant in India
+✓ Use respectful Indian communication style{language_line}
+
+Generate a COMPLETE, READY-TO-USE document."""
+
+# Total prompt tokens (system + user) allowed per document type
+PROMPT_BUDGETS = {
+    'general': 1500,
+    'application': 2000,
+}
+DEFAULT_PROMPT_BUDGET = 2500
+
+# A request is Hindi if it asks for it or is written in Devanagari
+HINDI_INDICATORS = ('hindi', 'हिंदी', 'हिन्दी', 'देवनागरी', 'भारतीय', 'सरकारी')
+
+TRIM_MARKER = "\n[...]\n"
+
+# Extracted request details listed after the request, so the model copies them verbatim
+PROMPT_DETAILS = (
+    ('full_name', 'Name'), ('father_name', "Father's/husband's name"), ('age', 'Age'),
+    ('date_of_birth', 'Date of birth'), ('address', 'Address'), ('place', 'Place'), ('mobile', 'Mobile'),
+    ('email', 'Email'), ('aadhaar', 'Aadhaar'), ('pan', 'PAN'),
+)
+DETAILS_HEADER = "\n\nDETAILS FROM THE REQUEST (use exactly as given):"
+
+def prompt_language(prompt: str) -> str:
+    lowered = prompt.lower()
+    return 'hi' if any(indicator in lowered for indicator in HINDI_INDICATORS) or is_hindi(prompt) else 'en'
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count without a tokenizer: ~4 characters per token for ASCII, ~2 for other scripts"""
+    non_ascii = len(text) - len(text.encode('ascii', 'ignore'))
+    return (len(text) - non_ascii + 3) // 4 + (non_ascii + 1) // 2
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Collapse whitespace, then keep the head and tail of ``text`` so it fits ``max_tokens``"""
+    text = '\n'.join(' '.join(line.split()) for line in text.splitlines() if line.strip())
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+
+    # Characters per token for this text, so multi-byte scripts are cut proportionally
+    keep = max(int(len(text) * max_tokens / tokens) - len(TRIM_MARKER), 0)
+    head, tail = text[:keep * 2 // 3], text[len(text) - keep // 3:] if keep // 3 else ''
+    # Cut on word boundaries where there is one nearby
+    head = head[:head.rfind(' ')] if ' ' in head[-40:] else head
+    tail = tail[tail.find(' ') + 1:] if ' ' in tail[:40] else tail
+    return head + TRIM_MARKER + tail
+
+class PromptSet:
+    """Precompiled system prompt and user template for one (document type, language)"""
+
+    def __init__(self, system: str, user_template: str, budget: int):
+        self.system = system
+        self.user_prefix, self.user_suffix = user_template.split('{prompt}')
+        self.budget = budget
+        self.fixed_tokens = estimate_tokens(system) + estimate_tokens(self.user_prefix + self.user_suffix)
+
+    def messages(self, prompt: str, user_data: dict = None) -> tuple:
+        """(messages, estimated prompt tokens, whether the message was trimmed)"""
+        details = details_block(user_data) if user_data else ''
+        fixed_tokens = self.fixed_tokens + estimate_tokens(details)
+        message_tokens = estimate_tokens(prompt)
+        trimmed = fixed_tokens + message_tokens > self.budget
+        if trimmed:
+            prompt = trim_to_tokens(prompt, max(self.budget - fixed_tokens, 0))
+            message_tokens = estimate_tokens(prompt)
+        messages = [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": f"{self.user_prefix}{prompt}{self.user_suffix}{details}"},
+        ]
+        return messages, fixed_tokens + message_tokens, trimmed
+
+def details_block(user_data: dict) -> str:
+    """The extracted details as a list for the end of the user message, or '' when there are none"""
+    lines = [f"- {label}: {user_data[field]}" for field, label in PROMPT_DETAILS if user_data.get(field)]
+    return '\n'.join((DETAILS_HEADER, *lines)) if lines else ''
+
+def build_prompt_set(document_type: str, language: str) -> PromptSet:
+    budget = PROMPT_BUDGETS.get(document_type, DEFAULT_PROMPT_BUDGET)
+    if document_type == 'general':
+        return PromptSet(DEFAULT_SYSTEM_PROMPT, USER_PROMPTS[('general', 'en')], budget)
+    if document_type == 'application':
+        return PromptSet(APPLICATION_SYSTEM_PROMPT.format(**APPLICATION_FORMATS[language]),
+                         USER_PROMPTS[('application', language)], budget)
+
+    language_line = "\n✓ Write the document in Hindi (Devanagari script)" if language == 'hi' else ""
+    user_template = DOCUMENT_USER_PROMPT.format(document_type=document_type.upper(), language_line=language_line)
+    return PromptSet(SYSTEM_PROMPTS.get(document_type, DEFAULT_SYSTEM_PROMPT), user_template, budget)
+
+def build_prompt_sets(document_types) -> dict:
+    """PromptSets for every document type and language, plus general chat"""
+    return {(document_type, language): build_prompt_set(document_type, language)
+            for document_type in ('general', *document_types) for language in ('en', 'hi')}
+
+def prompt_tokens(payload: dict) -> int:
+    """Estimated prompt tokens of a chat completion payload"""
+    return sum(estimate_tokens(message['content']) for message in payload.get('messages', ()))
@@ -0,0 +1,123 @@
+"""Process-pool backend for ReportLab rendering, so PDF layout doesn't hold the GIL on request threads"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from pdf_layouts import build_layout_registry, LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+# Per-child layout registry, built by the pool initializer
+_child_layouts = None
+
+def _init_child(document_types):
+    """Load styles and fonts once per child, then warm ReportLab with a throwaway render"""
+    global _child_layouts
+    _child_layouts = build_layout_registry(document_types)
+    layout = next(iter(_child_layouts.values()))
+    for language in LANGUAGES:
+        layout.render("Warm-up", "Warm-up", language)
+
+def _render_in_child(clean_text: str, title: str, document_type: str, user_data: dict) -> bytes:
+    layout = _child_layouts.get(document_type) or _child_layouts['custom']
+    return layout.render(clean_text, title, user_data=user_data)
+
+def _ping() -> int:
+    return os.getpid()
+
+class RenderPool:
+    """Renders PDFs in a pre-warmed process pool, falling back to inline rendering.
+
+    Only the cleaned text, title and user_data are sent to a child, and only
+    the PDF bytes come back. At most ``max_pending`` renders are in flight;
+    when the pool is saturated, disabled (``processes=0``) or broken, the
+    render runs inline on the calling thread instead. A render that outlives
+    ``timeout`` fails its request, but ReportLab can't be interrupted: it
+    keeps its child, and its slot, until it finishes.
+    """
+
+    def __init__(self, layouts: dict, processes: int = 0, max_pending: int = None, timeout: float = 30.0):
+        self.layouts = layouts
+        self.processes = processes
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending or processes * 2) if processes else None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.counters = {'pool': 0, 'inline': 0, 'timeouts': 0}
+
+    def _get_executor(self):
+        with self._lock:
+            # A pool inherited across a fork is unusable; each worker process starts its own
+            if self._executor is None or self._pid != os.getpid():
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=context,
+                    initializer=_init_child,
+                    initargs=(list(self.layouts),)
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def warm(self):
+        """Start every child now so the first requests don't pay for process startup"""
+        if not self.processes:
+            return
+        executor = self._get_executor()
+        pids = {future.result() for future in [executor.submit(_ping) for _ in range(self.processes * 2)]}
+        logger.info(f"PDF render pool ready with {len(pids)} process(es)")
+
+    def render_inline(self, clean_text: str, title: str, document_type: str, user_data: dict = None) -> bytes:
+        with self._lock:
+            self.counters['inline'] += 1
+        layout = self.layouts.get(document_type) or self.layouts['custom']
+        return layout.render(clean_text, title, user_data=user_data)
+
+    def render(self, clean_text: str, title: str, document_type: str, user_data: dict = None) -> bytes:
+        if not self.processes or not self._slots.acquire(blocking=False):
+            return self.render_inline(clean_text, title, document_type, user_data)
+
+        executor, future = None, None
+        try:
+            executor = self._get_executor()
+            future = executor.submit(_render_in_child, clean_text, title, document_type, dict(user_data or {}))
+            # The slot is held until the render ends, even after its request has timed out
+            future.add_done_callback(lambda _: self._slots.release())
+            pdf_bytes = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Only drops a render still queued; one already running goes on in its child
+            future.cancel()
+            with self._lock:
+                self.counters['timeouts'] += 1
+            raise RuntimeError(f"PDF rendering timed out after {self.timeout:.0f}s")
+        except BrokenProcessPool as e:
+            logger.error(f"PDF render pool broken, rendering inline: {e}")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            return self.render_inline(clean_text, title, document_type, user_data)
+        finally:
+            if future is None:
+                self._slots.release()
+
+        with self._lock:
+            self.counters['pool'] += 1
+        return pdf_bytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'processes': self.processes, **self.counters}
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=False, cancel_futures=True)
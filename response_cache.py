@@ -0,0 +1,164 @@
+"""Exact-match cache for post-processed LLM responses (LRU + TTL, optional disk tier)"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class CachePolicy:
+    """Per-document-type caching rules.
+
+    ``ttl`` of 0 disables caching. Requests sampled above ``max_temperature``
+    are never cached, since a fresh call is expected to give a different answer.
+    """
+
+    def __init__(self, ttl: float = 3600, max_temperature: float = 0.3):
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+
+    def allows(self, payload: dict) -> bool:
+        return self.ttl > 0 and payload.get('temperature', 0) <= self.max_temperature
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so re-sent prompts with cosmetic differences share a key"""
+    return ' '.join(prompt.split())
+
+def make_cache_key(prompt: str, document_type: str, payload: dict) -> str:
+    material = json.dumps({
+        'prompt': normalize_prompt(prompt),
+        'document_type': document_type,
+        'model': payload.get('model'),
+        'temperature': payload.get('temperature'),
+        'max_tokens': payload.get('max_tokens'),
+        'top_p': payload.get('top_p'),
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """Thread-safe LRU cache with per-entry expiry and a bounded memory footprint"""
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 8 * 1024 * 1024,
+                 disk_dir: str = None, policies: dict = None, default_policy: CachePolicy = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.policies = policies or {}
+        self.default_policy = default_policy or CachePolicy()
+
+        self._entries = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'stores': 0}
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def policy_for(self, document_type: str) -> CachePolicy:
+        return self.policies.get(document_type, self.default_policy)
+
+    def get(self, key: str):
+        """Return the cached response or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.counters['hits'] += 1
+                    return entry[1]
+                self._remove(key)
+                self.counters['expirations'] += 1
+
+        value, expires_at = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self.counters['misses'] += 1
+                return None
+            self.counters['disk_hits'] += 1
+            self._insert(key, value, expires_at)
+        return value
+
+    def set(self, key: str, value: str, ttl: float):
+        if ttl <= 0:
+            return
+
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._insert(key, value, expires_at)
+            self.counters['stores'] += 1
+        self._disk_set(key, value, expires_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['disk_hits'] + self.counters['misses']
+            return {
+                **self.counters,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hit_ratio': round((lookups - self.counters['misses']) / lookups, 4) if lookups else 0.0,
+            }
+
+    def _insert(self, key: str, value: str, expires_at: float):
+        if key in self._entries:
+            self._remove(key)
+
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (expires_at, value, size)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.counters['evictions'] += 1
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_get(self, key: str, now: float):
+        if not self.disk_dir:
+            return None, None
+
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+
+        if record.get('expires_at', 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None, None
+        return record.get('value'), record['expires_at']
+
+    def _disk_set(self, key: str, value: str, expires_at: float):
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'expires_at': expires_at, 'value': value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write response cache entry: {e}")
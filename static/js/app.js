@@ -170,22 +170,52 @@ class ChatSystem {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream'
                 },
                 body: JSON.stringify({
                     message: message,
-                    document_type: docType
+                    document_type: docType,
+                    stream: true
                 })
             });
             
-            const data = await response.json();
+            if (!isEventStream(response)) {
+                const data = await response.json();
+                
+                this.hideTypingIndicator();
+                
+                if (response.ok) {
+                    this.addAIMessage(data.response, docType, message);
+                } else {
+                    this.addMessage(`Error: ${data.error}`, 'ai');
+                }
+                return;
+            }
             
-            this.hideTypingIndicator();
+            // Render tokens as they arrive, then swap in the post-processed response
+            let streamingText = null;
             
-            if (response.ok) {
-                this.addAIMessage(data.response, docType, message);
-            } else {
-                this.addMessage(`Error: ${data.error}`, 'ai');
-            }
+            await readEventStream(response, (event, data) => {
+                if (event === 'delta') {
+                    if (!streamingText) {
+                        this.hideTypingIndicator();
+                        streamingText = document.createElement('p');
+                        streamingText.style.whiteSpace = 'pre-wrap';
+                        this.addMessage(streamingText, 'ai');
+                    }
+                    streamingText.textContent += data.text;
+                    this.chatMessages.scrollTop = this.chatMessages.scrollHeight;
+                } else if (event === 'done') {
+                    this.hideTypingIndicator();
+                    if (streamingText) {
+                        streamingText.closest('.message').remove();
+                    }
+                    this.addAIMessage(data.response, docType, message);
+                } else if (event === 'error') {
+                    this.hideTypingIndicator();
+                    this.addMessage(`Error: ${data.error}`, 'ai');
+                }
+            });
         } catch (error) {
             this.hideTypingIndicator();
             this.addMessage(`Error: ${error.message}`, 'ai');
@@ -314,6 +344,45 @@ class ChatSystem {
     }
 }
 
+// Server-Sent Events helpers
+function isEventStream(response) {
+    const contentType = response.headers.get('content-type') || '';
+    return response.ok && contentType.includes('text/event-stream');
+}
+
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            const dataLines = [];
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) {
+                    event = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    dataLines.push(line.slice(5).trim());
+                }
+            });
+            
+            if (dataLines.length) {
+                onEvent(event, JSON.parse(dataLines.join('\n')));
+            }
+        }
+    }
+}
+
 // Document Generation Functions
 async function generateDocument(docType, message) {
     try {
@@ -323,22 +392,31 @@ async function generateDocument(docType, message) {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                'Accept': 'text/event-stream'
             },
             body: JSON.stringify({
                 message: message,
-                document_type: docType
+                document_type: docType,
+                stream: true
             })
         });
         
-        const data = await response.json();
+        let data = {};
+        
+        if (isEventStream(response)) {
+            await readEventStream(response, (event, eventData) => {
+                if (event === 'document' || event === 'error') {
+                    data = eventData;
+                }
+            });
+        } else {
+            data = await response.json();
+        }
         
-        if (response.ok && data.pdf_path) {
+        if (response.ok && data.download_url) {
             try {
-                // Properly encode the PDF path for URL
-                const encodedPath = encodeURIComponent(data.pdf_path);
-                const downloadUrl = `/api/download/${encodedPath}`;
+                const downloadUrl = data.download_url;
                 console.log('Downloading from:', downloadUrl);
-                console.log('Original path:', data.pdf_path);
                 
                 const downloadResponse = await fetch(downloadUrl);
                 
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for upstream admission control
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+import asgi
+from admission import (
+    AdmissionController, AdmissionRejected, PRIORITY_BACKGROUND, PRIORITY_CHAT, PRIORITY_DOCUMENT
+)
+from nim_client import NIMClient
+from nim_stub import NIMStub, serve_in_thread
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.002)
+
+def test_waiting_calls_go_by_priority_then_round_robin_per_client():
+    # One call per 0.2s with room for one at a time
+    controller = AdmissionController(requests_per_minute=300, burst_seconds=0.2)
+    controller.acquire(1)
+    order = []
+
+    def call(name, priority, client):
+        controller.acquire(1, priority, client, max_wait=10)
+        order.append(name)
+
+    queued = [('chat-a1', PRIORITY_CHAT, 'a'), ('chat-a2', PRIORITY_CHAT, 'a'), ('job', PRIORITY_BACKGROUND, 'jobs'),
+              ('chat-b1', PRIORITY_CHAT, 'b'), ('document-c', PRIORITY_DOCUMENT, 'c')]
+    threads = []
+    for index, spec in enumerate(queued):
+        threads.append(threading.Thread(target=call, args=spec))
+        threads[-1].start()
+        wait_for(lambda: controller.stats()['queued'] == index + 1)
+    for thread in threads:
+        thread.join()
+
+    assert order == ['document-c', 'chat-a1', 'chat-b1', 'chat-a2', 'job']
+    assert controller.stats()['admitted'] == 6
+
+def test_rejects_at_once_with_the_estimated_wait():
+    controller = AdmissionController(requests_per_minute=60, burst_seconds=1)
+    controller.acquire(1)
+
+    started = time.perf_counter()
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire(1, max_wait=0.5)
+    assert time.perf_counter() - started < 0.05
+    assert rejected.value.retry_after == 1
+
+    # 10 tokens/s: with 500 of the 600-token bucket spent, a call bigger than the bucket waits 50s for it to fill
+    controller = AdmissionController(requests_per_minute=0, tokens_per_minute=600, burst_seconds=60)
+    controller.acquire(500)
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire(1000, max_wait=5)
+    assert rejected.value.retry_after == 50
+    assert controller.stats()['rejected'] == 1
+
+def test_429_pauses_and_shrinks_the_budget_until_successes_restore_it():
+    controller = AdmissionController(requests_per_minute=120, burst_seconds=1)
+    controller.record_throttle(retry_after=3)
+    stats = controller.stats()
+    assert stats['requests_per_minute'] == 60 and stats['paused_for'] > 2.5
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire(1, max_wait=1)
+    assert rejected.value.retry_after == 3
+
+    for _ in range(20):
+        controller.record_success()
+    assert controller.stats()['requests_per_minute'] == 120
+
+    # Without a configured budget, the limit comes from what was being spent and goes away again
+    unlimited = AdmissionController(requests_per_minute=0)
+    for _ in range(30):
+        unlimited.acquire(1)
+    unlimited.record_throttle()
+    assert unlimited.stats()['requests_per_minute'] == 15
+    for _ in range(20):
+        unlimited.record_success()
+    assert unlimited.stats()['requests_per_minute'] is None
+
+def test_async_waiters_and_token_settlement():
+    # Ten calls a second, one at a time
+    controller = AdmissionController(requests_per_minute=600, burst_seconds=0.1)
+
+    async def burst():
+        return await asyncio.gather(*[controller.acquire_async(50, client=str(index), max_wait=5)
+                                      for index in range(4)])
+
+    started = time.perf_counter()
+    tickets = asyncio.run(burst())
+    assert all(ticket.granted for ticket in tickets)
+    assert 0.15 < time.perf_counter() - started < 1.0
+
+    controller = AdmissionController(requests_per_minute=0, tokens_per_minute=6000, burst_seconds=1)
+    level = controller.tokens.level
+    with controller.admit(100) as ticket:
+        ticket.used_tokens = 40
+    assert controller.tokens.level == pytest.approx(level - 40, abs=5)
+
+def test_routes_answer_429_with_retry_after(monkeypatch):
+    controller = AdmissionController(requests_per_minute=60)
+    controller.record_throttle(retry_after=30)
+    monkeypatch.setattr(app_module, 'admission_controller', controller)
+    monkeypatch.setattr(app_module, 'NVIDIA_API_KEY', 'test')
+    client = app_module.app.test_client()
+
+    for path, body in (('/api/generate-document', {'message': 'Affidavit for address proof', 'document_type': 'affidavit'}),
+                       ('/api/chat', {'message': 'How do I get an affidavit notarised?'})):
+        response = client.post(path, json=body, headers={'X-Cache-Bypass': '1'})
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '30' and response.get_json()['retry_after'] == 30
+
+    stream = client.post('/api/chat', json={'message': 'Hello there', 'stream': True}).get_data(as_text=True)
+    assert 'event: error' in stream and 'try again in 30s' in stream
+    assert client.get('/api/upstream/stats').get_json()['rejected'] == 3
+
+def test_asgi_routes_answer_429_with_retry_after(monkeypatch):
+    controller = AdmissionController(requests_per_minute=60)
+    controller.record_throttle(retry_after=45)
+    monkeypatch.setattr(asgi, 'admission_controller', controller)
+    monkeypatch.setattr(app_module, 'NVIDIA_API_KEY', 'test')
+
+    response = TestClient(asgi.app).post('/api/chat', json={'message': 'How do I get an affidavit notarised?'})
+    assert response.status_code == 429 and response.headers['retry-after'] == '45'
+
+def test_client_reports_upstream_429s():
+    server, base_url = serve_in_thread(NIMStub(error_rates={429: 1.0}, retry_after=2))
+    try:
+        controller = AdmissionController(requests_per_minute=120)
+        client = NIMClient(base_url, max_retries=0, admission=controller)
+        with pytest.raises(Exception):
+            client.chat_completions({'messages': []}, {})
+    finally:
+        server.should_exit = True
+    stats = controller.stats()
+    assert stats['throttled'] == 1 and stats['requests_per_minute'] == 60 and stats['paused_for'] > 1
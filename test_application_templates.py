@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for the application template fast path
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from app import app, extract_user_data
+from application_templates import BLANK, TemplateEngine
+
+ENGINE = TemplateEngine()
+
+LEAVE = ("My name is Rahul Sharma s/o Ramesh Sharma, I live at 45 Gandhi Nagar, New Delhi 110031. "
+         "I need leave from 12th March to 14th March due to my sister's wedding. Mobile 9876543210.")
+
+def test_all_bundled_templates_load_and_match():
+    assert len(ENGINE.templates) == 5
+    assert ENGINE.match("Leave application for 3 days").name == 'indian_leave_application'
+    assert ENGINE.match("Open a savings account at SBI").name == 'indian_bank_account_application'
+    assert ENGINE.match("Admission of my daughter to class 2").name == 'indian_school_admission'
+    assert ENGINE.match("I need a domicile certificate").name == 'indian_government_application'
+    assert ENGINE.match("Apply for the post of clerk").name == 'indian_job_application'
+    assert ENGINE.match("Write a detailed leave application") is None
+    assert ENGINE.match("Application for a new water connection") is None
+
+def test_extracted_fields_fill_the_letter():
+    template = ENGINE.match(LEAVE)
+    values = ENGINE.values_for(extract_user_data(LEAVE))
+    assert template.missing(values) == []
+
+    text = template.fill(values)
+    assert "leave from 12th March to 14th March due to my sister's wedding." in text
+    assert "Mobile: +91-9876543210" in text
+    # Optional lines with nothing to fill are dropped, not left as placeholders
+    assert '[' not in text and 'XXXX' not in text and 'Employee ID' not in text
+
+def test_missing_required_fields_are_reported_and_left_blank():
+    template = ENGINE.match("Apply for the post of accountant, I am Priya Verma")
+    values = ENGINE.values_for(extract_user_data("Apply for the post of accountant, I am Priya Verma"))
+    assert template.missing(values) == ['source of advertisement', 'advertisement date']
+    assert f"accountant advertised in {BLANK} dated {BLANK}." in template.fill(values)
+
+def test_generate_document_reports_generation_path(monkeypatch):
+    def unexpected(*args, **kwargs):
+        raise AssertionError("full generation should not run for a template hit")
+
+    monkeypatch.setattr(app_module, 'generate_ai_response', unexpected)
+    monkeypatch.setattr(app_module, 'NVIDIA_API_KEY', None)
+
+    response = app.test_client().post('/api/generate-document', json={
+        'message': LEAVE, 'document_type': 'application'})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['generation_path'] == 'template'
+    assert body['template'] == 'indian_leave_application'
+    assert 'Rahul Sharma' in body['response']
+
+    monkeypatch.setattr(app_module, 'generate_ai_response', lambda *args: "Respected Sir/Madam,\n\nThanking you,")
+    response = app.test_client().post('/api/generate-document', json={
+        'message': LEAVE, 'document_type': 'application', 'template': False})
+    assert response.get_json()['generation_path'] == 'llm'
+
+    stats = app.test_client().get('/api/templates/stats').get_json()
+    assert stats['paths']['template']['count'] >= 1 and stats['paths']['llm']['count'] >= 1
+
+def test_llm_is_asked_only_for_missing_fields(monkeypatch):
+    payloads = []
+
+    class Completion:
+        def json(self):
+            return {'choices': [{'message': {'content': '{"source of advertisement": "The Hindu", '
+                                                        '"advertisement date": null}'}}]}
+
+    def chat_completions(payload, headers, timeout):
+        payloads.append(payload)
+        return Completion()
+
+    monkeypatch.setattr(app_module, 'NVIDIA_API_KEY', 'test')
+    monkeypatch.setattr(app_module.nim_client, 'chat_completions', chat_completions)
+
+    message = "Apply for the post of accountant, I am Priya Verma"
+    text, info = app_module.template_document(message, 'application', extract_user_data(message))
+    assert info == {'generation_path': 'template+llm', 'template': 'indian_job_application'}
+    assert f"accountant advertised in The Hindu dated {BLANK}." in text
+    assert len(payloads) == 1 and payloads[0]['max_tokens'] < 200
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the ASGI serving mode and the async NIM client
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from starlette.testclient import TestClient
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+import asgi
+from async_nim_client import AsyncNIMClient
+from nim_client import CircuitBreaker, UpstreamError
+
+AFFIDAVIT = "AFFIDAVIT\n\nI, JOHN DOE, do hereby declare.\n\nDEPONENT\n\nVERIFICATION"
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers from the server's script of (status, body, content type), then with a plain completion"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.server.payloads.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+        status, body, content_type = self.server.script.pop(0) if self.server.script else (
+            200, json.dumps({'choices': [{'message': {'content': 'ok'}}]}), 'application/json')
+
+        data = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.payloads, server.script = [], []
+    server.base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_async_client_retries_transient_errors(stub):
+    client = AsyncNIMClient(stub.base_url, backoff_base=0)
+
+    async def call():
+        try:
+            response = await client.chat_completions({'model': 'm'}, {})
+            return await response.json()
+        finally:
+            await client.aclose()
+
+    stub.script.append((503, 'busy', 'text/plain'))
+    assert asyncio.run(call())['choices'][0]['message']['content'] == 'ok'
+    assert len(stub.payloads) == 2
+
+    stub.script.append((401, 'bad key', 'text/plain'))
+    with pytest.raises(UpstreamError) as excinfo:
+        asyncio.run(call())
+    assert excinfo.value.status_code == 401
+    assert len(stub.payloads) == 3
+
+def test_cancelled_probe_releases_the_breaker():
+    # Accepts connections but never answers, so the probe is still waiting when it is cancelled
+    hanging = socket.socket()
+    hanging.bind(('127.0.0.1', 0))
+    hanging.listen()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    client = AsyncNIMClient(f"http://127.0.0.1:{hanging.getsockname()[1]}/v1", breaker=breaker)
+
+    async def run():
+        probe = asyncio.create_task(client.chat_completions({'model': 'stub'}, {}))
+        await asyncio.sleep(0.1)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        await client.aclose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        hanging.close()
+    assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.before_request()
+
+def test_chat_streams_from_async_upstream(stub, monkeypatch):
+    body = "".join(f"data: {json.dumps({'choices': [{'delta': {'content': part}}]})}\n\n"
+                   for part in ("Hello ", "**there**")) + "data: [DONE]\n\n"
+    stub.script.append((200, body, 'text/event-stream'))
+    monkeypatch.setattr(app_module, 'NVIDIA_API_KEY', 'test-key')
+    monkeypatch.setattr(asgi, 'nim_client', AsyncNIMClient(stub.base_url))
+
+    response = TestClient(asgi.app).post('/api/chat', json={'message': 'Say hello', 'stream': True})
+
+    assert stub.payloads[0]['stream'] is True
+    assert response.headers['content-type'].startswith('text/event-stream')
+    assert 'event: delta' in response.text
+    assert '"response": "Hello there"' in response.text
+
+def test_generate_document_and_download(monkeypatch):
+    async def fake_generate(*args):
+        return AFFIDAVIT
+    monkeypatch.setattr(asgi, 'generate_ai_response', fake_generate)
+    client = TestClient(asgi.app)
+
+    body = client.post('/api/generate-document', json={
+        'message': 'Affidavit for address proof, my name is John Doe',
+        'document_type': 'affidavit'
+    }).json()
+    assert body['status'] == 'success'
+
+    full = client.get(body['download_url'])
+    assert full.status_code == 200 and full.content.startswith(b'%PDF')
+    assert 'max-age' in full.headers['cache-control']
+
+    assert client.get(body['download_url'], headers={'If-None-Match': full.headers['etag']}).status_code == 304
+
+    partial = client.get(body['download_url'], headers={'Range': 'bytes=10-19'})
+    assert partial.status_code == 206
+    assert partial.content == full.content[10:20]
+
+    assert client.get('/api/download/unknown').status_code == 404
+
+def test_other_routes_fall_through_to_flask():
+    client = TestClient(asgi.app)
+    assert client.get('/health').json()['status'] == 'healthy'
+    assert client.get('/api/cache/stats').status_code == 200
+    assert client.get('/api/jobs/nope').status_code == 404
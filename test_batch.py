@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for batch document generation
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from app import app
+from batch import run_bounded
+
+CERTIFICATE = "CERTIFICATE\n\nThis is to certify that {name} has completed the training programme.\n\nYours faithfully,"
+
+def fake_generate(message, document_type, bypass_cache=False, user_data=None):
+    if 'fail' in message:
+        return "❌ AI service error: upstream unavailable"
+    return CERTIFICATE.format(name=message.upper())
+
+ITEMS = [
+    {'message': 'Certificate for Asha Rao', 'document_type': 'certificate'},
+    {'message': 'Certificate for fail case', 'document_type': 'certificate'},
+    {'message': 'Certificate for Vikram Singh', 'document_type': 'certificate'},
+    {'message': 'hi', 'document_type': 'certificate'},
+]
+
+def test_run_bounded_limits_concurrency_and_isolates_errors():
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def work(n):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        if n == 3:
+            raise ValueError("bad item")
+        return n * 10
+
+    results = {index: (result, error) for index, result, error in run_bounded(work, range(10), 3)}
+
+    assert peak[0] <= 3
+    assert len(results) == 10
+    assert results[5] == (50, None)
+    assert isinstance(results[3][1], ValueError)
+
+def test_batch_ndjson_reports_each_item(monkeypatch):
+    monkeypatch.setattr(app_module, 'generate_ai_response', fake_generate)
+
+    response = app.test_client().post('/api/generate-documents', json={'items': ITEMS})
+    assert response.mimetype == 'application/x-ndjson'
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    by_index = {line['index']: line for line in lines[:-1]}
+    assert sorted(by_index) == [0, 1, 2, 3]
+    assert by_index[0]['download_url'].startswith('/api/download/')
+    assert by_index[1]['status'] == 'error' and by_index[3]['status'] == 'error'
+    assert lines[-1] == {'status': 'complete', 'total': 4, 'succeeded': 2, 'failed': 2}
+
+def test_batch_zip_contains_pdfs_and_manifest(monkeypatch):
+    monkeypatch.setattr(app_module, 'generate_ai_response', fake_generate)
+
+    response = app.test_client().post('/api/generate-documents', json={'items': ITEMS, 'format': 'zip'})
+    assert response.mimetype == 'application/zip'
+
+    archive = zipfile.ZipFile(io.BytesIO(response.data))
+    manifest = json.loads(archive.read('manifest.json'))
+    assert manifest['succeeded'] == 2 and manifest['failed'] == 2
+    names = [item['archive_name'] for item in manifest['items'] if item['status'] == 'success']
+    assert names[0].startswith('001_') and names[1].startswith('003_')
+    assert all(archive.read(name).startswith(b'%PDF') for name in names)
+
+def test_batch_validation():
+    client = app.test_client()
+    assert client.post('/api/generate-documents', json={'items': []}).status_code == 400
+    too_many = [{'message': 'Leave application', 'document_type': 'application'}] * (app_module.BATCH_MAX_ITEMS + 1)
+    assert client.post('/api/generate-documents', json={'items': too_many}).status_code == 400
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the compiled Indian-document content rules
+"""
+
+import os
+import random
+import re
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import IndianDocumentAgent, DOCUMENT_TYPES
+
+def legacy_validate(content: str, doc_type: str) -> str:
+    """validate_indian_content as it was before the rule engine"""
+    hindi_chars = re.findall(r'[\u0900-\u097F]', content)
+    is_hindi = len(hindi_chars) > 10
+
+    if doc_type == 'affidavit' and 'VERIFICATION' not in content and 'सत्यापन' not in content:
+        if is_hindi:
+            content += "\n\nसत्यापन\n\nमैं सत्यापित करता/करती हूँ कि उपरोक्त विवरण मेरी जानकारी के अनुसार सत्य है।\n\nशपथकर्ता"
+        else:
+            content += "\n\nVERIFICATION\n\nI verify that the contents are true to my knowledge.\n\nDEPONENT"
+
+    content = re.sub(r'\b(\d{6})\b', r'- \1', content)
+
+    if not is_hindi:
+        content = re.sub(r'\bs/o\b', 'son of', content, flags=re.IGNORECASE)
+        content = re.sub(r'\bd/o\b', 'daughter of', content, flags=re.IGNORECASE)
+
+    if doc_type == 'application':
+        if is_hindi:
+            if 'आदरणीय महोदय' not in content and 'आदरणीय महोदया' not in content:
+                content = content.replace('महोदय', 'आदरणीय महोदय')
+            if 'घोषणा करता' not in content and 'घोषणा करती' not in content:
+                declaration = "\n\nमैं घोषणा करता/करती हूँ कि उपरोक्त सभी जानकारी सत्य एवं सही है।"
+                content = content.replace('अतः आपसे विनम्र निवेदन', declaration + '\n\nअतः आपसे विनम्र निवेदन')
+            if 'धन्यवाद सहित' not in content:
+                content = content.replace('आभारी रहूंगा', 'आभारी रहूंगा।\n\nधन्यवाद सहित,')
+        else:
+            if 'Respected Sir/Madam' not in content:
+                content = content.replace('Dear Sir/Madam', 'Respected Sir/Madam')
+            if 'declare that all the information' not in content.lower():
+                declaration = "\n\nI hereby declare that all the information provided above is true and correct to the best of my knowledge."
+                content = content.replace('I request you to kindly', declaration + '\n\nI request you to kindly')
+            # 'Yours obediently', the bundled application templates' sign-off, was added to this guard
+            # after the rule engine; the one intended difference from the original function
+            if 'Yours faithfully' not in content and 'Yours sincerely' not in content \
+                    and 'Yours obediently' not in content:
+                content = content.replace('Thanking you,', 'Thanking you,\n\nYours faithfully,')
+
+    return content
+
+FRAGMENTS = [
+    'Dear Sir/Madam,', 'Respected Sir/Madam', 'I request you to kindly grant leave.', 'Thanking you,',
+    'Yours faithfully', 'Yours sincerely', 'Yours obediently', 'I DECLARE THAT ALL THE INFORMATION is correct.', 'VERIFICATION',
+    'Rahul s/o Ramesh', 'Priya D/O Suresh', 'cars/owners', 'xs/o', 's/o_x', 'New Delhi 110001', 'PIN 1100011',
+    'a123456', '123456b', '१२३४५६', 'Room 12, 560034.', 'सत्यापन', 'महोदय', 'महोदया', 'आदरणीय महोदय',
+    'आदरणीय महोदया', 'अतः आपसे विनम्र निवेदन है', 'घोषणा करता हूँ', 'घोषणा करती', 'आभारी रहूंगा', 'धन्यवाद सहित',
+    'सेवा में, श्रीमान प्रधानाचार्य जी, राजकीय विद्यालय', 'plain text', '\n\n', ' ',
+]
+
+def test_parity_with_previous_rules_on_random_documents():
+    agent = IndianDocumentAgent()
+    rng = random.Random(13)
+    for _ in range(3000):
+        content = ''.join(rng.choice(FRAGMENTS) + rng.choice(['', ' ', '\n']) for _ in range(rng.randint(0, 12)))
+        for doc_type in (*DOCUMENT_TYPES, 'general', 'unknown'):
+            assert agent.validate_indian_content(content, doc_type) == legacy_validate(content, doc_type), \
+                (doc_type, content)
+
+def test_obedient_sign_off_is_not_doubled():
+    agent = IndianDocumentAgent()
+    letter = "Dear Sir/Madam,\nPlease grant leave.\nThanking you,\nYours obediently,\nRahul"
+    assert agent.validate_indian_content(letter, 'application').endswith("Thanking you,\nYours obediently,\nRahul")
+    assert "Yours faithfully" in agent.validate_indian_content(letter.replace("obediently", "truly"), 'application')
+
+def test_application_rules_in_both_languages():
+    agent = IndianDocumentAgent()
+    english = "Dear Sir/Madam,\nI, Rahul s/o Ramesh, New Delhi 110001.\nI request you to kindly grant leave.\nThanking you,"
+    result = agent.validate_indian_content(english, 'application')
+    assert result.startswith("Respected Sir/Madam,\nI, Rahul son of Ramesh, New Delhi - 110001.")
+    assert "I hereby declare that all the information" in result
+    assert result.endswith("Thanking you,\n\nYours faithfully,")
+
+    hindi = "सेवा में, श्रीमान प्रधानाचार्य जी\nमहोदय,\nअतः आपसे विनम्र निवेदन है। मैं आपका आभारी रहूंगा"
+    result = agent.validate_indian_content(hindi, 'application')
+    assert "आदरणीय महोदय," in result and "मैं घोषणा करता/करती हूँ" in result
+    assert result.endswith("आभारी रहूंगा।\n\nधन्यवाद सहित,")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass entity extractor
+"""
+
+import os
+import sys
+import time
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from entity_extractor import EntityExtractor
+from pdf_layouts import build_layout_registry
+
+EXTRACTOR = EntityExtractor()
+
+def test_english_request_fields():
+    data = EXTRACTOR.extract(
+        "I, Anita Devi w/o Suresh Kumar, aged 42 years, residing at 12 MG Road, Lucknow 226001. "
+        "Mobile +91 9876543210, email anita.devi@example.com, PAN ABCDE1234F, Aadhaar 1234 5678 9012. "
+        "I work at State Bank of India.")
+    assert data['full_name'] == 'Anita Devi'
+    assert data['father_name'] == 'Suresh Kumar'
+    assert data['age'] == '42'
+    assert data['address'] == '12 MG Road, Lucknow 226001'
+    assert data['pin_code'] == '226001' and data['place'] == 'Lucknow'
+    assert data['mobile'] == '+91-9876543210'
+    assert data['email'] == 'anita.devi@example.com'
+    assert data['pan'] == 'ABCDE1234F'
+    assert data['aadhaar'] == '1234-5678-9012'
+    assert data['institution'] == 'State Bank of India'
+    assert data['language'] == 'en'
+
+def test_devanagari_request_fields():
+    data = EXTRACTOR.extract("मेरा नाम राहुल शर्मा है, पुत्र श्री रमेश शर्मा, आयु ३० वर्ष, "
+                             "निवासी 45 गांधी नगर, नई दिल्ली ११००३१। मेरा मोबाइल +९१९८७६५४३२१० है।")
+    assert data['full_name'] == 'राहुल शर्मा'
+    assert data['father_name'] == 'रमेश शर्मा'
+    assert data['age'] == '30'
+    assert data['address'] == '45 गांधी नगर, नई दिल्ली 110031'
+    assert data['place'] == 'नई दिल्ली' and data['pin_code'] == '110031'
+    assert data['mobile'] == '+91-9876543210' and 'aadhaar' not in data
+    assert data['language'] == 'hi'
+
+def test_address_ends_at_the_next_clause():
+    data = EXTRACTOR.extract("I am a resident of Pune 411001 and my name is Asha Rao")
+    assert data['address'] == 'Pune 411001' and data['full_name'] == 'Asha Rao'
+    assert EXTRACTOR.extract("residing at 12 MG Road, Lucknow 226001 Uttar Pradesh. Mobile 9876543210")['address'] \
+        == '12 MG Road, Lucknow 226001 Uttar Pradesh'
+    assert EXTRACTOR.extract("निवासी 45 गांधी नगर, नई दिल्ली ११००३१ और मेरा नाम राहुल शर्मा है")['address'] \
+        == '45 गांधी नगर, नई दिल्ली 110031'
+
+def test_names_are_only_read_after_a_keyword():
+    for text in ("I need a letter to State Bank of India to close my account",
+                 "Certificate for completing the Python Training Program",
+                 "Rent agreement between Ramesh Kumar and Suresh Gupta for a flat in Pune",
+                 "Affidavit for name change from Rahul Kumar to Rahul Sharma",
+                 "i am writing to request leave for two days", "I am Ramesh and I need leave",
+                 "I am unwell since yesterday and need leave for two days",
+                 "I am feeling sick today please write leave application"):
+        assert 'full_name' not in EXTRACTOR.extract(text), text
+    assert EXTRACTOR.extract("State Bank of India account closure")['institution'] == 'State Bank of India'
+
+    # Keywords and names are matched in any case
+    assert EXTRACTOR.extract("my name is ramesh kumar and I need an affidavit")['full_name'] == 'Ramesh Kumar'
+    data = EXTRACTOR.extract("NAME: Priya Sharma, D/O shri mohan lal")
+    assert data['full_name'] == 'Priya Sharma' and data['father_name'] == 'Mohan Lal'
+    assert EXTRACTOR.extract("leave for my son named rohit verma")['student_name'] == 'Rohit Verma'
+
+    user_data = app_module.extract_user_data("Rent agreement between Ramesh Kumar and Suresh Gupta")
+    assert 'DETAILS FROM THE REQUEST' not in app_module.build_nim_payload(
+        "Rent agreement", 'contract', user_data)['messages'][1]['content']
+    layout = build_layout_registry({'contract': 'Contract'})['contract']
+    assert not [flowable for flowable in layout.signature_flowables('en', user_data)
+                if 'Ramesh' in getattr(flowable, 'text', '')]
+
+def test_pathological_inputs_take_linear_time():
+    size = 100 * 1024
+    for unit in ('a', 'resident of ', 'from 12 ', 'post of ', 'Ram ', '1234 ', 'a@b ', 'मेरा नाम '):
+        text = unit * (size // len(unit))
+        started = time.perf_counter()
+        EXTRACTOR.extract(text[:size // 10])
+        small = time.perf_counter() - started
+        started = time.perf_counter()
+        EXTRACTOR.extract(text)
+        large = time.perf_counter() - started
+        assert large < 1.0, unit
+        assert large < max(small, 0.001) * 30, unit
+
+def test_extracted_details_reach_the_prompt_and_signature():
+    message = "Affidavit for address proof. My name is Rahul Sharma, resident of 45 Gandhi Nagar, New Delhi 110031"
+    user_data = app_module.extract_user_data(message)
+
+    content = app_module.build_nim_payload(message, 'affidavit', user_data)['messages'][1]['content']
+    assert content.endswith("- Name: Rahul Sharma\n- Address: 45 Gandhi Nagar, New Delhi 110031\n- Place: New Delhi")
+    assert 'DETAILS FROM THE REQUEST' not in app_module.build_nim_payload(message, 'affidavit')['messages'][1]['content']
+
+    layout = build_layout_registry({'affidavit': 'Affidavit Document'})['affidavit']
+    lines = [flowable.text for flowable in layout.signature_flowables('en', user_data) if hasattr(flowable, 'text')]
+    assert lines[-2:] == ['Rahul Sharma', 'Place: New Delhi']
+    assert layout.render("AFFIDAVIT\nI, RAHUL SHARMA, do hereby declare.", "Affidavit", 'en',
+                         user_data).startswith(b'%PDF')
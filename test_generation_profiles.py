@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for adaptive max_tokens generation profiles
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from generation_profiles import GenerationProfiles
+
+def test_default_until_enough_samples_then_percentile_with_headroom():
+    profiles = GenerationProfiles(min_samples=10, percentile=0.9, headroom=1.2, step=256)
+    for n in range(9):
+        profiles.record('application', 'en', 400 + n)
+    assert profiles.max_tokens('application', 'en', 4000) == 4000
+
+    profiles.record('application', 'en', 900)
+    # p90 of 400..408 plus 900 is 408; 408 * 1.2 rounds up to 512
+    assert profiles.max_tokens('application', 'en', 4000) == 512
+    assert profiles.max_tokens('application', 'hi', 4000) == 4000
+
+def test_truncated_completions_raise_the_limit():
+    profiles = GenerationProfiles(min_samples=5, percentile=0.5, headroom=1.0, step=256, ceiling=4096)
+    for _ in range(5):
+        profiles.record('contract', 'en', 1000, 'length')
+    assert profiles.max_tokens('contract', 'en', 3000) == 2048
+    assert profiles.stats()['profiles']['contract/en']['finish_reasons'] == {'length': 5}
+
+def test_profiles_persist_across_restarts(tmp_path):
+    path = str(tmp_path / 'profiles.json')
+    profiles = GenerationProfiles(path=path, min_samples=3)
+    for n in (300, 310, 320):
+        profiles.record('letter', 'en', n, 'stop')
+    profiles.save()
+
+    restarted = GenerationProfiles(path=path, min_samples=3)
+    assert restarted.max_tokens('letter', 'en', 3000) == profiles.max_tokens('letter', 'en', 3000) == 512
+    assert restarted.stats()['profiles']['letter/en']['samples'] == 3
+
+def test_payload_uses_the_profile(monkeypatch):
+    profiles = GenerationProfiles(min_samples=1)
+    profiles.record('affidavit', 'en', 700, 'stop')
+    monkeypatch.setattr(app_module, 'generation_profiles', profiles)
+
+    assert app_module.build_nim_payload("Affidavit for name change", 'affidavit')['max_tokens'] == 1024
+    assert app_module.build_nim_payload("Agreement for rent", 'contract')['max_tokens'] == 3000
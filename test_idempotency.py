@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for in-flight request coalescing and Idempotency-Key replay
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from starlette.testclient import TestClient
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+import asgi
+from idempotency import AsyncSingleFlight, IdempotencyStore, SingleFlight
+
+AFFIDAVIT = "AFFIDAVIT\n\nI, JOHN DOE, do hereby declare.\n\nDEPONENT\n\nVERIFICATION"
+REQUEST = {'message': 'Affidavit for address proof, my name is John Doe', 'document_type': 'affidavit'}
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+
+def counting_generate(flights, callers, calls):
+    """A fake upstream that holds the first call until every other caller is waiting on it"""
+    def fake_generate(*args):
+        calls.append(args)
+        wait_for(lambda: flights.stats()['shared'] >= callers - 1)
+        return AFFIDAVIT
+    return fake_generate
+
+def test_single_flight_shares_one_call_and_recovers_from_abandonment():
+    flights, calls, results = SingleFlight(), [], []
+
+    def work(value):
+        calls.append(value)
+        wait_for(lambda: flights.stats()['shared'] >= 7)
+        return value * 2
+
+    threads = [threading.Thread(target=lambda: results.append(flights.do('key', work, 21))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [21]
+    assert sorted(results) == [(42, False)] + [(42, True)] * 7
+    assert flights.stats() == {'in_flight': 0, 'runs': 1, 'shared': 7, 'abandoned': 0}
+
+    # The leader ends without a result, so the waiting caller runs the work itself
+    flight, leader = flights.begin('key')
+    waiter = threading.Thread(target=lambda: results.append(flights.do('key', lambda: 'own')))
+    waiter.start()
+    wait_for(lambda: flights.stats()['shared'] == 8)
+    flights.end('key', flight)
+    waiter.join()
+    assert leader and results[-1] == ('own', False)
+
+def test_concurrent_identical_requests_make_one_upstream_call(monkeypatch):
+    flights, calls, responses = SingleFlight(), [], []
+    monkeypatch.setattr(app_module, 'document_flights', flights)
+    monkeypatch.setattr(app_module, 'generate_ai_response', counting_generate(flights, 4, calls))
+    client = app_module.app.test_client()
+
+    def post():
+        response = client.post('/api/generate-document', json=REQUEST)
+        responses.append((response.status_code, response.get_json()))
+
+    threads = [threading.Thread(target=post) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [status for status, _ in responses] == [200] * 4
+    assert len({body['pdf_id'] for _, body in responses}) == 1
+    assert flights.stats() == {'in_flight': 0, 'runs': 1, 'shared': 3, 'abandoned': 0}
+
+def test_concurrent_identical_streams_make_one_upstream_call(monkeypatch):
+    flights, calls, streams = SingleFlight(), [], []
+    monkeypatch.setattr(app_module, 'document_flights', flights)
+
+    def fake_stream(*args):
+        calls.append(args)
+        yield 'delta', 'AFFIDAVIT'
+        wait_for(lambda: flights.stats()['shared'] >= 2)
+        yield 'done', AFFIDAVIT
+
+    monkeypatch.setattr(app_module, 'stream_ai_response', fake_stream)
+    client = app_module.app.test_client()
+
+    def post():
+        response = client.post('/api/generate-document', json={**REQUEST, 'stream': True})
+        streams.append(response.get_data(as_text=True))
+
+    threads = [threading.Thread(target=post) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sum('event: delta' in text for text in streams) == 1
+    pdf_ids = {text.split('"pdf_id": "')[1].split('"')[0] for text in streams}
+    assert len(pdf_ids) == 1 and flights.stats()['in_flight'] == 0
+
+def test_idempotency_key_replays_the_stored_response(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module, 'idempotency_store', IdempotencyStore(ttl=60))
+    monkeypatch.setattr(app_module, 'generate_ai_response', lambda *args: calls.append(args) or AFFIDAVIT)
+    client = app_module.app.test_client()
+    headers = {'Idempotency-Key': 'submit-1'}
+
+    first = client.post('/api/generate-document', json=REQUEST, headers=headers)
+    retry = client.post('/api/generate-document', json={**REQUEST, 'message': f" {REQUEST['message']} "},
+                        headers=headers)
+    assert len(calls) == 1
+    assert retry.get_json() == first.get_json()
+    assert retry.headers['Idempotent-Replayed'] == 'true' and 'Idempotent-Replayed' not in first.headers
+
+    pdf = client.post('/api/generate-document', json=REQUEST, headers={**headers, 'Accept': 'application/pdf'})
+    assert pdf.mimetype == 'application/pdf' and pdf.data.startswith(b'%PDF')
+    streamed = client.post('/api/generate-document', json=REQUEST, headers={**headers, 'Accept': 'text/event-stream'})
+    assert 'event: document' in streamed.get_data(as_text=True)
+
+    other = client.post('/api/generate-document', json={**REQUEST, 'document_type': 'contract'}, headers=headers)
+    assert other.status_code == 422
+    assert client.post('/api/generate-document', json=REQUEST, headers={'Idempotency-Key': 'k' * 300}).status_code == 400
+    assert len(calls) == 1
+
+    # Failures are not stored, so a retry runs again
+    monkeypatch.setattr(app_module, 'generate_ai_response', lambda *args: calls.append(args) or '❌ Upstream down')
+    headers = {'Idempotency-Key': 'submit-2'}
+    assert client.post('/api/generate-document', json=REQUEST, headers=headers).status_code == 400
+    assert client.post('/api/generate-document', json=REQUEST, headers=headers).status_code == 400
+    assert len(calls) == 3
+
+def test_async_single_flight_and_asgi_replay(monkeypatch):
+    flights, calls = AsyncSingleFlight(), []
+
+    async def fake_generate(*args):
+        calls.append(args)
+        while flights.stats()['shared'] < 4:
+            await asyncio.sleep(0.005)
+        return AFFIDAVIT
+
+    monkeypatch.setattr(asgi, 'generate_ai_response', fake_generate)
+
+    async def burst():
+        return await asyncio.gather(*[flights.do('key', asgi.document_response, REQUEST['message'], 'affidavit',
+                                                 False, REQUEST) for _ in range(5)])
+
+    results = asyncio.run(burst())
+    assert len(calls) == 1
+    assert [shared for _, shared in results].count(False) == 1
+    assert len({body['pdf_id'] for (body, status), _ in results}) == 1
+
+    monkeypatch.setattr(app_module, 'idempotency_store', IdempotencyStore(ttl=60))
+    monkeypatch.setattr(asgi, 'idempotency_store', app_module.idempotency_store)
+    client = TestClient(asgi.app)
+    first = client.post('/api/generate-document', json=REQUEST, headers={'Idempotency-Key': 'asgi-1'})
+    retry = client.post('/api/generate-document', json=REQUEST, headers={'Idempotency-Key': 'asgi-1'})
+    assert len(calls) == 2
+    assert retry.json() == first.json() and retry.headers['idempotent-replayed'] == 'true'
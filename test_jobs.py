@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for asynchronous document-generation jobs
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from app import app
+from jobs import JobManager, JobQueueFull
+
+AFFIDAVIT = "AFFIDAVIT\n\nI, JOHN DOE, do hereby declare.\n\nDEPONENT\n\nVERIFICATION\n\nDEPONENT"
+
+def wait_done(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        job.wait(job.version, 0.05)
+    return job.done
+
+def test_job_reports_result_and_failure():
+    manager = JobManager(workers=2, max_queue=2)
+
+    ok = manager.submit(lambda job, x: {'value': x * 2}, 21)
+    bad = manager.submit(lambda job: 1 / 0)
+
+    assert wait_done(ok) and wait_done(bad)
+    assert ok.to_dict()['result'] == {'value': 42}
+    assert bad.to_dict()['status'] == 'failed'
+    assert manager.stats()['pending'] == 0
+
+def test_queue_depth_limit_rejects_with_retry_hint():
+    manager = JobManager(workers=1, max_queue=1)
+    release = threading.Event()
+
+    running = manager.submit(lambda job: release.wait(5))
+    queued = manager.submit(lambda job: None)
+    with pytest.raises(JobQueueFull) as excinfo:
+        manager.submit(lambda job: None)
+    assert excinfo.value.retry_after >= 1
+
+    release.set()
+    assert wait_done(running) and wait_done(queued)
+    assert wait_done(manager.submit(lambda job: None))
+
+def test_generate_document_job_mode(monkeypatch):
+    monkeypatch.setattr(app_module, 'generate_ai_response', lambda *args: AFFIDAVIT)
+    client = app.test_client()
+
+    response = client.post('/api/generate-document', json={
+        'message': 'Affidavit for address proof, my name is John Doe',
+        'document_type': 'affidavit',
+        'async': True
+    })
+    assert response.status_code == 202
+    status_url = response.get_json()['status_url']
+    assert response.headers['Location'] == status_url
+
+    job = app_module.job_manager.get(response.get_json()['job_id'])
+    assert wait_done(job)
+
+    state = client.get(status_url).get_json()
+    assert state['status'] == 'succeeded'
+    assert state['result']['download_url'].startswith('/api/download/')
+
+    stream = client.get(status_url, headers={'Accept': 'text/event-stream'})
+    assert stream.mimetype == 'text/event-stream'
+    assert 'event: done' in stream.get_data(as_text=True)
+
+def test_generate_document_job_backpressure(monkeypatch):
+    monkeypatch.setattr(app_module, 'job_manager', JobManager(workers=1, max_queue=0))
+    release = threading.Event()
+    app_module.job_manager.submit(lambda job: release.wait(5))
+
+    response = app.test_client().post('/api/generate-document', json={
+        'message': 'Leave application for 3 days',
+        'document_type': 'application'
+    }, headers={'Prefer': 'respond-async'})
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    release.set()
+
+def test_unknown_job():
+    assert app.test_client().get('/api/jobs/nope').status_code == 404
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus pipeline metrics and /metrics
+"""
+
+import os
+import subprocess
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from prometheus_client import CollectorRegistry
+
+from app import app, render_document_response
+from metrics import PipelineMetrics, upstream_outcome
+from nim_client import CircuitOpenError, UpstreamError
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def sample(metrics, name, **labels):
+    return metrics.registry.get_sample_value(name, labels) or 0
+
+def test_stage_timing_and_bounded_labels():
+    metrics = PipelineMetrics(['affidavit'], registry=CollectorRegistry())
+    with metrics.stage('validate', 'affidavit', 'hi'):
+        pass
+    metrics.observe_stage('prompt', 'made-up type', 'en', 0.002)
+
+    assert sample(metrics, 'docgen_stage_seconds_count', stage='validate', document_type='affidavit',
+                  language='hi') == 1
+    assert sample(metrics, 'docgen_stage_seconds_bucket', stage='prompt', document_type='other',
+                  language='en', le='0.0025') == 1
+    assert sample(metrics, 'docgen_stage_seconds_bucket', stage='prompt', document_type='other',
+                  language='en', le='0.001') == 0
+
+    body, content_type = metrics.render()
+    assert content_type.startswith('text/plain')
+    assert b'docgen_stage_seconds_count{document_type="other",language="en",stage="prompt"} 1.0' in body
+
+def test_upstream_outcomes():
+    assert upstream_outcome(UpstreamError(429, 'slow down')) == '429'
+    assert upstream_outcome(CircuitOpenError(5)) == 'circuit_open'
+    assert upstream_outcome(requests.exceptions.ReadTimeout()) == 'timeout'
+    assert upstream_outcome(requests.exceptions.ConnectionError()) == 'connection_error'
+    assert upstream_outcome(KeyError('choices')) is None
+
+def test_metrics_endpoint_reports_pdf_pipeline():
+    body, status = render_document_response("CERTIFICATE\n\nThis is to certify that metrics are exported.",
+                                            'certificate', {})
+    assert status == 200, body
+    app.test_client().get(body['download_url'])
+
+    response = app.test_client().get('/metrics')
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    for line in ('docgen_stage_seconds_count{document_type="certificate",language="en",stage="pdf_build"}',
+                 'docgen_stage_seconds_count{document_type="certificate",language="en",stage="clean"}',
+                 'docgen_stage_seconds_count{document_type="certificate",language="any",stage="download"}',
+                 'docgen_cache_lookups_total{cache="pdf",result="miss"}',
+                 'docgen_pdf_bytes_total{document_type="certificate"}',
+                 'docgen_temp_bytes'):
+        assert line in text
+
+WORKER = """
+import sys
+sys.path.insert(0, {here!r})
+from prometheus_client import CollectorRegistry
+from metrics import PipelineMetrics
+metrics = PipelineMetrics(['letter'], registry=CollectorRegistry())
+metrics.observe_stage('extract', 'letter', 'en', 0.001)
+metrics.pdf_rendered('letter', 1000)
+"""
+
+def test_samples_from_every_worker_are_aggregated(tmp_path, monkeypatch):
+    env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(tmp_path)}
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', WORKER.format(here=HERE)], env=env, check=True)
+
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    body, _ = PipelineMetrics(['letter'], registry=CollectorRegistry()).render()
+    assert b'docgen_stage_seconds_count{document_type="letter",language="en",stage="extract"} 2.0' in body
+    assert b'docgen_pdf_bytes_total{document_type="letter"} 2000.0' in body
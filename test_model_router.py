@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Tests for per-document-type model routing and hedged requests
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+import asgi
+from admission import AdmissionController, AdmissionRejected
+from async_nim_client import AsyncNIMClient
+from model_router import ModelRouter, parse_model_routes
+from response_cache import ResponseCache
+from nim_client import NIMClient
+from nim_stub import FakeModel, Latency, NIMStub, serve_in_thread
+
+SLOW, FAST, BROKEN = 'stub/slow-70b', 'stub/fast-8b', 'stub/broken'
+
+def fake_attempt(delays, calls):
+    """Attempts that answer 'model:1', 'model:2' after a per-model delay, or raise for a None delay"""
+    def attempt(model, hedge):
+        calls.append((model, hedge))
+        if delays[model] is None:
+            raise RuntimeError(f"{model} is down")
+        time.sleep(delays[model])
+        for index in (1, 2):
+            yield f"{model}:{index}"
+    return attempt
+
+def test_routes_and_error_stats_order_the_models():
+    assert parse_model_routes("general = small ,large; *=large") == {'general': ('small', 'large'), '*': ('large',)}
+    with pytest.raises(ValueError):
+        parse_model_routes("general=")
+
+    router = ModelRouter({'general': ('small', 'large'), '*': ('large', 'other')}, min_samples=8)
+    assert router.models('general') == ['small', 'large']
+    assert router.models('affidavit') == ['large', 'other'] and router.primary('contract') == 'large'
+
+    # Failing most recent calls moves a model behind the healthy ones until it recovers
+    for _ in range(3):
+        router.record_error('large')
+    assert router.models('affidavit') == ['other', 'large']
+    for _ in range(4):
+        router.record('large', 'ttft', 0.2)
+    assert router.models('affidavit') == ['large', 'other']
+
+def test_hedge_delay_follows_the_p95_latency():
+    router = ModelRouter({'*': ('a', 'b')}, default_hedge=3.0, min_samples=20, min_hedge=0.05)
+    assert router.hedge_delay('a', 'ttft') == 3.0
+    for index in range(100):
+        router.record('a', 'ttft', 0.1 if index < 95 else 2.0)
+    assert router.hedge_delay('a', 'ttft') == pytest.approx(2.0)
+    router = ModelRouter({'*': ('a', 'b')}, min_samples=20, min_hedge=0.05)
+    for _ in range(20):
+        router.record('a', 'ttft', 0.1)
+    assert router.hedge_delay('a', 'ttft') == pytest.approx(0.1)
+
+    # Whole answers: no hedge without samples, then their own p95 with no cap
+    assert router.hedge_delay('a', 'total') is None
+    for index in range(40):
+        router.record('a', 'total', 12.0 + index * 0.5)
+    assert router.hedge_delay('a', 'total') == pytest.approx(31.0, abs=0.5)
+    router.record('b', 'ttft', 0.1)
+    assert router.hedge_delay('b', 'ttft') == router.default_hedge
+    for index in range(40):
+        router.record('b', 'ttft', 30.0)
+    assert router.hedge_delay('b', 'ttft') == router.max_hedge
+
+def test_long_completions_are_not_hedged():
+    router = ModelRouter({'*': (SLOW, FAST)}, default_hedge=0.05, min_hedge=0.01)
+    calls = []
+    items = list(router.hedged([SLOW, FAST], fake_attempt({SLOW: 0.3, FAST: 0.0}, calls), 'total'))
+    assert items[0] == (SLOW, f"{SLOW}:1") and calls == [(SLOW, False)]
+
+    # Known completion times: only a call slower than their p95 is hedged
+    for _ in range(20):
+        router.record(SLOW, 'total', 0.5)
+    calls = []
+    assert next(router.hedged([SLOW, FAST], fake_attempt({SLOW: 0.3, FAST: 0.0}, calls), 'total'))[0] == SLOW
+    assert calls == [(SLOW, False)]
+    calls = []
+    assert next(router.hedged([SLOW, FAST], fake_attempt({SLOW: 1.5, FAST: 0.0}, calls), 'total'))[0] == FAST
+    assert calls == [(SLOW, False), (FAST, True)]
+
+    async def run():
+        async def attempt(model, hedge):
+            calls.append(model)
+            await asyncio.sleep(0.3 if model == SLOW else 0.0)
+            yield model
+        return [item async for item in ModelRouter({'*': (SLOW, FAST)}, default_hedge=0.05).hedged_async(
+            [SLOW, FAST], attempt, 'total')]
+    calls = []
+    assert asyncio.run(run()) == [(SLOW, SLOW)] and calls == [SLOW]
+
+def test_slow_primary_is_hedged_and_failures_fall_back():
+    router = ModelRouter({'*': (SLOW, FAST)}, default_hedge=0.05, min_hedge=0.01)
+    calls = []
+    started = time.perf_counter()
+    items = list(router.hedged([SLOW, FAST], fake_attempt({SLOW: 1.0, FAST: 0.0}, calls), 'ttft'))
+    assert time.perf_counter() - started < 0.5
+    assert items == [(FAST, f"{FAST}:1"), (FAST, f"{FAST}:2")]
+    assert calls == [(SLOW, False), (FAST, True)]
+    assert router.stats()['models'][FAST]['hedges_won'] == 1
+
+    # A failing primary hands over at once, without waiting for the hedge deadline
+    calls = []
+    router = ModelRouter({'*': (BROKEN, FAST)}, default_hedge=5.0)
+    started = time.perf_counter()
+    assert next(router.hedged([BROKEN, FAST], fake_attempt({BROKEN: None, FAST: 0.0}, calls), 'total')) \
+        == (FAST, f"{FAST}:1")
+    assert time.perf_counter() - started < 0.5 and calls == [(BROKEN, False), (FAST, False)]
+
+    # Admission rejections are final, and without hedging models are only tried in turn
+    def rejected(model, hedge):
+        calls.append(model)
+        raise AdmissionRejected(3)
+        yield
+    calls = []
+    with pytest.raises(AdmissionRejected):
+        list(router.hedged([SLOW, FAST], rejected, 'ttft', final=(AdmissionRejected,)))
+    assert calls == [SLOW]
+    router.hedging = False
+    assert list(router.hedged([BROKEN, FAST], fake_attempt({BROKEN: None, FAST: 0.0}, []), 'ttft'))[0][0] == FAST
+
+def seeded_router(routes):
+    """A router that has seen the slow model answer whole documents in 0.2s"""
+    router = ModelRouter(routes, default_hedge=0.2)
+    for _ in range(router.min_samples):
+        router.record(SLOW, 'total', 0.2)
+    return router
+
+def multi_model_stub():
+    return NIMStub(token_rate=0, models={SLOW: FakeModel(Latency('fixed:1.5')), FAST: FakeModel(Latency('fixed:0.01')),
+                                         BROKEN: FakeModel(error_rates={503: 1.0})})
+
+def test_app_hedges_against_a_multi_model_stub(monkeypatch):
+    stub = multi_model_stub()
+    server, base_url = serve_in_thread(stub)
+    try:
+        router = seeded_router({'general': (FAST, SLOW), '*': (SLOW, FAST)})
+        monkeypatch.setattr(app_module, 'model_router', router)
+        monkeypatch.setattr(app_module, 'nim_client', NIMClient(base_url, max_retries=0))
+        monkeypatch.setattr(app_module, 'admission_controller', AdmissionController(requests_per_minute=0))
+        monkeypatch.setattr(app_module, 'NVIDIA_API_KEY', 'stub')
+
+        started = time.perf_counter()
+        text = app_module.generate_ai_response("Affidavit for address proof", 'affidavit', True)
+        assert 'AFFIDAVIT' in text and time.perf_counter() - started < 1.2
+
+        events = list(app_module.stream_ai_response("Rent agreement for my flat", 'contract', True))
+        assert events[-1][0] == 'done' and 'RENT AGREEMENT' in events[-1][1]
+
+        # Chat goes to the small model first and is answered before any hedge
+        assert not app_module.generate_ai_response("What is an affidavit?", 'general', True).startswith('❌')
+
+        router.routes['*'] = (BROKEN, FAST)
+        assert 'AFFIDAVIT' in app_module.generate_ai_response("Affidavit for address proof", 'affidavit', True)
+    finally:
+        server.should_exit = True
+
+    models = router.stats()['models']
+    assert models[FAST]['hedges_won'] == 2 and models[FAST]['calls'] >= 4
+    assert models[BROKEN]['failures'] == 1
+    assert stub.stats()['models'][FAST] == 4
+    assert app_module.app.test_client().get('/api/models/stats').get_json()['models'][BROKEN]['failures'] == 1
+
+def test_only_answers_from_the_primary_model_are_cached(monkeypatch):
+    stub = multi_model_stub()
+    server, base_url = serve_in_thread(stub)
+    try:
+        router = ModelRouter({'affidavit': (BROKEN, FAST), '*': (FAST, SLOW)}, hedging=False)
+        monkeypatch.setattr(app_module, 'model_router', router)
+        monkeypatch.setattr(app_module, 'nim_client', NIMClient(base_url, max_retries=0))
+        monkeypatch.setattr(app_module, 'admission_controller', AdmissionController(requests_per_minute=0))
+        monkeypatch.setattr(app_module, 'response_cache', ResponseCache())
+        monkeypatch.setattr(app_module, 'NVIDIA_API_KEY', 'stub')
+
+        # The key names the primary model, so the fallback's answer must not be served as the primary's
+        assert 'AFFIDAVIT' in app_module.generate_ai_response("Affidavit for address proof", 'affidavit')
+        events = list(app_module.stream_ai_response("Affidavit for address proof", 'affidavit'))
+        assert events[-1][0] == 'done' and 'AFFIDAVIT' in events[-1][1]
+        assert app_module.response_cache.stats()['stores'] == 0
+
+        assert 'RENT AGREEMENT' in app_module.generate_ai_response("Rent agreement for my flat", 'contract')
+        assert 'RENT AGREEMENT' in app_module.generate_ai_response("Rent agreement for my flat", 'contract')
+        assert app_module.response_cache.stats()['stores'] == 1
+    finally:
+        server.should_exit = True
+
+    assert stub.stats()['models'][BROKEN] == 2 and stub.stats()['models'][FAST] == 3
+
+def test_asgi_hedges_against_a_multi_model_stub(monkeypatch):
+    server, base_url = serve_in_thread(multi_model_stub())
+    router = seeded_router({'*': (SLOW, FAST)})
+    monkeypatch.setattr(asgi, 'model_router', router)
+    monkeypatch.setattr(asgi, 'admission_controller', AdmissionController(requests_per_minute=0))
+    monkeypatch.setattr(app_module, 'NVIDIA_API_KEY', 'stub')
+
+    async def run():
+        monkeypatch.setattr(asgi, 'nim_client', AsyncNIMClient(base_url, max_retries=0))
+        try:
+            started = time.perf_counter()
+            text = await asgi.generate_ai_response("Affidavit for address proof", 'affidavit', True)
+            elapsed = time.perf_counter() - started
+            events = [event async for event in asgi.stream_ai_response("Rent agreement", 'contract', True)]
+            return text, elapsed, events
+        finally:
+            await asgi.nim_client.aclose()
+
+    try:
+        text, elapsed, events = asyncio.run(run())
+    finally:
+        server.should_exit = True
+    assert 'AFFIDAVIT' in text and elapsed < 1.2
+    assert events[-1][0] == 'done' and 'RENT AGREEMENT' in events[-1][1]
+    assert router.stats()['models'][FAST]['hedges_won'] == 2
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled NIM client against a local stub server
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from nim_client import NIMClient, CircuitBreaker, CircuitOpenError, UpstreamError
+
+COMPLETION = {"choices": [{"message": {"content": "ok"}, "finish_reason": "stop"}]}
+
+class StubNIM(ThreadingHTTPServer):
+    """Chat completions stub that counts TCP connections and requests"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.connections = 0
+        self.requests = 0
+        # Queue of (status, headers) to answer with before falling back to 200
+        self.script = []
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.requests += 1
+            status, headers = self.server.script.pop(0) if self.server.script else (200, {})
+
+        body = json.dumps(COMPLETION if status == 200 else {"error": "stub"}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def stub():
+    server = StubNIM()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_keep_alive_reuses_one_connection(stub):
+    client = NIMClient(stub.base_url, pool_size=2)
+    for _ in range(20):
+        client.chat_completions({"model": "stub"}, {}).json()
+
+    assert stub.requests == 20
+    assert stub.connections == 1
+
+    # The old per-call requests.post pays a fresh handshake every time
+    baseline = stub.connections
+    for _ in range(5):
+        requests.post(f"{stub.base_url}/chat/completions", json={"model": "stub"}, timeout=5)
+    assert stub.connections - baseline == 5
+
+def test_retries_transient_errors_and_honours_retry_after(stub):
+    stub.script = [(503, {}), (429, {'Retry-After': '0.2'})]
+    client = NIMClient(stub.base_url, backoff_base=0.01)
+
+    started = time.monotonic()
+    response = client.chat_completions({"model": "stub"}, {})
+
+    assert response.status_code == 200
+    assert stub.requests == 3
+    assert time.monotonic() - started >= 0.2
+
+def test_non_retryable_status_raises_immediately(stub):
+    stub.script = [(401, {})]
+    client = NIMClient(stub.base_url, backoff_base=0.01)
+
+    with pytest.raises(UpstreamError) as excinfo:
+        client.chat_completions({"model": "stub"}, {})
+
+    assert excinfo.value.status_code == 401
+    assert stub.requests == 1
+
+def test_retry_after_beyond_limit_is_not_waited_for(stub):
+    stub.script = [(429, {'Retry-After': '120'})]
+    client = NIMClient(stub.base_url, max_retry_after=5)
+
+    with pytest.raises(UpstreamError) as excinfo:
+        client.chat_completions({"model": "stub"}, {})
+
+    assert excinfo.value.retry_after == 120
+    assert stub.requests == 1
+
+def test_circuit_breaker_opens_and_closes(stub):
+    stub.script = [(503, {})] * 3
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.3)
+    client = NIMClient(stub.base_url, max_retries=0, breaker=breaker)
+
+    for _ in range(3):
+        with pytest.raises(UpstreamError):
+            client.chat_completions({"model": "stub"}, {})
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # While open, calls fail fast without reaching the upstream
+    with pytest.raises(CircuitOpenError):
+        client.chat_completions({"model": "stub"}, {})
+    assert stub.requests == 3
+
+    # After the cool-down a single probe goes through and closes the breaker
+    time.sleep(0.35)
+    assert client.chat_completions({"model": "stub"}, {}).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert stub.requests == 4
+
+def test_failed_probe_reopens_breaker(stub):
+    stub.script = [(503, {})] * 2
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    client = NIMClient(stub.base_url, max_retries=0, breaker=breaker)
+
+    with pytest.raises(UpstreamError):
+        client.chat_completions({"model": "stub"}, {})
+    time.sleep(0.15)
+    with pytest.raises(UpstreamError):
+        client.chat_completions({"model": "stub"}, {})
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        client.chat_completions({"model": "stub"}, {})
+
+def test_probe_failing_with_any_request_exception_reopens_breaker(stub):
+    # A 200 claiming a gzip body that isn't raises ContentDecodingError, which isn't retried
+    stub.script = [(503, {}), (200, {'Content-Encoding': 'gzip'})]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    client = NIMClient(stub.base_url, max_retries=0, breaker=breaker)
+
+    with pytest.raises(UpstreamError):
+        client.chat_completions({"model": "stub"}, {})
+    time.sleep(0.15)
+    client.max_retries = 2
+    with pytest.raises(requests.exceptions.ContentDecodingError):
+        client.chat_completions({"model": "stub"}, {})
+    assert breaker.state == CircuitBreaker.OPEN and stub.requests == 2
+
+    # The next probe after the cool-down is let through and closes the breaker
+    time.sleep(0.15)
+    assert client.chat_completions({"model": "stub"}, {}).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_probe_ending_without_an_outcome_is_released(stub, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    client = NIMClient(stub.base_url, breaker=breaker)
+
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(client.session, 'post', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        client.chat_completions({"model": "stub"}, {})
+    assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.before_request()
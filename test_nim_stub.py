@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the local NIM stand-in server
+"""
+
+import os
+import sys
+
+import pytest
+from starlette.testclient import TestClient
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from nim_client import NIMClient
+from nim_stub import Latency, NIMStub, parse_error_rates, serve_in_thread
+
+def test_latency_and_error_specs():
+    assert Latency('fixed:0.25').sample() == 0.25
+    assert 0.1 <= Latency('uniform:0.1,0.2').sample() <= 0.2
+    assert Latency('lognormal:0.5,0.4').sample() > 0
+    for bad in ('gamma:1', 'uniform:0.1', 'fixed:fast'):
+        with pytest.raises(ValueError):
+            Latency(bad)
+
+    assert parse_error_rates('429=0.02, 503=0.01') == {429: 0.02, 503: 0.01}
+    with pytest.raises(ValueError):
+        parse_error_rates('500=0.7,503=0.7')
+
+def test_canned_document_for_the_request():
+    client = TestClient(NIMStub(token_rate=0).app())
+    payload = app_module.build_nim_payload("Affidavit for name change, my name is Rahul Sharma", 'affidavit')
+
+    body = client.post('/v1/chat/completions', json=payload).json()
+    choice = body['choices'][0]
+    assert choice['message']['content'].startswith('AFFIDAVIT')
+    assert 'STUB-000001' in choice['message']['content']
+    assert choice['finish_reason'] == 'stop'
+    assert body['usage']['completion_tokens'] > 50
+
+    hindi = app_module.build_nim_payload("मेरा नाम राहुल है, मुझे शपथ पत्र चाहिए", 'affidavit')
+    assert client.post('/v1/chat/completions', json=hindi).json()['choices'][0]['message']['content'].startswith('शपथ पत्र')
+
+def test_stream_honours_max_tokens():
+    client = TestClient(NIMStub(token_rate=0).app())
+    payload = {**app_module.build_nim_payload("Rent agreement for my flat", 'contract'), 'stream': True,
+               'max_tokens': 5}
+
+    with client.stream('POST', '/v1/chat/completions', json=payload) as response:
+        events = [app_module.parse_stream_line(line) for line in response.iter_lines()]
+
+    assert events[-2] is app_module.STREAM_END
+    deltas = [event for event in events if event and event is not app_module.STREAM_END]
+    assert ''.join(content or '' for content, _ in deltas) == "RENT AGREEMENT\n\nThis Rent Agreement "
+    assert deltas[-1][1] == 'length'
+
+def test_injected_errors_carry_retry_after():
+    stub = NIMStub(error_rates={429: 1.0}, retry_after=2)
+    response = TestClient(stub.app()).post('/v1/chat/completions', json={'messages': []})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '2'
+    assert stub.stats()['statuses'] == {'429': 1}
+
+def test_app_generates_against_the_stub(monkeypatch):
+    server, base_url = serve_in_thread(NIMStub(Latency('fixed:0.01'), token_rate=0))
+    try:
+        monkeypatch.setattr(app_module, 'NVIDIA_API_KEY', 'stub')
+        monkeypatch.setattr(app_module, 'nim_client', NIMClient(base_url))
+        text = app_module.generate_ai_response("Experience certificate for Rahul Sharma", 'certificate',
+                                               bypass_cache=True)
+    finally:
+        server.should_exit = True
+    assert text.startswith('EXPERIENCE CERTIFICATE')
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for content-addressed PDF storage and /api/download caching headers
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from app import app, render_document_response
+
+DOCUMENT = """AFFIDAVIT
+
+I, JOHN DOE, son of ROBERT DOE, resident of New Delhi - 110001, do hereby declare.
+
+DEPONENT"""
+
+def render(text=DOCUMENT):
+    body, status = render_document_response(text, 'affidavit', {})
+    assert status == 200, body
+    return body
+
+def test_identical_documents_render_once(monkeypatch):
+    first = render()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("identical document was rendered again")
+    monkeypatch.setattr(app_module.DocumentGenerator, 'generate_pdf_bytes', fail)
+
+    second = render()
+    assert second['pdf_id'] == first['pdf_id']
+    assert len(first['pdf_id']) == 16
+
+def test_different_text_gets_different_id():
+    assert render()['pdf_id'] != render(DOCUMENT + "\n\nVerified at New Delhi.")['pdf_id']
+
+def test_download_etag_and_conditional_get():
+    client = app.test_client()
+    url = render()['download_url']
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert 'max-age' in response.headers['Cache-Control']
+    etag = response.headers['ETag']
+    assert etag.startswith('"') and not etag.startswith('W/')
+
+    cached = client.get(url, headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+def test_download_byte_range():
+    client = app.test_client()
+    url = render()['download_url']
+    full = client.get(url).data
+
+    partial = client.get(url, headers={'Range': 'bytes=100-199'})
+    assert partial.status_code == 206
+    assert partial.data == full[100:200]
+    assert partial.headers['Content-Range'] == f"bytes 100-199/{len(full)}"
+
+    tail = client.get(url, headers={'Range': f'bytes={len(full) - 50}-'})
+    assert tail.data == full[-50:]
+
+def test_raw_paths_and_unknown_ids_are_not_served():
+    client = app.test_client()
+    assert client.get('/api/download/does-not-exist').status_code == 404
+    assert client.get('/api/download/%2Fetc%2Fpasswd').status_code == 404
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the process-wide PDF font registry
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import reportlab
+from reportlab.pdfbase import pdfmetrics
+
+from pdf_fonts import BUILTIN_FAMILY, BUNDLED_FONT_DIR, FONT_REGISTRY, FontRegistry
+from pdf_layouts import LayoutTemplate
+
+# Registry tests use ReportLab's Vera family as a stand-in, independent of the bundled font
+REPORTLAB_FONTS = os.path.join(os.path.dirname(reportlab.__file__), 'fonts')
+STAND_IN = (('Vera', 'Vera.ttf', 'VeraBd.ttf'),)
+
+HINDI = "सेवा में,\nश्रीमान प्रधानाचार्य जी,\nविषय: अवकाश हेतु आवेदन पत्र\nमहोदय,\nधन्यवाद सहित,"
+
+def test_family_is_registered_once_and_only_for_hindi(tmp_path):
+    registry = FontRegistry([str(tmp_path), REPORTLAB_FONTS], families=STAND_IN)
+    assert registry.family_for('en') == BUILTIN_FAMILY
+    assert registry.family_for('hi') == ('Vera', 'Vera-Bold')
+    assert registry.family_for('hi') is registry.family_for('hi')
+    assert {'Vera', 'Vera-Bold'} <= set(pdfmetrics.getRegisteredFontNames())
+
+def test_missing_font_falls_back_to_helvetica(tmp_path):
+    registry = FontRegistry([str(tmp_path)], families=STAND_IN)
+    assert registry.family_for('hi') == BUILTIN_FAMILY
+    assert not registry.has_devanagari
+
+def test_hindi_layout_embeds_a_glyph_subset():
+    layout = LayoutTemplate('application', fonts=FontRegistry([REPORTLAB_FONTS], families=STAND_IN))
+    assert layout.styles['hi'].normal_style.fontName == 'Vera'
+    assert layout.styles['en'].normal_style.fontName == 'Helvetica'
+
+    pdf_bytes = layout.render(HINDI, "Application Form")
+    assert b'/FontFile2' in pdf_bytes
+    assert b'/BaseFont /AAAAAA+BitstreamVeraSans' in pdf_bytes
+    # Only the glyphs used are embedded, never the whole font file
+    assert len(pdf_bytes) < os.path.getsize(os.path.join(REPORTLAB_FONTS, 'Vera.ttf'))
+
+    english = layout.render("Dear Sir,\nThanking you,", "Application Form")
+    assert b'/FontFile2' not in english
+
+def test_hindi_render_embeds_the_bundled_noto_family():
+    registry = FontRegistry([BUNDLED_FONT_DIR])
+    assert registry.family_for('hi') == ('NotoSansDevanagari', 'NotoSansDevanagari-Bold')
+    assert os.path.isfile(os.path.join(BUNDLED_FONT_DIR, 'OFL.txt'))
+
+    # The process-wide registry finds it too, whatever system fonts the host has
+    layout = LayoutTemplate('application')
+    assert FONT_REGISTRY.has_devanagari and layout.styles['hi'].normal_style.fontName == 'NotoSansDevanagari'
+    pdf_bytes = layout.render(HINDI, "आवेदन पत्र")
+    assert b'/BaseFont /AAAAAA+NotoSansDevanagari-Regular' in pdf_bytes
+    assert b'/BaseFont /AAAAAA+NotoSansDevanagari-Bold' in pdf_bytes
+    # Devanagari and Latin both have glyphs, so nothing is printed as empty boxes
+    face = pdfmetrics.getFont('NotoSansDevanagari').face
+    assert all(ord(char) in face.charToGlyph for char in HINDI + "Date: October 17, 2026" if not char.isspace())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for the background PDF janitor
+"""
+
+import os
+import sys
+import time
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pdf_janitor import FileJanitor
+
+def make_files(directory, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"doc_{i}.pdf")
+        with open(path, 'wb') as f:
+            f.write(b'%PDF')
+        paths.append(path)
+    return paths
+
+def no_directory_scans(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("janitor must not scan directories")
+    monkeypatch.setattr(os, 'listdir', fail)
+    monkeypatch.setattr(os, 'scandir', fail)
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_expires_10k_outstanding_files(tmp_path, monkeypatch):
+    paths = make_files(str(tmp_path), 10_000)
+    no_directory_scans(monkeypatch)
+    janitor = FileJanitor(ttl=0.5, max_files=20_000)
+
+    started = time.perf_counter()
+    for path in paths:
+        janitor.track(path, 4)
+    assert time.perf_counter() - started < 2.0
+    assert janitor.stats()['files'] == 10_000
+
+    # Files leave the index before they are unlinked, so wait on the removal count
+    assert wait_for(lambda: janitor.stats()['removed'] == 10_000)
+    assert janitor.stats()['files'] == 0
+    assert not any(os.path.exists(path) for path in paths)
+    janitor.stop()
+
+def test_quota_removes_files_closest_to_expiry(tmp_path, monkeypatch):
+    paths = make_files(str(tmp_path), 10_000)
+    no_directory_scans(monkeypatch)
+    janitor = FileJanitor(ttl=3600, max_files=5_000, max_bytes=10 ** 9)
+
+    for path in paths:
+        janitor.track(path, 4)
+
+    assert janitor.stats() == {'files': 5_000, 'bytes': 20_000, 'removed': 5_000, 'running': True}
+    assert not any(os.path.exists(path) for path in paths[:5_000])
+    assert all(os.path.exists(path) for path in paths[5_000:])
+    janitor.stop()
+
+def test_byte_quota_and_explicit_remove(tmp_path):
+    first, second, third = make_files(str(tmp_path), 3)
+    janitor = FileJanitor(ttl=3600, max_bytes=10)
+
+    janitor.track(first, 4)
+    janitor.track(second, 4)
+    janitor.track(third, 4)
+    assert not os.path.exists(first) and first not in janitor
+
+    janitor.remove(second)
+    assert not os.path.exists(second) and second not in janitor
+    assert janitor.stats()['bytes'] == 4
+    janitor.stop()
+
+def test_later_file_with_earlier_expiry_wakes_thread(tmp_path):
+    slow, fast = make_files(str(tmp_path), 2)
+    janitor = FileJanitor()
+
+    janitor.track(slow, 4, ttl=3600)
+    janitor.track(fast, 4, ttl=0.05)
+
+    assert wait_for(lambda: not os.path.exists(fast), timeout=1.0)
+    assert os.path.exists(slow)
+    janitor.stop()
+    assert not janitor.stats()['running']
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for progressive PDF assembly from streamed text
+"""
+
+import os
+import random
+import sys
+
+from reportlab import rl_config
+from starlette.testclient import TestClient
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+import asgi
+from app import DOCUMENT_TYPES, LAYOUT_TEMPLATES, finalize_ai_response, progressive_pdf
+from text_normalizer import normalize_for_pdf
+
+# No VERIFICATION block, so validation appends one after the last streamed line
+AFFIDAVIT = """**AFFIDAVIT**
+
+I, Rahul Sharma, s/o Ramesh Sharma, aged 30 years, resident of 45 Gandhi Nagar, New Delhi 110031, do hereby solemnly affirm:
+
+1. That I am a citizen of India and the deponent herein.
+2. That my correct name is Rahul  Sharma & my date of birth is 01/01/1995.
+
+
+3. That the statements made above are true.
+
+DEPONENT"""
+
+def stream(text, seed=7):
+    """Deltas of a few characters each, as tokens would arrive"""
+    rng, position = random.Random(seed), 0
+    while position < len(text):
+        step = rng.randint(1, 12)
+        yield text[position:position + step]
+        position += step
+
+def assemble(text, document_type, language='en'):
+    progressive = progressive_pdf(document_type, {'language': language})
+    for delta in stream(text):
+        if progressive.feed(delta):
+            progressive.lay_out()
+    clean_text = normalize_for_pdf(finalize_ai_response(text, document_type))
+    return progressive, clean_text
+
+def test_streamed_layout_matches_a_full_render_including_appended_blocks(monkeypatch):
+    monkeypatch.setattr(rl_config, 'invariant', 1)
+    progressive, clean_text = assemble(AFFIDAVIT, 'affidavit')
+    assert 'VERIFICATION' in clean_text and 'son of Ramesh' in clean_text
+    # Everything but the last line was laid out while streaming
+    assert progressive.paragraphs == clean_text.split('\n')[:len(progressive.paragraphs)]
+    assert progressive.paragraphs[-1].startswith('3. That the statements')
+
+    title = DOCUMENT_TYPES['affidavit']
+    user_data = {'full_name': 'Rahul Sharma', 'place': 'New Delhi'}
+    pdf_bytes = progressive.finish(clean_text, title, user_data)
+    assert progressive.discarded is None
+    assert pdf_bytes == LAYOUT_TEMPLATES['affidavit'].render(clean_text, title, user_data=user_data)
+
+def test_layout_is_discarded_when_the_final_text_differs():
+    # The guard phrase only arrives after the line its rule rewrote
+    letter = "To,\nThe Manager\n\nDear Sir/Madam,\n\nPlease help.\n\nRespected Sir/Madam, thank you.\nRahul"
+    progressive, clean_text = assemble(letter, 'application')
+    assert progressive.finish(clean_text, DOCUMENT_TYPES['application']) is None
+    assert 'differs' in progressive.discarded
+
+    hindi = "शपथ पत्र\n\nमैं राहुल शर्मा सत्यनिष्ठा से घोषणा करता हूं।\n\nशपथकर्ता"
+    progressive, clean_text = assemble(hindi, 'affidavit', language='en')
+    assert progressive.finish(clean_text, DOCUMENT_TYPES['affidavit']) is None
+    assert 'laid out for en' in progressive.discarded
+
+def test_streamed_document_request_uses_the_progressive_layout(monkeypatch):
+    def fake_stream(*args):
+        for delta in stream(AFFIDAVIT):
+            yield 'delta', delta.replace('*', '')
+        yield 'done', finalize_ai_response(AFFIDAVIT, 'affidavit')
+
+    class NoRenders:
+        def render(self, *args):
+            raise AssertionError("the streamed layout should have been used")
+
+    monkeypatch.setattr(app_module, 'stream_ai_response', fake_stream)
+    monkeypatch.setattr(app_module, 'render_pool', NoRenders())
+    client = app_module.app.test_client()
+    events = client.post('/api/generate-document', headers={'X-Cache-Bypass': '1'}, json={
+        'message': 'Affidavit for name correction, my name is Rahul Sharma', 'document_type': 'affidavit',
+        'stream': True}).get_data(as_text=True)
+    assert 'event: document' in events
+
+    pdf_id = events.split('"pdf_id": "')[1].split('"')[0]
+    pdf = client.get(f"/api/download/{pdf_id}")
+    assert pdf.status_code == 200 and pdf.data.startswith(b'%PDF')
+
+    async def fake_async_stream(*args):
+        for event in fake_stream(*args):
+            yield event
+
+    monkeypatch.setattr(asgi, 'stream_ai_response', fake_async_stream)
+    events = TestClient(asgi.app).post('/api/generate-document', headers={'X-Cache-Bypass': '1'}, json={
+        'message': 'Affidavit for name correction, my name is Rahul Sharma Jr', 'document_type': 'affidavit',
+        'stream': True}).text
+    assert 'event: document' in events and '"status": "success"' in events.split('event: document')[1]
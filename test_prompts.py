@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Tests for prompt assembly and token budgeting
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import build_nim_payload
+from prompts import TRIM_MARKER, PromptSet, estimate_tokens, prompt_language, trim_to_tokens
+
+def test_application_prompt_carries_only_the_requested_language():
+    english = build_nim_payload("Application for a caste certificate", 'application')['messages']
+    assert 'Respected Sir/Madam' in english[0]['content']
+    assert 'सेवा में' not in english[0]['content']
+
+    hindi = build_nim_payload("जाति प्रमाण पत्र के लिए आवेदन, हिंदी में", 'application')['messages']
+    assert 'सेवा में' in hindi[0]['content']
+    assert 'ENGLISH FORMAT' not in hindi[0]['content'] and 'Respected Sir/Madam,' not in hindi[0]['content']
+    assert 'जाति प्रमाण पत्र' in hindi[1]['content']
+
+def test_language_and_token_estimates():
+    assert prompt_language("Leave letter in hindi please") == 'hi'
+    assert prompt_language("Leave letter for my office") == 'en'
+    assert estimate_tokens("abcd" * 100) == 100
+    assert estimate_tokens("नमस्ते" * 10) == 30
+
+def test_oversized_message_is_trimmed_to_the_budget():
+    prompt_set = PromptSet("System prompt.", "Request: {prompt}", budget=200)
+    message = "START " + "filler words here " * 500 + "END"
+
+    messages, tokens, trimmed = prompt_set.messages(message)
+    assert trimmed and tokens <= 200
+    content = messages[1]['content']
+    assert content.startswith("Request: START") and content.endswith("END") and TRIM_MARKER in content
+
+    messages, tokens, trimmed = prompt_set.messages("Short request")
+    assert not trimmed and messages[1]['content'] == "Request: Short request"
+    assert trim_to_tokens("a   b\n\n\nc", 100) == "a b\nc"
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the PDF render process pool
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pdf_layouts import build_layout_registry
+from render_pool import RenderPool
+
+LAYOUTS = build_layout_registry({'affidavit': 'Affidavit Document', 'custom': 'Custom Document'})
+TEXT = "AFFIDAVIT\nI, JOHN DOE, do hereby declare.\nDEPONENT"
+
+def test_pool_renders_in_child_process():
+    pool = RenderPool(LAYOUTS, processes=1, timeout=60)
+    try:
+        pool.warm()
+        pdf_bytes = pool.render(TEXT, "Affidavit Document", 'affidavit', {'name': 'John Doe'})
+        assert pdf_bytes.startswith(b'%PDF')
+        assert pool.stats()['pool'] == 1
+    finally:
+        pool.shutdown()
+
+def test_disabled_or_saturated_pool_renders_inline():
+    inline = RenderPool(LAYOUTS)
+    assert inline.render(TEXT, "Affidavit Document", 'affidavit').startswith(b'%PDF')
+    assert inline.stats()['inline'] == 1
+
+    saturated = RenderPool(LAYOUTS, processes=1, max_pending=1)
+    saturated._slots.acquire()
+    assert saturated.render(TEXT, "Affidavit Document", 'unknown-type').startswith(b'%PDF')
+    assert saturated.stats() == {'processes': 1, 'pool': 0, 'inline': 1, 'timeouts': 0}
+    saturated.shutdown()
+
+def test_timed_out_render_keeps_its_slot_until_it_finishes():
+    pool = RenderPool(LAYOUTS, processes=1, max_pending=1, timeout=0.01)
+    try:
+        pool.warm()
+        with pytest.raises(RuntimeError, match="timed out"):
+            pool.render(TEXT * 3000, "Affidavit Document", 'affidavit')
+        # Still rendering in the child, so the next render can't queue behind it
+        assert pool.render(TEXT, "Affidavit Document", 'affidavit').startswith(b'%PDF')
+        assert pool.stats()['inline'] == 1 and pool.stats()['timeouts'] == 1
+
+        deadline = time.monotonic() + 60
+        while not pool._slots.acquire(blocking=False):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        pool._slots.release()
+    finally:
+        pool.shutdown()
+
+def test_broken_pool_is_shut_down_and_replaced():
+    pool = RenderPool(LAYOUTS, processes=1, timeout=60)
+    try:
+        pool.warm()
+        broken = pool._executor
+        shutdowns = []
+        shutdown = broken.shutdown
+        broken.shutdown = lambda **kwargs: shutdowns.append(kwargs) or shutdown(**kwargs)
+        for process in list(broken._processes.values()):
+            process.kill()
+            process.join()
+
+        assert pool.render(TEXT, "Affidavit Document", 'affidavit').startswith(b'%PDF')
+        assert pool.stats()['inline'] == 1
+        assert shutdowns == [{'wait': False, 'cancel_futures': True}] and pool._executor is None
+
+        assert pool.render(TEXT, "Affidavit Document", 'affidavit').startswith(b'%PDF')
+        assert pool.stats()['pool'] == 1 and pool._executor is not broken
+    finally:
+        pool.shutdown()
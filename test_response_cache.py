@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM response cache
+"""
+
+import os
+import sys
+import time
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from response_cache import ResponseCache, CachePolicy, make_cache_key
+
+PAYLOAD = {"model": "meta/llama-3.1-70b-instruct", "temperature": 0.2, "max_tokens": 3000, "top_p": 0.85}
+
+def test_key_ignores_cosmetic_whitespace_but_not_parameters():
+    key = make_cache_key("Leave application  for\n3 days", "application", PAYLOAD)
+    assert key == make_cache_key("  Leave application for 3 days ", "application", PAYLOAD)
+    assert key != make_cache_key("Leave application for 3 days", "letter", PAYLOAD)
+    assert key != make_cache_key("Leave application for 3 days", "application", {**PAYLOAD, "max_tokens": 4000})
+
+def test_lru_eviction_and_counters():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", "A", ttl=60)
+    cache.set("b", "B", ttl=60)
+    assert cache.get("a") == "A"  # "b" is now least recently used
+    cache.set("c", "C", ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "C"
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (2, 1, 1, 2)
+
+def test_byte_bound_evicts():
+    cache = ResponseCache(max_entries=100, max_bytes=10)
+    cache.set("a", "x" * 6, ttl=60)
+    cache.set("b", "y" * 6, ttl=60)
+    assert cache.get("a") is None
+    assert cache.stats()['bytes'] == 6
+
+def test_ttl_expiry():
+    cache = ResponseCache()
+    cache.set("a", "A", ttl=0.05)
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()['expirations'] == 1
+
+def test_disk_tier_survives_memory_loss(tmp_path):
+    cache = ResponseCache(disk_dir=str(tmp_path))
+    cache.set("a", "हिंदी आवेदन", ttl=60)
+
+    fresh = ResponseCache(disk_dir=str(tmp_path))
+    assert fresh.get("a") == "हिंदी आवेदन"
+    assert fresh.get("a") == "हिंदी आवेदन"
+    assert (fresh.stats()['disk_hits'], fresh.stats()['hits']) == (1, 1)
+
+def test_policies():
+    cache = ResponseCache(policies={'general': CachePolicy(ttl=0)})
+    assert not cache.policy_for('general').allows({**PAYLOAD, "temperature": 0.7})
+    assert cache.policy_for('affidavit').allows(PAYLOAD)
+    assert not cache.policy_for('affidavit').allows({**PAYLOAD, "temperature": 0.9})
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for single-pass text normalization
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from text_normalizer import normalize_for_pdf, strip_markdown, is_hindi
+
+def legacy_strip_markdown(text):
+    text = text.replace('**', '').replace('*', '')
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.replace('\n\n\n', '\n\n')
+
+def test_strip_markdown_matches_previous_passes():
+    rng = random.Random(7)
+    for _ in range(2000):
+        text = ''.join(rng.choice('ab *\n') for _ in range(rng.randint(0, 40)))
+        assert strip_markdown(text) == legacy_strip_markdown(text), repr(text)
+
+def test_paragraph_structure_is_kept():
+    text = "TITLE  \n\n\n\n  1.\tFirst   clause\n2. Second clause\r\n\r\nYours faithfully,\n"
+    assert normalize_for_pdf(text) == "TITLE\n\n1. First clause\n2. Second clause\n\nYours faithfully,"
+
+def test_markup_is_stripped_and_escaped():
+    assert normalize_for_pdf("Text with <b>HTML</b> tags") == "Text with HTML tags"
+    assert normalize_for_pdf("A &amp; B &lt;test&gt; &quot;q&quot; &#39;s&#39;") == \
+        "A &amp; B &lt;test&gt; \"q\" 's'"
+    assert normalize_for_pdf("x < y & z") == "x &lt; y &amp; z"
+    assert normalize_for_pdf("z > w") == "z &gt; w"
+    assert normalize_for_pdf("a&nbsp;&nbsp;b <> c") == "a b &lt;&gt; c"
+    assert normalize_for_pdf("") == "" and normalize_for_pdf(" \n\n ") == ""
+    assert normalize_for_pdf("if a<b and <i>c</i>") == "if a&lt;b and c"
+
+def test_unclosed_angle_brackets_take_linear_time():
+    for unit in ('<', 'a < b ', '<<x'):
+        small, large = unit * (10 * 1024 // len(unit)), unit * (100 * 1024 // len(unit))
+        started = time.perf_counter()
+        normalize_for_pdf(small)
+        small_time = time.perf_counter() - started
+        started = time.perf_counter()
+        assert normalize_for_pdf(large).count('&lt;') == large.count('<')
+        large_time = time.perf_counter() - started
+        assert large_time < 0.5, unit
+        assert large_time < max(small_time, 0.001) * 30, unit
+
+def test_devanagari_text_and_detection():
+    hindi = "सेवा में,\n\n\n   श्रीमान   प्रधानाचार्य जी"
+    assert normalize_for_pdf(hindi) == "सेवा में,\n\nश्रीमान प्रधानाचार्य जी"
+    assert is_hindi(hindi)
+    assert not is_hindi("To, The Principal " + "नमस्ते")
@@ -0,0 +1,64 @@
+"""Text normalization for AI responses and PDF markup, in as few passes over the text as possible"""
+
+import re
+from itertools import islice
+
+# Tags, the entities the model emits and ReportLab's special characters, resolved in one scan.
+# Every branch starts with a literal so the regex engine can skip ahead to the next '<', '&' or '>'.
+# A tag can't contain another '<', so an unclosed '<' only scans as far as the next one: without
+# that, each one would scan (and backtrack) to the end of the text, quadratic in its length.
+_MARKUP = re.compile(r"<(?:[^<>]+>)?|&(?:lt;|gt;|amp;|nbsp;|quot;|#39;)?|>")
+
+_MARKUP_REPLACEMENTS = {
+    '<': '&lt;', '&': '&amp;', '>': '&gt;',
+    '&lt;': '&lt;', '&gt;': '&gt;', '&amp;': '&amp;',
+    '&nbsp;': ' ', '&quot;': '"', '&#39;': "'",
+}
+
+def _markup_replacement(match) -> str:
+    # Anything not in the table is a whole tag, which is dropped
+    return _MARKUP_REPLACEMENTS.get(match.group(), '')
+
+def normalize_for_pdf(text: str) -> str:
+    """Strip HTML, escape for ReportLab and tidy whitespace, keeping one paragraph per line.
+
+    Runs of blank lines become a single blank line, and whitespace inside a
+    line is collapsed to single spaces.
+    """
+    if not text:
+        return ""
+
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    if '<' in text or '&' in text or '>' in text:
+        text = _MARKUP.sub(_markup_replacement, text)
+
+    lines = []
+    blank = False
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            blank = True
+            continue
+        if '  ' in line or '\t' in line or '\xa0' in line:
+            line = ' '.join(line.split())
+        if blank and lines:
+            lines.append('')
+        lines.append(line)
+        blank = False
+    return '\n'.join(lines)
+
+def strip_markdown(text: str) -> str:
+    """Remove '*' emphasis and collapse three or more consecutive newlines into a blank line"""
+    if '*' in text:
+        text = text.replace('*', '')
+    # Each pass shortens every run by a third, so even a pathological run takes only a few passes
+    while '\n\n\n' in text:
+        text = text.replace('\n\n\n', '\n\n')
+    return text
+
+_DEVANAGARI = re.compile(r'[\u0900-\u097F]')
+
+def is_hindi(text: str, threshold: int = 10) -> bool:
+    """More than ``threshold`` Devanagari characters, without collecting every match"""
+    return sum(1 for _ in islice(_DEVANAGARI.finditer(text), threshold + 1)) > threshold